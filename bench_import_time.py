@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# bench_import_time.py
+# Tempo di avvio a freddo della CLI misurato con `python -X importtime`.
+# Fallisce (exit 1) se si supera il budget o se una dipendenza pesante viene
+# importata all'avvio invece che al primo uso.
+#
+#   python bench_import_time.py                    # main.py --help + import pipeline
+#   python bench_import_time.py --budget-ms 250 --top 15
+import argparse, os, re, subprocess, sys, tempfile
+
+# devono restare lazy: si caricano solo quando servono davvero
+HEAVY = ("trafilatura", "bs4", "dateutil", "dateparser", "tldextract",
+         "requests", "markdown2", "matplotlib", "folium", "tiktoken")
+
+TARGETS = {
+    "main --help": ["main.py", "--help"],
+    "import pipeline": ["-c", "import pipeline"],
+}
+
+_LINE_RX = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def importtime(argv):
+    """-> (tempo totale ms, [(cumulativo_us, modulo)] dei moduli top-level)."""
+    env = {**os.environ, "LOG_DIR": tempfile.mkdtemp(prefix="bench_logs_"), "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True,
+                          env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RX.match(line)
+        if m and len(m.group(3)) == 1:  # solo moduli importati direttamente (indentazione 1)
+            rows.append((int(m.group(2)), m.group(4)))
+    return sum(c for c, _ in rows) / 1000, rows, proc.stderr
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Budget di import-time per l'avvio della CLI")
+    ap.add_argument("--budget-ms", type=float, default=300.0)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    failed = False
+    for name, argv in TARGETS.items():
+        total_ms, rows, raw = importtime(argv)
+        loaded = {m.group(4).split(".")[0] for m in map(_LINE_RX.match, raw.splitlines()) if m}
+        eager = sorted(set(HEAVY) & loaded)
+        ok = total_ms <= args.budget_ms and not eager
+        failed |= not ok
+        print(f"\n== {name}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms) {'OK' if ok else 'FAIL'}")
+        for cum, mod in sorted(rows, reverse=True)[:args.top]:
+            print(f"  {cum / 1000:8.1f} ms  {mod}")
+        if eager:
+            print(f"  dipendenze pesanti importate all'avvio: {', '.join(eager)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
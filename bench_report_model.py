@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# bench_report_model.py
+# Costruzione di ReportModel: percorso strict (validazione Pydantic completa) vs trusted
+# (models.make / ReportModel.trusted) su report sintetici con N documenti.
+# Verifica anche che i due percorsi producano lo stesso JSON.
+#
+#   python bench_report_model.py                     # 100 / 1000 / 10000 documenti
+#   python bench_report_model.py --sizes 500 5000 --text-chars 8000 --repeat 5
+import argparse, random, string, sys, time
+from datetime import date, datetime
+
+from models import (
+    ReportModel, ReportMetadata, Scope, TimeWindow, Source, Document, Finding, Citation, Event,
+    Narrative, Methodology, make, new_id, new_report_id, sha256_text
+)
+
+
+def synth(n, text_chars, seed=0):
+    """Record grezzi (dict) come quelli prodotti dalla pipeline: N fonti, N documenti, N/10 finding."""
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 9))) for _ in range(500)]
+    rows = []
+    for i in range(1, n + 1):
+        text = " ".join(rnd.choice(words) for _ in range(text_chars // 6))[:text_chars]
+        rows.append({
+            "src": new_id("SRC", i), "doc": new_id("DOC", i),
+            "url": f"https://www.example{i % 97}.org/news/{i}", "domain": f"example{i % 97}.org",
+            "title": f"Documento {i}", "published": f"2025-10-{i % 28 + 1:02d}", "text": text,
+        })
+    return rows
+
+
+def build(rows, trusted, precomputed=None):
+    now = datetime(2025, 11, 5, 12, 0)
+    sources = [make(Source, trusted, id=r["src"], type="Other", domain=r["domain"], title=r["title"],
+                    published_at=r["published"], accessed_at=now, url=r["url"], reliability="D")
+               for r in rows]
+    documents = [make(Document, trusted, id=r["doc"], source_id=r["src"], url=r["url"], title=r["title"],
+                      published_at=r["published"], text=r["text"], lang="it",
+                      hash=precomputed[i] if precomputed else None)
+                 for i, r in enumerate(rows)]
+    findings = [make(Finding, trusted, id=new_id("CLM", k + 1), text=r["title"], support="Unknown",
+                     confidence=0.5, citations=[make(Citation, trusted, source_id=r["src"], document_id=r["doc"])])
+                for k, r in enumerate(rows[::10])]
+    timeline = [make(Event, trusted, id=new_id("EVT", k + 1), date_iso=r["published"], title=r["title"],
+                     citations=[make(Citation, trusted, source_id=r["src"], document_id=r["doc"])])
+                for k, r in enumerate(rows[::20])]
+    data = dict(
+        metadata=make(ReportMetadata, trusted, report_id=new_report_id(now, 1), title="bench", query="bench",
+                      generated_at=now),
+        scope=make(Scope, trusted, time_window=make(TimeWindow, trusted, **{"from": date(2025, 10, 1)},
+                                                    to=date(2025, 11, 5)), languages=["it"]),
+        sources=sources, documents=documents, findings=findings, timeline=timeline,
+        narrative=make(Narrative, trusted, sentiment="neutral"),
+        methodology=make(Methodology, trusted, collectors=["bench"]),
+    )
+    return ReportModel.trusted(**data) if trusted else ReportModel(**data)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark costruzione ReportModel strict vs trusted")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--text-chars", type=int, default=3000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'docs':>7} {'strict ms':>10} {'trusted ms':>11} {'+hash ms':>9} {'speedup':>8}  json")
+    ok = True
+    for n in args.sizes:
+        rows = synth(n, args.text_chars)
+        hashes = [sha256_text(r["text"].strip()) for r in rows]  # come se arrivassero dalla fetch
+        t_strict, a = timed(lambda: build(rows, False), args.repeat)
+        t_trusted, b = timed(lambda: build(rows, True, hashes), args.repeat)
+        t_hash, _ = timed(lambda: build(rows, True), args.repeat)
+        same = a.to_json() == b.to_json()
+        ok &= same
+        print(f"{n:>7} {t_strict * 1000:>10.1f} {t_trusted * 1000:>11.1f} {t_hash * 1000:>9.1f} "
+              f"{t_strict / max(t_trusted, 1e-9):>7.1f}x  {'uguale' if same else 'DIVERSO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
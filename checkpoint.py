@@ -0,0 +1,167 @@
+# checkpoint.py
+# Checkpoint per stadio della pipeline, sotto CHECKPOINT_DIR/<run_id>/:
+#   meta.json          query, topk, stadi completati
+#   <stadio>.json      output dello stadio (plan, seeds, docs, ranked, summary, ...)
+# Con `--resume RUN_ID` gli stadi già completati vengono ricaricati dal disco e la run
+# riparte dal primo stadio mancante (es. compose_report dopo un timeout dell'LLM).
+# Ogni nuova run applica la retention (CHECKPOINT_KEEP run, CHECKPOINT_MAX_AGE_DAYS giorni).
+# Uno stadio che ripiega su un output di fallback (LLM senza JSON valido) lo segnala con
+# mark_degraded(): né lui né gli stadi successivi vengono salvati, la ripresa li ricalcola.
+from __future__ import annotations
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from config import CHECKPOINT_DIR, CHECKPOINT_KEEP, CHECKPOINT_MAX_AGE_DAYS
+from corpus import Doc
+from provenance import log_event
+
+
+_state = threading.local()
+
+
+def mark_degraded(reason: str = "fallback") -> None:
+    """Segnala che lo stadio in corso (nel thread corrente) ritorna un output di ripiego."""
+    _state.degraded = reason
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+# JSON non conserva tuple e chiavi intere (es. refs {1: url}): le marchiamo
+def _enc(obj: Any) -> Any:
+    if isinstance(obj, Doc):
+        return {"__doc__": _enc(obj.to_dict())}
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_enc(x) for x in obj]}
+    if isinstance(obj, list):
+        return [_enc(x) for x in obj]
+    if isinstance(obj, dict):
+        if obj and all(isinstance(k, int) for k in obj):
+            return {"__intkeys__": [[k, _enc(v)] for k, v in obj.items()]}
+        return {str(k): _enc(v) for k, v in obj.items()}
+    return obj
+
+
+def _dec(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [_dec(x) for x in obj]
+    if isinstance(obj, dict):
+        if set(obj) == {"__tuple__"}:
+            return tuple(_dec(x) for x in obj["__tuple__"])
+        if set(obj) == {"__doc__"}:
+            return Doc.from_dict(_dec(obj["__doc__"]))
+        if set(obj) == {"__intkeys__"}:
+            return {int(k): _dec(v) for k, v in obj["__intkeys__"]}
+        return {k: _dec(v) for k, v in obj.items()}
+    return obj
+
+
+def prune_runs(root: str = CHECKPOINT_DIR, keep: int = CHECKPOINT_KEEP,
+               max_age_days: float = CHECKPOINT_MAX_AGE_DAYS, exclude=()) -> List[str]:
+    """Rimuove le run oltre le `keep` più recenti o non toccate da `max_age_days` giorni
+    (0 = nessun limite); ritorna gli id rimossi."""
+    try:
+        runs = [e for e in os.scandir(root) if e.is_dir() and e.name not in exclude]
+    except FileNotFoundError:
+        return []
+    runs.sort(key=lambda e: e.stat().st_mtime, reverse=True)  # mtime: ultimo stadio scritto
+    cutoff = time.time() - max_age_days * 86400
+    drop = [e for i, e in enumerate(runs)
+            if (keep and i >= keep) or (max_age_days and e.stat().st_mtime < cutoff)]
+    for e in drop:
+        shutil.rmtree(e.path, ignore_errors=True)
+    if drop:
+        log_event("checkpoint_pruned", {"runs": [e.name for e in drop], "kept": len(runs) - len(drop)})
+    return [e.name for e in drop]
+
+
+class Checkpoint:
+    """Output degli stadi di una run persistiti su disco (scrittura atomica per file)."""
+    def __init__(self, run_id: Optional[str] = None, root: str = CHECKPOINT_DIR):
+        self.run_id = run_id or new_run_id()
+        self.dir = os.path.join(root, self.run_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.meta = self._read("meta") or {"run_id": self.run_id, "created": time.time(), "stages": []}
+        self.degraded: Optional[str] = None   # primo stadio degradato della run
+        self._depth = 0
+        if run_id is None:
+            prune_runs(root, exclude=(self.run_id,))
+
+    @classmethod
+    def resume(cls, run_id: str, root: str = CHECKPOINT_DIR) -> "Checkpoint":
+        if not os.path.isfile(os.path.join(root, run_id, "meta.json")):
+            raise FileNotFoundError(f"nessun checkpoint per la run {run_id} in {root}")
+        return cls(run_id, root)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, f"{name}.json")
+
+    def _read(self, name: str) -> Any:
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                return _dec(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name: str, obj: Any) -> None:
+        tmp = self._path(name) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_enc(obj), f, ensure_ascii=False)
+        os.replace(tmp, self._path(name))
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self.meta["stages"])
+
+    def set_meta(self, **fields) -> None:
+        self.meta.update(fields)
+        self._write("meta", self.meta)
+
+    def stage(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Output dello stadio `name`: dal checkpoint se già completato, altrimenti
+        calcolato con fn(*args, **kwargs) e salvato prima di proseguire (se né questo
+        stadio né uno precedente della run è degradato)."""
+        if name in self.meta["stages"]:
+            out = self._read(name)
+            if out is not None:
+                log_event("checkpoint_hit", {"run_id": self.run_id, "stage": name})
+                return out
+        t0 = time.time()
+        # stadi annidati (es. "docs" dentro "ranked"): il degrado risale allo stadio esterno
+        outer = getattr(_state, "degraded", None) if self._depth else None
+        _state.degraded = None
+        self._depth += 1
+        try:
+            out = fn(*args, **kwargs)
+        finally:
+            self._depth -= 1
+            reason, _state.degraded = _state.degraded, outer or _state.degraded
+        if reason and not self.degraded:
+            self.degraded = name
+        if self.degraded:
+            # gli stadi successivi dipendono da questo output: nessuno viene salvato
+            log_event("checkpoint_skipped", {"run_id": self.run_id, "stage": name, "degraded": self.degraded,
+                                             "reason": reason or "upstream"})
+            return out
+        self._write(name, out)
+        self.meta["stages"] = [s for s in self.meta["stages"] if s != name] + [name]
+        self._write("meta", self.meta)
+        log_event("checkpoint_saved", {"run_id": self.run_id, "stage": name, "secs": round(time.time() - t0, 2)})
+        return out
+
+
+class NoCheckpoint:
+    """Stessa interfaccia, senza persistenza (CHECKPOINTS=false)."""
+    run_id = None
+    meta: Dict[str, Any] = {}
+
+    def set_meta(self, **fields) -> None:
+        pass
+
+    def stage(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return fn(*args, **kwargs)
@@ -1,9 +1,9 @@
 # classification.py
-import tldextract
 from config import SOURCE_TYPE_BY_DOMAIN
 
 def domain_of(url: str) -> str:
     if not url: return ""
+    import tldextract  # lazy import
     d = tldextract.extract(url)
     return d.registered_domain or ""
 
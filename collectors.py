@@ -0,0 +1,226 @@
+# collectors.py
+# Raccolta multi-sorgente: ogni collector produce seed normalizzati
+#   {"url", "title", "published", "snippet", ["text", ...campi doc]}
+# (con "text" il seed è già un documento completo, es. via fetch.doc_from_text: niente fetch).
+# I task di tutti i collector girano in parallelo su un pool condiviso; ogni collector ha
+# il suo rate limit (intervallo minimo fra task) e un budget di seed; i risultati vengono
+# fusi con dedup sull'URL canonico. L'attesa del rate limit avviene fuori dal pool (timer):
+# un collector rallentato non occupa worker che servono agli altri.
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from config import COLLECT_WORKERS, COLLECTOR_LIMITS, USE_RELIEFWEB, USE_FEEDS, FEEDS
+from dedup import canonical_url
+from provenance import log_event
+
+
+class RateLimiter:
+    """Intervallo minimo fra due partenze (thread-safe): ogni task prenota il proprio turno."""
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def reserve(self) -> float:
+        """Prenota la prossima partenza; ritorna i secondi da attendere (0 = subito)."""
+        if self.min_interval <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_at)
+            self.next_at = slot + self.min_interval
+        return slot - now
+
+
+class Collector:
+    """
+    Sorgente di seed. Sottoclassi: `tasks()` (unità di lavoro indipendenti, es. una per query)
+    e `run(task)` (seed del task). Limiti da COLLECTOR_LIMITS[name] se non passati.
+    """
+    name = "base"
+
+    def __init__(self, budget: Optional[int] = None, min_interval: Optional[float] = None):
+        limits = COLLECTOR_LIMITS.get(self.name, {})
+        self.budget = budget if budget is not None else int(limits.get("budget", 100))
+        self.limiter = RateLimiter(min_interval if min_interval is not None else float(limits.get("interval", 0)))
+
+    def tasks(self, plan: Dict[str, Any], query: str, from_iso: Optional[str]) -> List[Any]:
+        return []
+
+    def run(self, task: Any) -> Iterable[Dict[str, Any]]:
+        return []
+
+
+class SearxngCollector(Collector):
+    name = "searxng"
+
+    def tasks(self, plan, query, from_iso):
+        return list(plan.get("queries") or [query])
+
+    def run(self, task):
+        from searxng import searxng_search
+        return searxng_search(task)
+
+
+class ReliefWebCollector(Collector):
+    name = "reliefweb"
+
+    def tasks(self, plan, query, from_iso):
+        return [(query, from_iso)]
+
+    def run(self, task):
+        from sources_reliefweb import reliefweb_docs
+        return reliefweb_docs(*task)
+
+
+class FeedCollector(Collector):
+    """Un task per feed: GET condizionale, quindi un feed invariato costa un 304."""
+    name = "feeds"
+
+    def __init__(self, feeds=None, **kw):
+        super().__init__(**kw)
+        self.feeds = list(feeds if feeds is not None else FEEDS)
+
+    def tasks(self, plan, query, from_iso):
+        return [(name, url, query, from_iso) for name, url in self.feeds]
+
+    def run(self, task):
+        from sources_feeds import feed_items
+        return feed_items(*task)
+
+
+# nome -> factory; registrare qui nuove sorgenti (feed, archivi locali, ...)
+REGISTRY: Dict[str, Callable[[], Collector]] = {"searxng": SearxngCollector}
+if USE_RELIEFWEB:
+    REGISTRY["reliefweb"] = ReliefWebCollector
+if USE_FEEDS and FEEDS:
+    REGISTRY["feeds"] = FeedCollector
+
+
+def register_collector(name: str, factory: Callable[[], Collector]) -> None:
+    REGISTRY[name] = factory
+
+
+def default_collectors() -> List[Collector]:
+    return [factory() for factory in REGISTRY.values()]
+
+
+class Scheduler:
+    """
+    Task dei collector su un pool condiviso. `futures` (future -> collector) si può attendere
+    con as_completed/wait; `accept(fut)` applica normalizzazione, budget e dedup canonico
+    e ritorna solo i seed nuovi. Un seed già emesso e poi arricchito dal testo di un'altra
+    sorgente finisce in `pop_upgrades()` (chi ne ha già fatto una copia la deve aggiornare).
+    """
+    def __init__(self, collectors: Optional[List[Collector]] = None, workers: int = COLLECT_WORKERS):
+        self.collectors = collectors if collectors is not None else default_collectors()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collect")
+        self.futures: Dict[Future, Collector] = {}
+        self.seen: Dict[str, Dict[str, Any]] = {}
+        self.upgrades: List[Dict[str, Any]] = []
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.timers: List[threading.Timer] = []
+
+    def _task(self, c: Collector, task: Any) -> List[Dict[str, Any]]:
+        return list(c.run(task) or [])
+
+    def _run_into(self, fut: Future, c: Collector, task: Any) -> None:
+        if not fut.set_running_or_notify_cancel():
+            return  # annullato (budget, shutdown) mentre aspettava il turno
+        try:
+            fut.set_result(self._task(c, task))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    def _release(self, fut: Future, c: Collector, task: Any) -> None:
+        try:
+            self.pool.submit(self._run_into, fut, c, task)
+        except RuntimeError:
+            fut.cancel()  # pool già chiuso
+
+    def _submit(self, c: Collector, task: Any) -> Future:
+        delay = c.limiter.reserve()
+        if delay <= 0:
+            return self.pool.submit(self._task, c, task)
+        # il turno arriva più tardi: la future esiste subito (attendibile, annullabile),
+        # il task entra nel pool solo allo scadere del timer
+        fut: Future = Future()
+        timer = threading.Timer(delay, self._release, (fut, c, task))
+        timer.daemon = True
+        timer.start()
+        self.timers.append(timer)
+        return fut
+
+    def start(self, plan: Dict[str, Any], query: str, from_iso: Optional[str]) -> "Scheduler":
+        for c in self.collectors:
+            self.stats[c.name] = {"tasks": 0, "items": 0, "kept": 0, "dup": 0, "over_budget": 0, "err": 0}
+            for t in c.tasks(plan, query, from_iso):
+                self.futures[self._submit(c, t)] = c
+                self.stats[c.name]["tasks"] += 1
+        return self
+
+    def accept(self, fut: Future) -> List[Dict[str, Any]]:
+        c = self.futures.pop(fut)
+        st = self.stats[c.name]
+        try:
+            items = fut.result()
+        except Exception as e:
+            st["err"] += 1
+            log_event("collector_err", {"collector": c.name, "err": str(e)})
+            return []
+        out = []
+        for it in items:
+            st["items"] += 1
+            u = canonical_url(it.get("url"))
+            if not u:
+                continue
+            if u in self.seen:
+                prev = self.seen[u]
+                # stesso URL da più sorgenti: vince chi porta già il testo
+                if it.get("text") and not prev.get("text"):
+                    prev.update({**it, "url": u})
+                    self.upgrades.append(prev)
+                st["dup"] += 1
+                continue
+            if st["kept"] >= c.budget:
+                st["over_budget"] += 1
+                continue
+            item = {**it, "url": u, "collector": c.name}
+            self.seen[u] = item
+            st["kept"] += 1
+            out.append(item)
+        if st["kept"] >= c.budget:
+            # budget esaurito: i task non ancora partiti di questo collector vengono annullati
+            for f, owner in list(self.futures.items()):
+                if owner is c and f.cancel():
+                    self.futures.pop(f)
+        return out
+
+    def pop_upgrades(self) -> List[Dict[str, Any]]:
+        out, self.upgrades = self.upgrades, []
+        return out
+
+    def shutdown(self) -> None:
+        for t in self.timers:
+            t.cancel()
+        for f in self.futures:
+            f.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        log_event("collect_done", {"stats": self.stats, "unique": len(self.seen)})
+
+
+def collect(plan: Dict[str, Any], query: str, from_iso: Optional[str] = None,
+            collectors: Optional[List[Collector]] = None) -> List[Dict[str, Any]]:
+    """Tutti i collector in parallelo; seed fusi (URL canonico) nell'ordine di arrivo
+    (gli arricchimenti aggiornano in place i seed già in `out`)."""
+    sched = Scheduler(collectors).start(plan, query, from_iso)
+    out: List[Dict[str, Any]] = []
+    try:
+        for fut in as_completed(list(sched.futures)):
+            if fut in sched.futures:
+                out += sched.accept(fut)
+    finally:
+        sched.shutdown()
+    return out
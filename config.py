@@ -8,20 +8,112 @@ SEARXNG_TIME_RANGE = os.getenv("SEARXNG_TIME_RANGE", "month")  # day|week|month
 SEARXNG_LANGUAGE = os.getenv("SEARXNG_LANGUAGE", "it-IT")
 SEARXNG_PAGE_SIZE = int(os.getenv("SEARXNG_PAGE_SIZE", "15"))
 SEARXNG_PAGES = int(os.getenv("SEARXNG_PAGES", "2"))  # quante pagine per query
+# lingue ammesse (es. "it,en"): seed e pagine in altre lingue scartati prima dell'estrazione; vuoto = nessun filtro
+LANG_ALLOWED = os.getenv("LANG_ALLOWED", "")
+
+# -------- ReliefWeb (API report umanitari, collector parallelo a SearXNG) --------
+USE_RELIEFWEB = os.getenv("USE_RELIEFWEB", "false").lower() in ("1", "true", "yes")  # opt-in: API esterna
+RELIEFWEB_API = os.getenv("RELIEFWEB_API", "https://api.reliefweb.int/v1/reports")
+RELIEFWEB_APPNAME = os.getenv("RELIEFWEB_APPNAME", "osint-multiagent")
+RELIEFWEB_LIMIT = int(os.getenv("RELIEFWEB_LIMIT", "50"))          # report per pagina
+RELIEFWEB_MAX_PAGES = int(os.getenv("RELIEFWEB_MAX_PAGES", "4"))   # pagine scaricate in parallelo
+RELIEFWEB_MIN_TEXT = int(os.getenv("RELIEFWEB_MIN_TEXT", "200"))   # body più corti: scartati
+
+# -------- Feed RSS/Atom (sources_feeds.py) --------
+# off di default: ogni run interrogherebbe host esterni non richiesti
+USE_FEEDS = os.getenv("USE_FEEDS", "false").lower() in ("1", "true", "yes")
+# "nome=url" separati da virgola; default (usato solo con USE_FEEDS attivo): domini prioritari
+FEEDS = [tuple(x.strip().split("=", 1)) for x in os.getenv("FEEDS", ",".join([
+    "ANSA=https://www.ansa.it/sito/notizie/mondo/mondo_rss.xml",
+    "Reuters=https://www.reutersagency.com/feed/?best-topics=political-general&post_type=best",
+    "UN News=https://news.un.org/feed/subscribe/en/news/all/rss.xml",
+    "WHO=https://www.who.int/rss-feeds/news-english.xml",
+])).split(",") if "=" in x]
+FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", str(5 * 1024 * 1024)))  # oltre: parsing interrotto
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "200"))    # entry lette per poll
+FEED_KEEP = int(os.getenv("FEED_KEEP", "300"))              # entry (GUID) ricordate per feed
+FEED_MIN_TEXT = int(os.getenv("FEED_MIN_TEXT", "800"))      # testo >= soglia: documento senza fetch HTML
+
+# -------- Export PDF (pdf_render.py) --------
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")          # auto | weasyprint | chromium
+PDF_PAGES = int(os.getenv("PDF_PAGES", "4"))            # pagine Chromium in parallelo
+HTML_CACHE_SIZE = int(os.getenv("HTML_CACHE_SIZE", "64"))  # Markdown->HTML in cache (per hash)
+
+# -------- Collector (sorgenti di seed in parallelo, collectors.py) --------
+COLLECT_WORKERS = int(os.getenv("COLLECT_WORKERS", "6"))
+# per collector: budget = seed massimi tenuti, interval = secondi minimi fra due task (rate limit)
+COLLECTOR_LIMITS = {
+    "searxng": {"budget": int(os.getenv("COLLECT_BUDGET_SEARXNG", "80")),
+                "interval": float(os.getenv("COLLECT_INTERVAL_SEARXNG", "0.3"))},
+    "reliefweb": {"budget": int(os.getenv("COLLECT_BUDGET_RELIEFWEB", "100")),
+                  "interval": float(os.getenv("COLLECT_INTERVAL_RELIEFWEB", "0"))},
+    "feeds": {"budget": int(os.getenv("COLLECT_BUDGET_FEEDS", "120")),
+              "interval": float(os.getenv("COLLECT_INTERVAL_FEEDS", "0"))},
+}
 
 # -------- LLM (OpenAI-compatible) --------
 BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")  # vLLM/Ollama -> http://host:port/v1
 API_KEY = os.getenv("OPENAI_API_KEY", "sk-...")  # per vLLM/Ollama puoi mettere placeholder se non serve
 MODEL = os.getenv("LLM_MODEL", "gpt-oss:20b")    # oppure "llama-3.1-8b-instruct", ecc.
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))  # finestra del modello servito (num_ctx / max_model_len)
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "o200k_base")  # encoding tiktoken; se assente stima euristica
+# budget di contesto (token) per stadio + tetto per singolo documento
+CONTEXT_BUDGETS = {
+    "ner": int(os.getenv("CONTEXT_BUDGET_NER", "3000")),
+    "sentiment": int(os.getenv("CONTEXT_BUDGET_SENTIMENT", "3000")),
+    "summarize": int(os.getenv("CONTEXT_BUDGET_SUMMARIZE", "5000")),
+    "analysis": int(os.getenv("CONTEXT_BUDGET_ANALYSIS", "3000")),
+    "shared": int(os.getenv("CONTEXT_BUDGET_SHARED", "4000")),  # blocco FONTI comune (layout shared_prefix)
+}
+CONTEXT_DOC_TOKENS = int(os.getenv("CONTEXT_DOC_TOKENS", "700"))
+# output JSON degli stadi: "auto" (json_schema se il server lo accetta, poi senza vincoli),
+# "json_schema", "json_object" oppure "off" (solo parsing tollerante)
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "auto")
+LLM_JSON_RETRIES = int(os.getenv("LLM_JSON_RETRIES", "1"))  # retry mirati allo stadio fallito
+# layout prompt: "stage" (system specifico + fonti nel messaggio utente) oppure
+# "shared_prefix" (blocco fonti identico in testa a tutti gli stadi → prefix caching vLLM/Ollama)
+LLM_PROMPT_LAYOUT = os.getenv("LLM_PROMPT_LAYOUT", "stage")
+# NER + sentiment + eventi in una sola chiamata (fallback alle chiamate singole se il JSON non valida)
+LLM_FUSED_ANALYSIS = os.getenv("LLM_FUSED_ANALYSIS", "false").lower() in ("1", "true", "yes")
 
 # -------- Crawl/Extract --------
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "30"))
 USER_AGENT = os.getenv("USER_AGENT", "OSINT-AgentBot/1.0 (+https://example.local)")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))  # connessioni keep-alive per host (sessioni condivise)
+# tetti in byte per tipo (lettura in streaming: oltre il tetto HTML/testo vengono troncati, i PDF scartati)
+FETCH_MAX_HTML_BYTES = int(os.getenv("FETCH_MAX_HTML_BYTES", str(3 * 1024 * 1024)))
+FETCH_MAX_TEXT_BYTES = int(os.getenv("FETCH_MAX_TEXT_BYTES", str(2 * 1024 * 1024)))
+FETCH_MAX_PDF_BYTES = int(os.getenv("FETCH_MAX_PDF_BYTES", str(25 * 1024 * 1024)))
+# budget adattivo: fetch in ordine di priorità, stop quando ci sono abbastanza doc buoni e diversi
+CRAWL_MAX_FETCH = int(os.getenv("CRAWL_MAX_FETCH", "40"))
+CRAWL_TARGET_DOCS = int(os.getenv("CRAWL_TARGET_DOCS", "20"))
+CRAWL_MIN_PRIORITY = float(os.getenv("CRAWL_MIN_PRIORITY", "0.35"))  # sotto: il doc non conta come "buono"
+CRAWL_MIN_TEXT = int(os.getenv("CRAWL_MIN_TEXT", "400"))
+CRAWL_DOMAIN_PENALTY = float(os.getenv("CRAWL_DOMAIN_PENALTY", "0.15"))  # per doc già preso dallo stesso dominio
+# salute per host (persistita tra le run): timeout adattivi dai percentili di latenza + circuit breaker
+STATE_DIR = os.getenv("STATE_DIR", "state")
+HOST_CONNECT_TIMEOUT = float(os.getenv("HOST_CONNECT_TIMEOUT", "5"))
+HOST_READ_TIMEOUT_MIN = float(os.getenv("HOST_READ_TIMEOUT_MIN", "5"))
+HOST_TIMEOUT_FACTOR = float(os.getenv("HOST_TIMEOUT_FACTOR", "3"))     # read timeout = p95 latenza * fattore
+HOST_BREAKER_FAILS = int(os.getenv("HOST_BREAKER_FAILS", "3"))          # errori consecutivi -> circuito aperto
+HOST_BREAKER_COOLDOWN = int(os.getenv("HOST_BREAKER_COOLDOWN", "1800"))  # secondi, raddoppia a ogni riapertura
+HOST_ERROR_PENALTY = float(os.getenv("HOST_ERROR_PENALTY", "0.3"))      # priorità seed - penalità * tasso errori
+# pipeline in streaming: ricerca/fetch/dedup/rank sovrapposti, stop quando il top-k è stabile
+PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "false").lower() in ("1", "true", "yes")
+STREAM_SEARCH_WORKERS = int(os.getenv("STREAM_SEARCH_WORKERS", "4"))
+STREAM_FETCH_WORKERS = int(os.getenv("STREAM_FETCH_WORKERS", "8"))
+STREAM_STABLE_AFTER = int(os.getenv("STREAM_STABLE_AFTER", "6"))  # doc consecutivi senza cambi nel top-k
 
 # -------- Dedup --------
 SIMHASH_BITS = int(os.getenv("SIMHASH_BITS", "64"))
 NEAR_DUP_HAMMING = int(os.getenv("NEAR_DUP_HAMMING", "6"))
+# seed con titolo+snippet quasi identici (pre-fetch): prefiltro simhash largo, overlap token stretto
+SEED_DUP_HAMMING = int(os.getenv("SEED_DUP_HAMMING", "16"))
+SEED_DUP_OVERLAP = float(os.getenv("SEED_DUP_OVERLAP", "0.8"))
+# clustering eventi timeline (frasi brevi: simhash come prefiltro + overlap token)
+TIMELINE_CLUSTER_HAMMING = int(os.getenv("TIMELINE_CLUSTER_HAMMING", "20"))
+TIMELINE_CLUSTER_OVERLAP = float(os.getenv("TIMELINE_CLUSTER_OVERLAP", "0.5"))
 
 # -------- Ranking --------
 FRESHNESS_HALF_LIFE_DAYS = int(os.getenv("FRESHNESS_HALF_LIFE_DAYS", "60"))
@@ -34,3 +126,24 @@ DOMAIN_SCORES = {
 # -------- Output --------
 DEFAULT_TOPK = int(os.getenv("DEFAULT_TOPK", "8"))
 LOG_DIR = os.getenv("LOG_DIR", "logs")
+# checkpoint per stadio (ripresa con main.py --resume RUN_ID)
+CHECKPOINTS = os.getenv("CHECKPOINTS", "true").lower() in ("1", "true", "yes")
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(STATE_DIR, "runs"))
+# retention all'avvio di ogni nuova run: tiene le N run più recenti e nessuna più vecchia di X giorni (0 = senza limite)
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "20"))
+CHECKPOINT_MAX_AGE_DAYS = float(os.getenv("CHECKPOINT_MAX_AGE_DAYS", "14"))
+# serie storiche degli indicatori fra le run (indicator_store.py); il report le scrive solo con USE_INDICATOR_STORE=true
+INDICATOR_DB = os.getenv("INDICATOR_DB", os.path.join(STATE_DIR, "indicators.sqlite"))
+
+# -------- Visual --------
+ASSETS_DIR = os.getenv("ASSETS_DIR", "assets")
+CHART_DPI = int(os.getenv("CHART_DPI", "144"))
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))  # pool di processi per i batch
+
+# -------- Service (daemon con API HTTP locale) --------
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8765"))
+SERVICE_SOCKET = os.getenv("SERVICE_SOCKET", "")            # se valorizzato: Unix socket al posto di host:porta
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "2"))     # report eseguiti in parallelo
+SERVICE_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", "32"))  # oltre: 429
+SERVICE_KEEP_JOBS = int(os.getenv("SERVICE_KEEP_JOBS", "200"))  # job conclusi tenuti in memoria per il polling
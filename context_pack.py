@@ -0,0 +1,141 @@
+# context_pack.py
+# Confezionamento del contesto per gli stadi LLM a budget di TOKEN (non caratteri).
+# - conteggio con tokenizer locale (tiktoken se installato, altrimenti stima euristica)
+# - riempimento greedy per rank/score fino al budget dello stadio
+# - estratti memoizzati per (hash documento, budget): gli stadi riusano gli stessi pezzi
+from __future__ import annotations
+import hashlib
+import math
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from config import LLM_CONTEXT_TOKENS, LLM_TOKENIZER, CONTEXT_BUDGETS, CONTEXT_DOC_TOKENS
+
+_ENC: Dict[str, Any] = {}
+_EXCERPTS: Dict[Tuple[str, int], Tuple[str, int]] = {}
+_EXCERPTS_MAX = 4096
+
+# stima euristica ~BPE: parole lunghe pesano ~1 token ogni 4 caratteri, punteggiatura 1
+_TOKEN_RX = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+MIN_USEFUL_TOKENS = 64
+SAFETY_MARGIN = 256
+
+
+def _encoding():
+    """Encoding tiktoken (lazy); None se la libreria non è disponibile."""
+    if "enc" not in _ENC:
+        try:
+            import tiktoken  # lazy import, opzionale
+            _ENC["enc"] = tiktoken.get_encoding(LLM_TOKENIZER)
+        except Exception:
+            _ENC["enc"] = None
+    return _ENC["enc"]
+
+
+def _cost(tok: str) -> int:
+    return max(1, math.ceil(len(tok) / 4))
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return sum(_cost(m.group(0)) for m in _TOKEN_RX.finditer(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Prefisso di `text` entro `max_tokens` (tagliato su confine di parola). -> (testo, n_token)"""
+    if not text or max_tokens <= 0:
+        return "", 0
+    text = text[: max_tokens * 8]  # nessun tokenizer supera ~8 char/token: evita di tokenizzare tutto
+    enc = _encoding()
+    if enc is not None:
+        ids = enc.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text, len(ids)
+        cut = enc.decode(ids[:max_tokens])
+        sp = cut.rfind(" ")
+        cut = cut[:sp] if sp > len(cut) // 2 else cut
+        return cut, count_tokens(cut)
+    n = 0
+    for m in _TOKEN_RX.finditer(text):
+        c = _cost(m.group(0))
+        if n + c > max_tokens:
+            return text[: m.start()].rstrip(), n
+        n += c
+    return text, n
+
+
+def doc_hash(d: Dict[str, Any]) -> str:
+    h = d.get("hash")
+    if h:
+        return h
+    return hashlib.md5((d.get("text") or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def excerpt(d: Dict[str, Any], budget: int) -> Tuple[str, int]:
+    """Estratto del testo entro `budget` token, memoizzato per (hash doc, budget)."""
+    key = (doc_hash(d), budget)
+    hit = _EXCERPTS.get(key)
+    if hit is not None:
+        return hit
+    out = truncate_tokens(d.get("text") or "", budget)
+    if len(_EXCERPTS) >= _EXCERPTS_MAX:
+        _EXCERPTS.clear()
+    _EXCERPTS[key] = out
+    return out
+
+
+def stage_budget(stage: str, system_prompt: str = "", max_tokens: int = 0) -> int:
+    """Budget (token) per il contenuto di uno stadio: min(budget configurato,
+    finestra del modello - prompt di sistema - output atteso - margine)."""
+    avail = LLM_CONTEXT_TOKENS - count_tokens(system_prompt) - max_tokens - SAFETY_MARGIN
+    return max(0, min(CONTEXT_BUDGETS.get(stage, avail), avail))
+
+
+def pack_docs(
+    docs: List[Dict[str, Any]],
+    budget: int,
+    topk: Optional[int] = None,
+    per_doc: int = CONTEXT_DOC_TOKENS,
+    overhead: int = 8
+) -> List[Dict[str, Any]]:
+    """
+    Riempie `budget` token in modo greedy: documenti in ordine di rank (score
+    decrescente, a parità l'ordine ricevuto), per ciascuno titolo + estratto entro
+    `per_doc` token. `overhead` stima i token di formattazione per blocco.
+    Ritorna [{"doc": d, "title": str, "excerpt": str, "tokens": int}, ...].
+    """
+    cands = docs[:topk] if topk else docs
+    cands = sorted(cands, key=lambda d: d.get("score") or 0.0, reverse=True)
+    out, used = [], 0
+    for d in cands:
+        left = budget - used
+        if left < MIN_USEFUL_TOKENS:
+            break
+        title = (d.get("title") or "").strip()
+        t_title = count_tokens(title) + overhead
+        text, t_text = excerpt(d, min(per_doc, left - t_title))
+        if not text and not title:
+            continue
+        out.append({"doc": d, "title": title, "excerpt": text, "tokens": t_title + t_text})
+        used += t_title + t_text
+    return out
+
+
+def build_shared_sources(docs: List[Dict[str, Any]], topk: Optional[int] = None, budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Blocco FONTI unico per il layout "shared_prefix": stessi documenti, stessi estratti,
+    stessa numerazione [n] in tutti gli stadi, così il prefisso tokenizzato è identico.
+    Ritorna {"block": str, "refs": {n: url}, "tokens": int}.
+    """
+    budget = budget or CONTEXT_BUDGETS.get("shared", 4000)
+    refs: Dict[int, str] = {}
+    lines = ["FONTI:"]
+    used = 0
+    for i, p in enumerate(pack_docs(docs, budget, topk=topk), start=1):
+        refs[i] = p["doc"].get("url")
+        lines.append(f"[{i}] {p['title']}\n{p['excerpt']}\n")
+        used += p["tokens"]
+    return {"block": "\n".join(lines), "refs": refs, "tokens": used}
@@ -0,0 +1,111 @@
+# corpus.py
+# Rappresentazione compatta dei documenti per corpora grandi (crawl, dedup e rank batch):
+# - `Doc`: dataclass con __slots__ (niente dict per istanza), campi rari in `extra`
+# - stringhe ripetute fra documenti (dominio, lingua, mime, engine, fonte, date) internate
+# - interfaccia dict-like (get / [] / in) per gli stadi esistenti che lavorano su dict;
+#   `to_dict` / `to_dicts` al confine con export, LLM e report, con le stesse chiavi del dict
+#   d'origine (anche quelle a None: i campi mai assegnati restano _MISSING, non None)
+from __future__ import annotations
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_MISSING = object()
+_INTERNED = ("domain", "lang", "mime", "engine", "source", "detected_date", "published", "html_lang", "collector")
+
+
+@dataclass(slots=True, eq=False)
+class Doc:
+    url: Optional[str] = _MISSING
+    title: Optional[str] = _MISSING
+    text: Optional[str] = _MISSING
+    snippet: Optional[str] = _MISSING
+    lang: Optional[str] = _MISSING
+    domain: Optional[str] = _MISSING
+    hash: Optional[str] = _MISSING
+    detected_date: Optional[str] = _MISSING
+    published: Optional[str] = _MISSING
+    mime: Optional[str] = _MISSING
+    engine: Optional[str] = _MISSING
+    source: Optional[str] = _MISSING
+    simhash: Optional[int] = _MISSING
+    score: Optional[float] = _MISSING
+    seed_priority: Optional[float] = _MISSING
+    extra: Optional[Dict[str, Any]] = None       # campi rari (html_lang, guid, collector, ...)
+
+    # ---- costruzione ----
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any], **over) -> "Doc":
+        doc = cls()
+        for k, v in {**d, **over}.items():
+            doc[k] = v
+        return doc
+
+    @classmethod
+    def merge(cls, *parts: Dict[str, Any], **over) -> "Doc":
+        """Come {**seed, **ext, **over} ma senza dict intermedi."""
+        doc = cls()
+        for p in parts:
+            for k, v in p.items():
+                doc[k] = v
+        for k, v in over.items():
+            doc[k] = v
+        return doc
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {f: v for f in _FIELDS if (v := getattr(self, f)) is not _MISSING}
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    # ---- accesso dict-like (_MISSING == chiave assente) ----
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            v = getattr(self, key)
+            return default if v is _MISSING else v
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        v = self.get(key, _MISSING)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _INTERNED_SET and isinstance(value, str):
+            value = sys.intern(value)
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        v = self.get(key, _MISSING)
+        if v is _MISSING:
+            return default
+        if key in _FIELD_SET:
+            setattr(self, key, _MISSING)
+        else:
+            del self.extra[key]
+        return v
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+
+_FIELDS = tuple(f.name for f in fields(Doc) if f.name != "extra")
+_FIELD_SET = frozenset(_FIELDS)
+_INTERNED_SET = frozenset(_INTERNED)
+
+
+def to_docs(items: Iterable[Dict[str, Any]]) -> List[Doc]:
+    return [d if isinstance(d, Doc) else Doc.from_dict(d) for d in items]
+
+
+def to_dicts(items: Iterable[Any]) -> List[Dict[str, Any]]:
+    return [d.to_dict() if isinstance(d, Doc) else d for d in items]
@@ -1,5 +1,5 @@
 import re, urllib.parse, math
-from config import SIMHASH_BITS, NEAR_DUP_HAMMING
+from config import SIMHASH_BITS, NEAR_DUP_HAMMING, SEED_DUP_HAMMING, SEED_DUP_OVERLAP
 from provenance import log_event
 
 UTM_PARAMS = {"utm_source","utm_medium","utm_campaign","utm_term","utm_content","gclid","fbclid"}
@@ -32,6 +32,12 @@ def simhash(text: str, bits: int = SIMHASH_BITS):
 def hamming(a: int, b: int) -> int:
     return (a ^ b).bit_count()
 
+def token_overlap(a: frozenset, b: frozenset) -> float:
+    """Overlap coefficient fra insiemi di token (robusto su testi brevi, dove simhash è rumoroso)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
 def cluster_near_duplicates(items, bits=SIMHASH_BITS, th=NEAR_DUP_HAMMING):
     clusters = []
     used = set()
@@ -53,3 +59,60 @@ def prepare_for_dedup(docs):
         d["url"] = canonical_url(d.get("url"))
         d["simhash"] = simhash(d.get("text",""))
     return docs
+
+class SeedDupIndex:
+    """
+    Indice incrementale di seed già visti per titolo+snippet (stesso lancio d'agenzia
+    ripreso da più siti). Simhash come prefiltro, conferma con overlap dei token.
+    """
+    def __init__(self, th=SEED_DUP_HAMMING, min_overlap=SEED_DUP_OVERLAP):
+        self.th = th
+        self.min_overlap = min_overlap
+        self._sigs = []
+
+    def add(self, seed) -> bool:
+        """True se il seed è nuovo (e lo registra), False se quasi-duplicato."""
+        txt = f"{seed.get('title') or ''} {seed.get('snippet') or ''}"
+        sh = simhash(txt)
+        toks = frozenset(_tokens(txt))
+        if toks and any(hamming(sh, h) <= self.th and token_overlap(toks, t) >= self.min_overlap
+                        for h, t in self._sigs):
+            return False
+        self._sigs.append((sh, toks))
+        return True
+
+def collapse_near_duplicate_seeds(seeds, th=SEED_DUP_HAMMING, min_overlap=SEED_DUP_OVERLAP):
+    """Tiene il primo di ogni gruppo di seed quasi identici, scarta gli altri prima del fetch."""
+    idx = SeedDupIndex(th, min_overlap)
+    return [s for s in seeds if idx.add(s)]
+
+class IncrementalDeduper:
+    """
+    Dedup near-duplicate online (documenti che arrivano uno alla volta), stessa regola
+    di cluster_near_duplicates + dedup_rank: per ogni cluster resta il doc con testo
+    più lungo, a parità il più recente (`newer` -> epoch).
+    """
+    def __init__(self, th=NEAR_DUP_HAMMING, newer=None):
+        self.th = th
+        self.newer = newer or (lambda d: 0.0)
+        self.kept = {}   # id -> doc
+        self._seq = 0
+
+    def _better(self, a, b) -> bool:
+        return (len(a.get("text", "")), self.newer(a)) > (len(b.get("text", "")), self.newer(b))
+
+    def add(self, doc):
+        """Ritorna (id_accettato | None, id_rimpiazzato | None)."""
+        doc["url"] = canonical_url(doc.get("url"))
+        doc["simhash"] = simhash(doc.get("text", ""))
+        for kid, k in self.kept.items():
+            if hamming(doc["simhash"], k["simhash"]) <= self.th:
+                if self._better(doc, k):
+                    self._seq += 1
+                    del self.kept[kid]
+                    self.kept[self._seq] = doc
+                    return self._seq, kid
+                return None, None
+        self._seq += 1
+        self.kept[self._seq] = doc
+        return self._seq, None
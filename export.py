@@ -1,59 +1,119 @@
 # export.py
-import os, tempfile
-import markdown2
-
-def _html_wrap(body_html: str) -> str:
-    return f"""<!doctype html>
-<html lang="it">
-<meta charset="utf-8">
-<title>OSINT Report</title>
-<style>
-  @page {{ size: A4; margin: 18mm; }}
-  body {{ font-family: Arial, Helvetica, sans-serif; line-height: 1.35; font-size: 12pt; }}
-  h1,h2,h3 {{ margin-top: 1.2em; }}
-  code, pre {{ font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, "Liberation Mono", monospace; }}
-  a {{ text-decoration: none; }}
-  table {{ border-collapse: collapse; width: 100%; }}
-  th, td {{ border: 1px solid #ddd; padding: 6px; }}
-  blockquote {{ border-left: 3px solid #ccc; margin: 0; padding: .5em 1em; color: #555; }}
-</style>
-<body>
-{body_html}
-</body>
-</html>"""
-
-def save_markdown(md: str, path: str):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(md)
+import io, json
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+# ---------------------------
+# Scrittura in streaming: JSON a sezioni, JSON Lines, Markdown (gzip/zstd opzionali)
+# La memoria resta quella di un elemento alla volta, non dell'intero file serializzato.
+# ---------------------------
+def open_text(path: str, compress: Optional[str] = None):
+    """File di testo in scrittura; compressione da `compress` ("gzip" | "zstd") o dall'estensione (.gz / .zst)."""
+    if compress is None:
+        compress = "gzip" if path.endswith(".gz") else "zstd" if path.endswith(".zst") else ""
+    if compress == "gzip":
+        import gzip
+        return gzip.open(path, "wt", encoding="utf-8")
+    if compress == "zstd":
+        try:
+            import zstandard  # opzionale
+        except ImportError:
+            raise RuntimeError("compressione zstd non disponibile: pip install zstandard")
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw, closefd=True), encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _default(o: Any) -> Any:
+    if hasattr(o, "isoformat"):                   # date / datetime
+        return o.isoformat()
+    if hasattr(o, "dict") and hasattr(o, "__fields__"):  # modelli pydantic annidati
+        return o.dict(by_alias=True, exclude_none=True)
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    return str(o)
+
+
+def _dump(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=_default)
+
+
+def _is_stream(v: Any) -> bool:
+    return isinstance(v, (list, tuple, Iterator))
+
+
+def write_json_stream(path: str, sections: Iterable[Tuple[str, Any]], compress: Optional[str] = None) -> None:
+    """
+    Oggetto JSON scritto sezione per sezione. `sections`: coppie (chiave, valore); liste e
+    generatori vengono emessi un elemento per riga, così un array di documenti non passa
+    mai per un'unica stringa.
+    """
+    with open_text(path, compress) as f:
+        f.write("{")
+        for i, (key, value) in enumerate(sections):
+            f.write(("," if i else "") + "\n" + _dump(key) + ": ")
+            if not _is_stream(value):
+                f.write(_dump(value))
+                continue
+            f.write("[")
+            n = 0
+            for item in value:
+                f.write(("," if n else "") + "\n  " + _dump(item))
+                n += 1
+            f.write("\n]" if n else "]")
+        f.write("\n}\n")
+
+
+def write_jsonl(path: str, items: Iterable[Any], compress: Optional[str] = None) -> int:
+    """Un record JSON per riga; ritorna il numero di righe scritte."""
+    n = 0
+    with open_text(path, compress) as f:
+        for it in items:
+            f.write(_dump(it) + "\n")
+            n += 1
+    return n
+
+
+def report_sections(report, skip: Tuple[str, ...] = ()) -> Iterator[Tuple[str, Any]]:
+    """Sezioni di un models.ReportModel come (alias, valore) per write_json_stream; stesso
+    contenuto di report.to_json() (by_alias, exclude_none), liste emesse elemento per elemento."""
+    for name, field in report.__fields__.items():
+        value = getattr(report, name)
+        if value is None or field.alias in skip:
+            continue
+        if isinstance(value, list):
+            value = (_default(x) if hasattr(x, "__fields__") else x for x in value)
+        yield field.alias, value
+
+
+def write_report_model(report, path: str, docs_path: Optional[str] = None, compress: Optional[str] = None) -> None:
+    """
+    ReportModel su disco senza costruire il JSON in memoria. Con `docs_path` i documenti
+    (la parte che cresce col corpus) vanno in un file JSON Lines a parte.
+    """
+    if docs_path:
+        write_jsonl(docs_path, (d.dict(by_alias=True, exclude_none=True) for d in report.documents), compress)
+        write_json_stream(path, report_sections(report, skip=("documents",)), compress)
+    else:
+        write_json_stream(path, report_sections(report), compress)
+
+
+def save_markdown(md: Union[str, Iterable[str]], path: str, sep: str = "", compress: Optional[str] = None):
+    """Markdown come stringa unica o come sezioni/righe (scritte man mano, separate da `sep`)."""
+    with open_text(path, compress) as f:
+        if isinstance(md, str):
+            f.write(md)
+            return
+        for i, chunk in enumerate(md):
+            f.write((sep if i else "") + chunk)
 
 def save_pdf_from_markdown(md: str, path: str):
-    html = markdown2.markdown(md)
-    full_html = _html_wrap(html)
-
-    # 1) Prova WeasyPrint se disponibile (tipicamente ok su Linux)
-    try:
-        from weasyprint import HTML
-        HTML(string=full_html).write_pdf(path)
-        return
-    except Exception as e_weasy:
-        pass  # fallback a Playwright
-
-    # 2) Fallback: Playwright/Chromium (consigliato su Windows)
-    try:
-        from playwright.sync_api import sync_playwright
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html", mode="w", encoding="utf-8") as tmp:
-            tmp.write(full_html)
-            tmp_path = tmp.name
-
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            page.goto(f"file:///{tmp_path}", wait_until="load")
-            page.pdf(path=path, format="A4", print_background=True, margin={"top":"18mm","right":"18mm","bottom":"18mm","left":"18mm"})
-            browser.close()
-        os.unlink(tmp_path)
-    except Exception as e_pw:
-        raise RuntimeError(
-            "PDF export fallito. WeasyPrint non disponibile e Playwright non funzionante.\n"
-            f"WeasyPrint error: {e_weasy}\nPlaywright error: {e_pw}"
-        )
+    """PDF via renderer condiviso (pdf_render): WeasyPrint caldo o Chromium persistente,
+    HTML in cache per hash; niente avvio del browser per ogni report."""
+    from pdf_render import renderer  # lazy import
+    renderer().render(md, path)
+
+
+def save_pdfs_from_markdown(jobs):
+    """Batch [(markdown, path), ...] renderizzati in parallelo -> [(path, errore | None), ...]."""
+    from pdf_render import renderer
+    return renderer().render_many(jobs)
@@ -1,85 +1,58 @@
 # fetch.py
-import requests, hashlib, re, tldextract
-from bs4 import BeautifulSoup
-import trafilatura
-from langdetect import detect
-from dateutil import parser as dateparser
-from config import HTTP_TIMEOUT, USER_AGENT
+# Le librerie di estrazione (requests, trafilatura, bs4, dateutil) si importano
+# al primo uso: importare la pipeline (o `main.py --help`) non deve pagarle.
+import hashlib, re, time
+from config import (
+    USER_AGENT, FETCH_MAX_HTML_BYTES, FETCH_MAX_TEXT_BYTES, FETCH_MAX_PDF_BYTES
+)
 from provenance import log_event
+from host_health import health
+from http_session import session
+from lang_id import detect_lang, html_lang, lang_allowed
+from quality import domain as quality_domain
 
 LIVE_PATTERNS = ("live", "diretta", "liveblog", "live-blog", "in-diretta")
 
 
 HEADERS = {"User-Agent": USER_AGENT}
 
+# risposte che indicano un host che blocca/non regge (contano per il circuit breaker)
+HOST_FAIL_STATUS = {403, 429}
+
+class HostUnavailable(RuntimeError):
+    """Circuito aperto per l'host: il fetch non viene nemmeno tentato."""
+
+class UnsupportedContent(ValueError):
+    """Tipo di contenuto non estraibile (video, immagini, JSON...) o PDF oltre il tetto."""
+
+class OffLanguage(ValueError):
+    """Pagina in una lingua fuori da LANG_ALLOWED (scartata prima dell'estrazione)."""
+
+# content-type -> tipo gestito; il resto viene scartato prima di leggere il corpo
+MIME_KINDS = {
+    "text/html": "html", "application/xhtml+xml": "html", "text/plain": "text",
+    "application/pdf": "pdf", "application/x-pdf": "pdf",
+}
+MAX_BYTES = {"html": FETCH_MAX_HTML_BYTES, "text": FETCH_MAX_TEXT_BYTES, "pdf": FETCH_MAX_PDF_BYTES}
+CHUNK_BYTES = 64 * 1024
+SNIFF_BYTES = 4096             # charset e tipo si decidono sui primi KB
+CHARSET_GUESS_BYTES = 16 * 1024
+LANG_SNIFF_CHARS = 32768       # markup grezzo per confermare <html lang> prima dell'estrazione
+_SCRIPT_STYLE_RX = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RX = re.compile(r"<[^>]+>")
+_CHARSET_HDR_RX = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_CHARSET_META_RX = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.I)
+
 def _looks_live(url: str, title: str) -> bool:
     u = (url or "").lower()
     t = (title or "").lower()
     return any(p in u for p in LIVE_PATTERNS) or any(p in t for p in LIVE_PATTERNS)
 
-def fetch_and_extract(url: str) -> dict:
-    r = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT)
-    r.raise_for_status()
-
-    ctype = (r.headers.get("Content-Type") or "").lower()
-
-    # PDF handling (come nella tua versione migliorata)
-    if "application/pdf" in ctype or url.lower().endswith(".pdf"):
-        # ... come già fornito in precedenza ...
-        out = {
-            "url": url,
-            "title": title[:200],
-            "text": text,
-            "lang": lang,
-            "domain": domain,
-            "hash": h,
-            "detected_date": None,
-            "mime": "application/pdf",
-            "is_live": False,
-        }
-        log_event("fetch_ok_pdf", {...})
-        return out
-
-    html = r.text
-    text = _clean_html_trafilatura(html)
-    title = None
-    if not text or len(text) < 400:
-        title_rd, text2 = _clean_html_readability(html)
-        if text2 and len(text2) > len(text or ""):
-            text = text2
-            title = title_rd or title
-
-    if not title:
-        m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
-        title = (m.group(1).strip() if m else url)[:200]
-
-    try:
-        lang = detect((text or "")[:1000]) if text else "unknown"
-    except Exception:
-        lang = "unknown"
-
-    domain = tldextract.extract(url).registered_domain
-    h = hashlib.md5((text or "").encode("utf-8", errors="ignore")).hexdigest()
-    dt = _extract_meta_datetime(html)
-
-    out = {
-        "url": url,
-        "title": title,
-        "text": text or "",
-        "lang": lang,
-        "domain": domain,
-        "hash": h,
-        "detected_date": dt,
-        "mime": "text/html",
-        "is_live": _looks_live(url, title),
-    }
-    log_event("fetch_ok", {"url": url, "domain": domain, "hash": h, "len": len(text or ""), "is_live": out["is_live"]})
-    return out
-
 def _clean_html_readability(html: str):
     """Prova Readability solo se disponibile; altrimenti (None, None)."""
     try:
         from readability import Document  # lazy import
+        from bs4 import BeautifulSoup
         doc = Document(html)
         cleaned_html = doc.summary()
         title = doc.short_title()
@@ -90,11 +63,14 @@ def _clean_html_readability(html: str):
         return None, None
 
 def _clean_html_trafilatura(html: str) -> str:
+    import trafilatura  # lazy import
     return trafilatura.extract(html, include_comments=False, include_tables=False) or ""
 
 def _extract_meta_datetime(html: str) -> str | None:
     """Cerca meta date (OG, JSON-LD semplice, time tag) e cade su pattern ISO-like."""
     try:
+        from bs4 import BeautifulSoup  # lazy import
+        from dateutil import parser as dateparser
         soup = BeautifulSoup(html, "html.parser")
 
         # Og: article:published_time
@@ -135,7 +111,7 @@ def _extract_meta_datetime(html: str) -> str | None:
         pass
     return None
 
-def _extract_pdf_text(resp: requests.Response) -> str:
+def _extract_pdf_text(data: bytes) -> str:
     """
     Prova ad estrarre testo da PDF se disponibili librerie locali.
     Priorità: PyMuPDF (fitz) -> pdfminer.six -> fallback vuoto.
@@ -143,7 +119,7 @@ def _extract_pdf_text(resp: requests.Response) -> str:
     try:
         # PyMuPDF
         import fitz  # type: ignore
-        with fitz.open(stream=resp.content, filetype="pdf") as doc:
+        with fitz.open(stream=data, filetype="pdf") as doc:
             return "\n".join(page.get_text() or "" for page in doc)
     except Exception:
         pass
@@ -151,22 +127,143 @@ def _extract_pdf_text(resp: requests.Response) -> str:
         # pdfminer.six (estrazione semplice)
         from io import BytesIO
         from pdfminer.high_level import extract_text
-        return extract_text(BytesIO(resp.content)) or ""
+        return extract_text(BytesIO(data)) or ""
     except Exception:
         return ""
 
-def fetch_and_extract(url: str) -> dict:
-    r = requests.get(url, headers=HEADERS, timeout=HTTP_TIMEOUT)
-    r.raise_for_status()
+def _sniff_kind(ctype: str, url: str, head: bytes):
+    """Tipo del contenuto da Content-Type; se assente/generico dai primi byte o dall'URL."""
+    kind = MIME_KINDS.get(ctype)
+    if kind or (ctype and ctype != "application/octet-stream"):
+        return kind
+    h = head.lstrip()[:16].lower()
+    if h.startswith(b"%pdf-") or url.lower().endswith(".pdf"):
+        return "pdf"
+    if h.startswith((b"<!doctype", b"<html", b"<?xml", b"<")):
+        return "html"
+    return None
 
-    ctype = (r.headers.get("Content-Type") or "").lower()
+def _read_capped(chunks, first: bytes, cap: int):
+    """Accumula il corpo fino a `cap` byte. -> (bytes, troncato)"""
+    buf = bytearray(first[:cap])
+    truncated = len(first) > cap
+    for chunk in chunks:
+        if truncated or len(buf) + len(chunk) > cap:
+            buf += chunk[:cap - len(buf)]
+            return bytes(buf), True
+        buf += chunk
+    return bytes(buf), truncated
+
+def _decode(body: bytes, ctype_header: str) -> str:
+    """Charset dall'header, poi dal <meta> nei primi KB, poi stima su un campione."""
+    m = _CHARSET_HDR_RX.search(ctype_header or "") or _CHARSET_META_RX.search(body[:SNIFF_BYTES])
+    enc = m.group(1) if m else None
+    if isinstance(enc, bytes):
+        enc = enc.decode("ascii", errors="ignore")
+    if not enc:
+        try:
+            from charset_normalizer import from_bytes  # dipendenza di requests
+            best = from_bytes(body[:CHARSET_GUESS_BYTES]).best()
+            enc = best.encoding if best else None
+        except Exception:
+            enc = None
+    try:
+        return body.decode(enc or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+def _fetch_body(url: str):
+    """
+    GET in streaming con timeout adattivi per host (host_health) e tetto in byte per tipo.
+    Il tipo si decide dagli header (e dai primi byte) PRIMA di scaricare il corpo.
+    -> (response, kind "html"|"text"|"pdf", body bytes)
+    """
+    import requests  # lazy import
+    hh = health()
+    if not hh.allow(url):
+        raise HostUnavailable(f"circuito aperto per {url}")
+    t0 = time.time()
+    try:
+        r = session("fetch").get(url, headers=HEADERS, timeout=hh.timeouts(url), stream=True)
+    except requests.RequestException as e:
+        hh.record(url, ok=False, err=str(e))
+        raise
+    # latenza = tempo agli header (il read timeout vale tra un blocco e l'altro); l'esito per
+    # host si registra una volta sola, a body letto (o al primo errore)
+    latency = time.time() - t0
+    failure = None
+    try:
+        if r.status_code >= 500 or r.status_code in HOST_FAIL_STATUS:
+            failure = f"HTTP {r.status_code}"
+        r.raise_for_status()
+
+        ctype = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        kind = MIME_KINDS.get(ctype)
+        if not kind and ctype and ctype != "application/octet-stream":
+            raise UnsupportedContent(f"content-type {ctype}")
+        length = int(r.headers.get("Content-Length") or 0)
+        if kind == "pdf" and length > MAX_BYTES["pdf"]:
+            raise UnsupportedContent(f"PDF di {length} byte oltre il tetto {MAX_BYTES['pdf']}")
+
+        chunks = r.iter_content(CHUNK_BYTES)
+        try:
+            first = next(chunks, b"")
+            kind = kind or _sniff_kind(ctype, url, first[:SNIFF_BYTES])
+            if not kind:
+                raise UnsupportedContent(f"contenuto non riconosciuto ({ctype or 'senza content-type'})")
+            body, truncated = _read_capped(chunks, first, MAX_BYTES[kind])
+        except requests.RequestException as e:
+            failure = str(e)
+            raise
+        if truncated:
+            if kind == "pdf":
+                raise UnsupportedContent(f"PDF oltre il tetto {MAX_BYTES[kind]} byte")
+            log_event("fetch_truncated", {"url": url, "kind": kind, "bytes": len(body)})
+        return r, kind, body
+    finally:
+        r.close()  # rilascia la connessione senza scaricare il resto
+        # contenuto rifiutato (tipo, tetti) o 4xx ordinari: l'host ha comunque risposto bene
+        hh.record(url, ok=failure is None, latency=latency, err=failure or "")
+
+def doc_from_text(url: str, title: str, text: str, published: str = None, **extra) -> dict:
+    """
+    Documento nello stesso formato di fetch_and_extract per fonti che forniscono già il
+    testo (API come ReliefWeb, feed full-text, risposte text/plain): niente estrazione HTML.
+    """
+    text = text or ""
+    lang = detect_lang(text)
+    if not lang_allowed(lang):
+        raise OffLanguage(f"lingua {lang}")
+    domain = quality_domain(url)
+    h = hashlib.md5(text.encode("utf-8", errors="ignore")).hexdigest()
+    out = {
+        "url": url,
+        "title": (title or url)[:200],
+        "text": text,
+        "lang": lang,
+        "domain": domain,
+        "hash": h,
+        "detected_date": published,
+        "published": published,
+        "mime": "text/plain",
+        "is_live": _looks_live(url, title),
+        **extra,
+    }
+    log_event("doc_from_text", {"url": url, "domain": domain, "hash": h, "len": len(text),
+                                "engine": extra.get("engine")})
+    return out
+
+def fetch_and_extract(url: str) -> dict:
+    r, kind, body = _fetch_body(url)
 
     # PDF handling
-    if "application/pdf" in ctype or url.lower().endswith(".pdf"):
-        text = _extract_pdf_text(r) or ""
+    if kind == "pdf":
+        text = _extract_pdf_text(body) or ""
         title = url
-        lang = "unknown"
-        domain = tldextract.extract(url).registered_domain
+        lang = detect_lang(text, hint="")
+        if not lang_allowed(lang):
+            raise OffLanguage(f"lingua {lang}")
+        domain = quality_domain(url)
         h = hashlib.md5(text.encode("utf-8", errors="ignore")).hexdigest()
         out = {
             "url": url,
@@ -177,12 +274,25 @@ def fetch_and_extract(url: str) -> dict:
             "hash": h,
             "detected_date": None,  # impossibile senza metadati PDF; potresti leggerli se serve
             "mime": "application/pdf",
+            "is_live": False,
         }
         log_event("fetch_ok_pdf", {"url": url, "domain": domain, "hash": h, "len": len(text)})
         return out
 
+    # text/plain: è già testo, niente estrazione HTML
+    if kind == "text":
+        return doc_from_text(url, None, _decode(body, r.headers.get("Content-Type")))
+
     # HTML path
-    html = r.text
+    html = _decode(body, r.headers.get("Content-Type"))
+
+    # 0) Lingua dichiarata fuori da LANG_ALLOWED: si scarta senza estrarre solo se il testo
+    #    visibile dei primi KB non la smentisce (template con lang fisso)
+    hl = html_lang(html[:SNIFF_BYTES])
+    if not lang_allowed(hl):
+        visible = _TAG_RX.sub(" ", _SCRIPT_STYLE_RX.sub(" ", html[:LANG_SNIFF_CHARS]))
+        if not lang_allowed(detect_lang(visible, html_lang_attr=hl, hint="")):
+            raise OffLanguage(f"<html lang={hl}>")
 
     # 1) Trafilatura
     text = _clean_html_trafilatura(html)
@@ -200,14 +310,13 @@ def fetch_and_extract(url: str) -> dict:
         m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
         title = (m.group(1).strip() if m else url)[:200]
 
-    # 4) Lingua
-    try:
-        lang = detect((text or "")[:1000]) if text else "unknown"
-    except Exception:
-        lang = "unknown"
+    # 4) Lingua (<html lang> solo se il testo non è conclusivo)
+    lang = detect_lang(text or "", html_lang_attr=hl)
+    if not lang_allowed(lang):
+        raise OffLanguage(f"lingua {lang}")
 
     # 5) Dominio, hash
-    domain = tldextract.extract(url).registered_domain
+    domain = quality_domain(url)
     h = hashlib.md5((text or "").encode("utf-8", errors="ignore")).hexdigest()
 
     # 6) Data (meta & fallback)
@@ -222,6 +331,8 @@ def fetch_and_extract(url: str) -> dict:
         "hash": h,
         "detected_date": dt,   # ISO o None
         "mime": "text/html",
+        "html_lang": hl,
+        "is_live": _looks_live(url, title),
     }
-    log_event("fetch_ok", {"url": url, "domain": domain, "hash": h, "len": len(text or "")})
+    log_event("fetch_ok", {"url": url, "domain": domain, "hash": h, "len": len(text or ""), "is_live": out["is_live"]})
     return out
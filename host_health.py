@@ -0,0 +1,136 @@
+# host_health.py
+# Salute per host (dominio registrato), persistita tra le run in STATE_DIR/host_health.json:
+# - latenze recenti -> timeout di lettura adattivi (p95 * HOST_TIMEOUT_FACTOR, tra min e HTTP_TIMEOUT)
+# - tasso di errore (media esponenziale) -> penalità sulla priorità dei seed
+# - circuit breaker: dopo HOST_BREAKER_FAILS errori consecutivi l'host viene saltato per
+#   un cooldown che raddoppia a ogni riapertura; scaduto, passa UNA richiesta di prova
+#
+#   python host_health.py        -> stato degli host noti
+from __future__ import annotations
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+from config import (
+    STATE_DIR, HTTP_TIMEOUT, HOST_CONNECT_TIMEOUT, HOST_READ_TIMEOUT_MIN, HOST_TIMEOUT_FACTOR,
+    HOST_BREAKER_FAILS, HOST_BREAKER_COOLDOWN, HOST_ERROR_PENALTY
+)
+from quality import domain as quality_domain
+from provenance import log_event
+
+LAT_WINDOW = 50          # latenze tenute per host
+ERR_ALPHA = 0.2          # peso dell'ultimo esito nel tasso di errore
+MAX_COOLDOWN = 24 * 3600
+SAVE_EVERY = 20          # record tra due salvataggi su disco
+
+
+def _p95(values):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(0.95 * len(s)))]
+
+
+class HostHealth:
+    """Stato per host thread-safe (i worker di fetch lo condividono)."""
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hosts: Dict[str, Dict[str, Any]] = {}
+        self._dirty = 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.hosts = json.load(f)
+        except (OSError, ValueError):
+            pass
+        for h in self.hosts.values():
+            h["probe"] = False  # una prova rimasta appesa da una run interrotta
+
+    def _get(self, host: str) -> Dict[str, Any]:
+        return self.hosts.setdefault(host, {"lat": [], "err_rate": 0.0, "fails": 0,
+                                            "trips": 0, "open_until": 0.0, "probe": False})
+
+    def timeouts(self, url: str) -> Tuple[float, float]:
+        """(connect, read) per l'host di `url`."""
+        h = self.hosts.get(quality_domain(url))
+        read = float(HTTP_TIMEOUT)
+        if h and len(h["lat"]) >= 5:
+            read = min(read, max(HOST_READ_TIMEOUT_MIN, _p95(h["lat"]) * HOST_TIMEOUT_FACTOR))
+        return min(HOST_CONNECT_TIMEOUT, read), read
+
+    def is_open(self, url: str) -> bool:
+        """Circuito aperto e cooldown non scaduto (non consuma la richiesta di prova)."""
+        h = self.hosts.get(quality_domain(url))
+        return bool(h) and h["fails"] >= HOST_BREAKER_FAILS and time.time() < h["open_until"]
+
+    def allow(self, url: str) -> bool:
+        """False se il circuito è aperto; a cooldown scaduto lascia passare una sola prova."""
+        host = quality_domain(url)
+        with self.lock:
+            h = self.hosts.get(host)
+            if not h or h["fails"] < HOST_BREAKER_FAILS:
+                return True
+            if time.time() < h["open_until"] or h["probe"]:
+                return False
+            h["probe"] = True  # half-open
+            return True
+
+    def penalty(self, url: str) -> float:
+        h = self.hosts.get(quality_domain(url))
+        return HOST_ERROR_PENALTY * h["err_rate"] if h else 0.0
+
+    def record(self, url: str, ok: bool, latency: float = 0.0, err: str = "") -> None:
+        host = quality_domain(url)
+        if not host:
+            return
+        with self.lock:
+            h = self._get(host)
+            h["probe"] = False
+            h["err_rate"] = round((1 - ERR_ALPHA) * h["err_rate"] + ERR_ALPHA * (0.0 if ok else 1.0), 4)
+            if ok:
+                h["lat"] = (h["lat"] + [round(latency, 3)])[-LAT_WINDOW:]
+                h["fails"] = 0
+                h["trips"] = 0
+            else:
+                h["fails"] += 1
+                if h["fails"] >= HOST_BREAKER_FAILS:
+                    h["trips"] += 1
+                    cooldown = min(MAX_COOLDOWN, HOST_BREAKER_COOLDOWN * 2 ** (h["trips"] - 1))
+                    h["open_until"] = time.time() + cooldown
+                    log_event("host_circuit_open", {"host": host, "fails": h["fails"],
+                                                    "cooldown": cooldown, "err": err[:200]})
+            self._dirty += 1
+            if self._dirty >= SAVE_EVERY:
+                self._save_locked()
+
+    def _save_locked(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.hosts, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+    def save(self) -> None:
+        with self.lock:
+            if self._dirty:
+                self._save_locked()
+
+
+_HEALTH: Dict[str, HostHealth] = {}
+
+
+def health() -> HostHealth:
+    """Istanza di processo (caricata al primo uso, salvata all'uscita)."""
+    if "h" not in _HEALTH:
+        _HEALTH["h"] = HostHealth(os.path.join(STATE_DIR, "host_health.json"))
+        atexit.register(_HEALTH["h"].save)
+    return _HEALTH["h"]
+
+
+if __name__ == "__main__":
+    now = time.time()
+    for host, h in sorted(health().hosts.items(), key=lambda kv: -kv[1]["err_rate"]):
+        p95 = _p95(h["lat"]) if h["lat"] else None
+        state = "OPEN" if h["fails"] >= HOST_BREAKER_FAILS and now < h["open_until"] else "ok"
+        print(f"{host:40s} {state:4s} err={h['err_rate']:.2f} fails={h['fails']} p95={p95}")
@@ -0,0 +1,36 @@
+# http_session.py
+# Sessioni HTTP condivise nel processo (keep-alive + pool di connessioni per host):
+# in modalità service le connessioni verso SearXNG, LLM e siti restano calde tra i report.
+# Il pool di urllib3 è thread-safe; i cookie non vengono conservati (come con requests.get).
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+from config import HTTP_POOL_SIZE
+
+_SESSIONS = {}
+_LOCK = threading.Lock()
+
+
+def session(name: str = "default"):
+    """requests.Session condivisa per `name` (es. "fetch", "llm", "searxng"), creata al primo uso."""
+    s = _SESSIONS.get(name)
+    if s is not None:
+        return s
+    with _LOCK:
+        if name not in _SESSIONS:
+            import requests  # lazy import
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _SESSIONS[name] = s
+    return _SESSIONS[name]
+
+
+def close_all() -> None:
+    with _LOCK:
+        for s in _SESSIONS.values():
+            s.close()
+        _SESSIONS.clear()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# indicator_store.py
+# Serie storiche degli indicatori (vittime, sfollati, prezzi, ...) persistite fra le run:
+# - SQLite locale (STATE_DIR/indicators.sqlite), chiave (topic, indicatore, data, valore, origine)
+# - solo append: ogni run aggiunge i propri punti; si ignora solo lo stesso valore dalla stessa
+#   origine (URL della fonte, o la run per i punti senza citazione). Correzioni in giornata e fonti
+#   diverse restano come punti distinti e si combinano in lettura con `agg`
+# - puntatori di citazione stabili (URL + titolo della fonte, run id), non gli ID SRC-/DOC- del report
+# - query per intervallo, resampling giorno/settimana/mese, colonne array('d') per i grafici
+#
+#   python indicator_store.py add --topic "Sudan" --indicator "sfollati" --date 2025-10-20 --value 12000000 --url https://...
+#   python indicator_store.py show --topic "Sudan" --indicator "sfollati" --freq M
+#   python indicator_store.py chart --topic "Sudan" --indicator "sfollati" --freq W
+from __future__ import annotations
+import argparse
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import INDICATOR_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    topic      TEXT NOT NULL,
+    indicator  TEXT NOT NULL,
+    date       TEXT NOT NULL,              -- YYYY-MM-DD
+    value      REAL NOT NULL,
+    unit       TEXT,
+    url        TEXT,                       -- fonte della citazione (NULL se assente)
+    title      TEXT,
+    run_id     TEXT,
+    added      REAL NOT NULL,
+    origin     TEXT NOT NULL,              -- URL, altrimenti 'run:<run_id>' ('' se nessuno dei due)
+    UNIQUE (topic, indicator, date, value, origin)
+);
+CREATE INDEX IF NOT EXISTS points_series ON points (topic, indicator, date);
+"""
+
+AGGS = {
+    "last": lambda rows: rows[-1][1],   # righe ordinate per (data, added): l'ultimo valore registrato
+    "mean": lambda rows: statistics.fmean(r[1] for r in rows),
+    "median": lambda rows: statistics.median(r[1] for r in rows),
+    "max": lambda rows: max(r[1] for r in rows),
+    "min": lambda rows: min(r[1] for r in rows),
+}
+
+
+def topic_key(query: str) -> str:
+    """Stesso topic per query che differiscono solo per maiuscole/spazi."""
+    return " ".join((query or "").lower().split())
+
+
+def _bucket(iso: str, freq: str) -> str:
+    """Data rappresentativa del periodo: D = giorno, W = lunedì della settimana, M = primo del mese."""
+    if freq == "D":
+        return iso
+    if freq == "M":
+        return iso[:7] + "-01"
+    if freq == "W":
+        d = date.fromisoformat(iso)
+        return (d - timedelta(days=d.weekday())).isoformat()
+    raise ValueError(f"freq non supportata: {freq} (D|W|M)")
+
+
+def _buckets(rows, freq: str) -> List[Tuple[str, list]]:
+    """Righe (date, value, ...) raggruppate per periodo, in ordine di data."""
+    out: Dict[str, list] = {}
+    for r in rows:
+        out.setdefault(_bucket(r[0], freq), []).append(r)
+    return sorted(out.items())
+
+
+class IndicatorStore:
+    """Store append-only su SQLite; una connessione per thread (modalità service)."""
+    def __init__(self, path: str = INDICATOR_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as c:
+            cols = [r[1] for r in c.execute("PRAGMA table_info(points)")]
+            if cols and "origin" not in cols:
+                self._migrate_v1(c)
+            else:
+                c.executescript(_SCHEMA)
+
+    @staticmethod
+    def _migrate_v1(c: sqlite3.Connection) -> None:
+        """Schema precedente (chiave senza valore, url '' per i punti non citati)."""
+        c.execute("ALTER TABLE points RENAME TO points_v1")
+        c.execute("DROP INDEX IF EXISTS points_series")
+        c.executescript(_SCHEMA)
+        c.execute("INSERT OR IGNORE INTO points SELECT topic, indicator, date, value, unit, NULLIF(url, ''), "
+                  "title, run_id, added, COALESCE(url, '') FROM points_v1")
+        c.execute("DROP TABLE points_v1")
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            c.execute("PRAGMA journal_mode=WAL")
+        return c
+
+    # ---- scrittura ----
+    def append(self, topic: str, indicator: str, points: Iterable[Dict[str, Any]],
+               unit: Optional[str] = None, run_id: Optional[str] = None) -> int:
+        """
+        Aggiunge punti {"date", "value", ["url", "title", "unit"]}; ritorna quanti erano nuovi.
+        Date non ISO o valori non numerici vengono scartati.
+        """
+        now = time.time()
+        rows = []
+        for p in points:
+            try:
+                iso = date.fromisoformat(str(p["date"])[:10]).isoformat()
+                val = float(p["value"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            url = p.get("url") or None
+            origin = url or (f"run:{run_id}" if run_id else "")
+            rows.append((topic_key(topic), indicator.strip(), iso, val, p.get("unit") or unit,
+                         url, p.get("title"), run_id, now, origin))
+        with self._conn() as c:
+            before = c.total_changes
+            c.executemany("INSERT OR IGNORE INTO points VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+            return c.total_changes - before
+
+    def append_report(self, report, topic: Optional[str] = None, run_id: Optional[str] = None) -> int:
+        """Indicatori di un models.ReportModel; le citazioni SRC-xxxx diventano URL/titolo della fonte."""
+        topic = topic or report.metadata.query or report.metadata.title
+        by_src = {s.id: s for s in report.sources or []}
+        n = 0
+        for ind in report.indicators or []:
+            pts = []
+            for p in ind.series or []:
+                src = next((by_src.get(c.source_id) for c in p.citations or [] if c.source_id in by_src), None)
+                pts.append({"date": p.date_iso, "value": p.value,
+                            "url": str(src.url) if src else None, "title": src.title if src else None})
+            n += self.append(topic, ind.name, pts, unit=ind.unit, run_id=run_id)
+        return n
+
+    # ---- lettura ----
+    def indicators(self, topic: str) -> List[str]:
+        rows = self._conn().execute("SELECT DISTINCT indicator FROM points WHERE topic = ? ORDER BY indicator",
+                                    (topic_key(topic),))
+        return [r[0] for r in rows]
+
+    def _rows(self, topic: str, indicator: str, start: Optional[str], end: Optional[str]):
+        q = "SELECT date, value, url, title, unit FROM points WHERE topic = ? AND indicator = ?"
+        args: List[Any] = [topic_key(topic), indicator]
+        if start:
+            q += " AND date >= ?"
+            args.append(start)
+        if end:
+            q += " AND date <= ?"
+            args.append(end)
+        return self._conn().execute(q + " ORDER BY date, added", args).fetchall()
+
+    def series(self, topic: str, indicator: str, start: Optional[str] = None, end: Optional[str] = None,
+               freq: str = "D", agg: str = "last") -> List[Tuple[str, float]]:
+        """[(data, valore), ...] ordinati, un punto per periodo (più fonti/punti -> `agg`)."""
+        return [(b, AGGS[agg](rows)) for b, rows in _buckets(self._rows(topic, indicator, start, end), freq)]
+
+    def columns(self, topic: str, indicator: str, **kw) -> Tuple[List[str], array]:
+        """Come `series`, in colonne: (date, array('d') dei valori)."""
+        s = self.series(topic, indicator, **kw)
+        return [d for d, _ in s], array("d", (v for _, v in s))
+
+    def citations(self, topic: str, indicator: str, day: str) -> List[Dict[str, Any]]:
+        return [{"url": r[2], "title": r[3]} for r in self._rows(topic, indicator, day, day) if r[2]]
+
+    def unit(self, topic: str, indicator: str) -> Optional[str]:
+        r = self._conn().execute("SELECT unit FROM points WHERE topic = ? AND indicator = ? AND unit IS NOT NULL "
+                                 "ORDER BY added DESC LIMIT 1", (topic_key(topic), indicator)).fetchone()
+        return r[0] if r else None
+
+    # ---- adattatori ----
+    def to_models(self, topic: str, sources=None, freq: str = "D", agg: str = "last",
+                  start: Optional[str] = None, end: Optional[str] = None) -> list:
+        """
+        models.Indicator (percorso trusted) con tutta la storia del topic. Le citazioni puntano
+        solo a fonti presenti nel report (`sources`, per URL): ReportModel valida i riferimenti.
+        """
+        from models import Indicator, IndicatorPoint, Citation, make, new_id
+        src_by_url = {str(s.url): s.id for s in sources or []}
+        out = []
+        for i, name in enumerate(self.indicators(topic), start=1):
+            pts = []
+            for d, rows in _buckets(self._rows(topic, name, start, end), freq):
+                # citazioni dalle stesse righe della serie (solo per punti giornalieri)
+                ids = dict.fromkeys(src_by_url[r[2]] for r in rows if r[2] in src_by_url) if freq == "D" else {}
+                cites = [make(Citation, True, source_id=sid) for sid in ids]
+                pts.append(make(IndicatorPoint, True, date_iso=d, value=AGGS[agg](rows), citations=cites or None))
+            out.append(make(Indicator, True, id=new_id("IND", i), name=name, unit=self.unit(topic, name), series=pts))
+        return out
+
+    def chart(self, topic: str, indicator: str, filename: Optional[str] = None, **kw) -> Optional[str]:
+        from visualization import chart_indicator_timeseries
+        s = self.series(topic, indicator, **kw)
+        if not s:
+            return None
+        slug = "".join(ch if ch.isalnum() else "_" for ch in f"{topic_key(topic)}_{indicator}")[:80]
+        return chart_indicator_timeseries(s, filename=filename or f"ind_{slug}.png", title=indicator)
+
+    def close(self) -> None:
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serie storiche degli indicatori (SQLite)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("add", "show", "chart"):
+        p = sub.add_parser(name)
+        p.add_argument("--topic", required=True)
+        p.add_argument("--indicator", required=name != "show")
+        if name == "add":
+            p.add_argument("--date", required=True)
+            p.add_argument("--value", type=float, required=True)
+            p.add_argument("--unit")
+            p.add_argument("--url")
+            p.add_argument("--title")
+        else:
+            p.add_argument("--from", dest="start")
+            p.add_argument("--to", dest="end")
+            p.add_argument("--freq", default="D", choices=["D", "W", "M"])
+            p.add_argument("--agg", default="last", choices=sorted(AGGS))
+    args = ap.parse_args()
+
+    store = IndicatorStore()
+    if args.cmd == "add":
+        n = store.append(args.topic, args.indicator, [{"date": args.date, "value": args.value, "url": args.url,
+                                                       "title": args.title}], unit=args.unit)
+        print("aggiunto" if n else "già presente")
+        return
+    names = [args.indicator] if args.indicator else store.indicators(args.topic)
+    for name in names:
+        kw = dict(start=args.start, end=args.end, freq=args.freq, agg=args.agg)
+        if args.cmd == "chart":
+            print(store.chart(args.topic, name, **kw) or f"{name}: nessun dato")
+            continue
+        print(f"== {name} ({store.unit(args.topic, name) or '-'})")
+        for d, v in store.series(args.topic, name, **kw):
+            print(f"  {d}  {v:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# lang_id.py
+# Identificazione lingua veloce e deterministica (nessun modello da caricare, nessun seed):
+# - script Unicode per arabo/cirillico/CJK
+# - per le lingue latine: conteggio di parole funzione (profili compatti) sul campione
+# - short-circuit: hint (SEARXNG_LANGUAGE) confermato già sui primi caratteri
+# - <html lang> solo come ripiego quando il testo non basta: molti template CMS lo fissano
+#   a "en" qualunque sia la lingua della pagina
+# - detect_batch: molti testi in una chiamata (seed di una ricerca), i testi ripetuti (stesso
+#   titolo+snippet ripreso da più siti) si valutano una volta sola
+# Esposta anche come filtro economico pre-estrazione (seed e <html lang>) via LANG_ALLOWED.
+from __future__ import annotations
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from config import SEARXNG_LANGUAGE, LANG_ALLOWED
+
+SAMPLE_CHARS = 1000
+HINT_SAMPLE_CHARS = 300
+MIN_HITS = 3          # parole funzione minime per decidere
+MIN_MARGIN = 1.5      # prima lingua / seconda lingua
+
+_PROFILES: Dict[str, str] = {
+    "it": "il lo la gli le un una di del della dei delle che non per con sono è nel nella ha anche "
+          "e a come più dal dalla alla al sul sulla questo questa ma essere stato stata tra fra degli ai",
+    "en": "the of and to in is that for on with as was by at from it are this be have has were "
+          "which an not or but their its after been will would they said who",
+    "fr": "le la les des du de un une et est que qui dans pour pas sur au aux avec ce cette sont "
+          "par il elle ont été plus mais ou leur nous vous",
+    "es": "el la los las de del un una y que en por con para es son se al lo como más pero sus "
+          "fue ha han este esta entre sobre también desde",
+    "de": "der die das und ist nicht ein eine zu den von mit sich des auf für im dem auch es an "
+          "werden wurde hat sind bei nach wie oder aus",
+    "pt": "o a os as de do da dos das um uma e que em no na para com não por se ao mais foi são "
+          "como mas pelo pela entre também",
+}
+_WORDS: Dict[str, frozenset] = {k: frozenset(v.split()) for k, v in _PROFILES.items()}
+# parola -> lingue che la contengono (una sola lookup per token)
+_INDEX: Dict[str, tuple] = {}
+for _lang, _ws in _WORDS.items():
+    for _w in _ws:
+        _INDEX[_w] = _INDEX.get(_w, ()) + (_lang,)
+
+_SCRIPTS = (
+    ("ar", re.compile(r"[؀-ۿ]")),
+    ("ru", re.compile(r"[Ѐ-ӿ]")),
+    ("zh", re.compile(r"[一-鿿]")),
+)
+_WORD_RX = re.compile(r"[^\W\d_]+", re.UNICODE)
+_HTML_LANG_RX = re.compile(r"<html[^>]*?\blang\s*=\s*[\"']?([A-Za-z]{2,3})(?:[-_][A-Za-z]+)?", re.I)
+
+KNOWN = frozenset(_PROFILES) | frozenset(code for code, _ in _SCRIPTS)
+
+
+def base_lang(code: Optional[str]) -> str:
+    """'it-IT' / 'it_IT' / 'IT' -> 'it'; '' se assente."""
+    return re.split(r"[-_]", (code or "").strip().lower())[0]
+
+
+def html_lang(html_head: str) -> str:
+    """Attributo lang di <html> (primi KB del markup), '' se assente."""
+    m = _HTML_LANG_RX.search(html_head or "")
+    return base_lang(m.group(1)) if m else ""
+
+
+def _scores(sample: str) -> Counter:
+    c: Counter = Counter()
+    for w in _WORD_RX.findall(sample.lower()):
+        for lang in _INDEX.get(w, ()):
+            c[lang] += 1
+    return c
+
+
+def _decide(c: Counter) -> Optional[str]:
+    top = c.most_common(2)
+    if not top or top[0][1] < MIN_HITS:
+        return None
+    if len(top) > 1 and top[0][1] < MIN_MARGIN * top[1][1]:
+        return None
+    return top[0][0]
+
+
+def detect_lang(text: str, html_lang_attr: str = "", hint: str = SEARXNG_LANGUAGE) -> str:
+    """Codice ISO 639-1 o 'unknown'. Deterministica: stesso testo, stessa risposta.
+    Decide il testo; `html_lang_attr` vale solo se il testo è vuoto o non conclusivo."""
+    h = base_lang(html_lang_attr)
+    fallback = h if h in KNOWN else "unknown"
+    text = text or ""
+    if not text.strip():
+        return fallback
+    sample = text[:SAMPLE_CHARS]
+    letters = sum(ch.isalpha() for ch in sample) or 1
+    for code, rx in _SCRIPTS:
+        if len(rx.findall(sample)) / letters > 0.3:
+            return code
+    # hint confermato sui primi caratteri: niente scansione del campione intero
+    hint = base_lang(hint)
+    if hint in _WORDS:
+        if _decide(_scores(sample[:HINT_SAMPLE_CHARS])) == hint:
+            return hint
+    return _decide(_scores(sample)) or fallback
+
+
+def detect_batch(texts: Iterable[str], hint: str = SEARXNG_LANGUAGE) -> List[str]:
+    """detect_lang su una sequenza di testi, nello stesso ordine; i duplicati esatti non si ricalcolano."""
+    memo: Dict[str, str] = {}
+    out = []
+    for t in texts:
+        t = t or ""
+        if t not in memo:
+            memo[t] = detect_lang(t, hint=hint)
+        out.append(memo[t])
+    return out
+
+
+def lang_allowed(lang: str, allowed: str = LANG_ALLOWED) -> bool:
+    """True se il filtro è spento, la lingua è ignota o è tra quelle ammesse."""
+    if not allowed or not lang or lang == "unknown":
+        return True
+    return base_lang(lang) in {base_lang(a) for a in allowed.split(",") if a.strip()}
@@ -1,8 +1,30 @@
-import requests, os
+import os
 from config import BASE_URL, API_KEY, MODEL, LLM_TEMPERATURE
+from prompts import SHARED_SYSTEM_PROMPT
 from provenance import log_event
+from http_session import session
 
-def chat(messages, model: str = MODEL, temperature: float = LLM_TEMPERATURE, max_tokens: int = 1200):
+STAGE_SEPARATOR = "\n\n---\nISTRUZIONI:\n"
+
+def stage_messages(system_prompt: str, content: str, shared: dict = None):
+    """
+    Messaggi di uno stadio secondo il layout (LLM_PROMPT_LAYOUT, scelto dalla pipeline):
+    - "stage" (shared=None): system = prompt dello stadio, user = contenuto (fonti incluse dal chiamante)
+    - "shared_prefix": system generico + blocco FONTI condiviso (identico fra stadi) e in coda
+      le istruzioni dello stadio + eventuale payload; `content` NON deve ripetere le fonti.
+    """
+    if shared is None:
+        return [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}]
+    tail = system_prompt.strip() + ("\n\n" + content if content else "")
+    return [
+        {"role": "system", "content": SHARED_SYSTEM_PROMPT},
+        {"role": "user", "content": shared["block"] + STAGE_SEPARATOR + tail},
+    ]
+
+def chat_with_usage(messages, model: str = MODEL, temperature: float = LLM_TEMPERATURE, max_tokens: int = 1200,
+                    response_format: dict = None):
+    """Come `chat`, ma ritorna (contenuto, usage). `response_format` (OpenAI-compatible:
+    json_object / json_schema) viene inviato solo se passato."""
     url = f"{BASE_URL.rstrip('/')}/chat/completions"
     headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
     payload = {
@@ -11,10 +33,18 @@ def chat(messages, model: str = MODEL, temperature: float = LLM_TEMPERATURE, max
         "temperature": temperature,
         "max_tokens": max_tokens
     }
-    log_event("llm_request", {"url": url, "model": model, "payload": {"messages": messages[-2:]}})
-    resp = requests.post(url, json=payload, headers=headers, timeout=60)
+    if response_format:
+        payload["response_format"] = response_format
+    log_event("llm_request", {"url": url, "model": model, "payload": {"messages": messages[-2:]},
+                              "response_format": (response_format or {}).get("type")})
+    resp = session("llm").post(url, json=payload, headers=headers, timeout=60)
     resp.raise_for_status()
     data = resp.json()
-    out = data["choices"][0]["message"]["content"]
-    log_event("llm_response", {"content_preview": out[:500]})
-    return out
\ No newline at end of file
+    out = data["choices"][0]["message"]["content"] or ""
+    usage = data.get("usage") or {}
+    log_event("llm_response", {"content_preview": out[:500], "usage": usage})
+    return out, usage
+
+def chat(messages, model: str = MODEL, temperature: float = LLM_TEMPERATURE, max_tokens: int = 1200):
+    out, _ = chat_with_usage(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+    return out
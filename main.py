@@ -1,22 +1,44 @@
-import argparse, os, json, time
-from pipeline import run_pipeline
-from export import save_markdown, save_pdf_from_markdown
-from config import DEFAULT_TOPK
+import argparse, os, time
+from config import DEFAULT_TOPK, CHECKPOINTS
 from provenance import log_event
 
 def parse_args():
     ap = argparse.ArgumentParser(description="OSINT multi-agent report generator")
-    ap.add_argument("--query", required=True)
+    ap.add_argument("--query", default=None, help="obbligatoria salvo --resume")
     ap.add_argument("--out", default="report.md")
     ap.add_argument("--pdf", default=None)
+    ap.add_argument("--debug-out", default="last_run_debug.json",
+                    help="diagnostica della run (JSON in streaming; .gz/.zst = compresso)")
     ap.add_argument("--topk", type=int, default=DEFAULT_TOPK)
-    return ap.parse_args()
+    ap.add_argument("--resume", metavar="RUN_ID", default=None,
+                    help="riprende una run dal primo stadio non completato (query/topk dal checkpoint)")
+    args = ap.parse_args()
+    if not args.query and not args.resume:
+        ap.error("serve --query (oppure --resume RUN_ID)")
+    return args
 
 def main():
     args = parse_args()
+    # import lazy: `--help` e gli errori sugli argomenti non caricano pipeline e librerie di estrazione
+    from pipeline import run_pipeline
+    from export import save_markdown, save_pdf_from_markdown, write_json_stream
+    from checkpoint import Checkpoint, NoCheckpoint
+    if args.resume:
+        try:
+            ckpt = Checkpoint.resume(args.resume)
+        except FileNotFoundError as e:
+            raise SystemExit(f"[ERR] {e}")
+        args.query = ckpt.meta.get("query") or args.query
+        args.topk = int(ckpt.meta.get("topk") or args.topk)
+        print(f"Ripresa run {ckpt.run_id}: stadi completati {', '.join(ckpt.stages) or '-'}")
+    else:
+        ckpt = Checkpoint() if CHECKPOINTS else NoCheckpoint()
+        if ckpt.run_id:
+            print(f"Run {ckpt.run_id} (riprendibile con --resume {ckpt.run_id})")
     t0 = time.time()
-    log_event("run_start", {"query": args.query, "topk": args.topk})
-    md, extra = run_pipeline(args.query, topk=args.topk)
+    log_event("run_start", {"query": args.query, "topk": args.topk, "run_id": ckpt.run_id,
+                            "resume": bool(args.resume)})
+    md, extra = run_pipeline(args.query, topk=args.topk, ckpt=ckpt)
     save_markdown(md, args.out)
     if args.pdf:
         try:
@@ -26,9 +48,8 @@ def main():
     t1 = time.time()
     log_event("run_end", {"secs": round(t1-t0,1), "out": args.out, "pdf": bool(args.pdf)})
     print(f"OK → {args.out} ({round(t1-t0,1)}s)")
-    # opzionale: salva diagnostic
-    with open("last_run_debug.json","w",encoding="utf-8") as f:
-        json.dump(extra, f, ensure_ascii=False, indent=2)
+    # opzionale: salva diagnostic (sezione per sezione, liste un elemento per riga)
+    write_json_stream(args.debug_out, extra.items())
 
 if __name__ == "__main__":
     main()
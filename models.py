@@ -27,14 +27,14 @@ GeoType = Literal["Point", "Polygon", "LineString"]
 
 ID_RX = {
     "report": r"^RPT-[0-9]{8}-[0-9]{4}$",
-    "source": r"^SRC-\d{4}$",
-    "document": r"^DOC-\d{4}$",
-    "finding": r"^CLM-\d{4}$",
-    "event": r"^EVT-\d{4}$",
-    "actor": r"^ACT-\d{4}$",
-    "relationship": r"^REL-\d{4}$",
-    "indicator": r"^IND-\d{4}$",
-    "geofeature": r"^GEO-\d{4}$",
+    "source": r"^SRC-\d{4,}$",
+    "document": r"^DOC-\d{4,}$",
+    "finding": r"^CLM-\d{4,}$",
+    "event": r"^EVT-\d{4,}$",
+    "actor": r"^ACT-\d{4,}$",
+    "relationship": r"^REL-\d{4,}$",
+    "indicator": r"^IND-\d{4,}$",
+    "geofeature": r"^GEO-\d{4,}$",
 }
 
 DATE_ISO_RX = r"^\d{4}-\d{2}-\d{2}$"
@@ -57,6 +57,26 @@ def sha256_text(text: str) -> str:
     return "sha256:" + hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
 
 
+# =========================
+# Costruzione: strict vs trusted
+# =========================
+# strict  -> Model(**data): validazione completa, per input esterni (JSON utente, LLM grezzo)
+# trusted -> Model.construct(**data): nessuna rivalidazione, per dati generati dalla pipeline
+#            (ID da new_id, URL già canonici, date già normalizzate). Niente coercizione:
+#            i sotto-modelli vanno passati già costruiti.
+
+def make(cls, trusted: bool = False, **data):
+    """Istanza di `cls` validata (strict) o costruita senza validazione (trusted)."""
+    if not trusted:
+        return cls(**data)
+    if cls is Document and not data.get("hash"):
+        # stesso valore di Document.ensure_hash; meglio passare un hash precalcolato
+        txt = (data.get("text") or "").strip()
+        if txt:
+            data["hash"] = sha256_text(txt)
+    return cls.construct(**data)
+
+
 # =========================
 # Core models
 # =========================
@@ -252,43 +272,20 @@ class ReportModel(BaseModel):
     # -------------------------
     @root_validator
     def cross_refs_exist(cls, values):
-        src_ids = {s.id for s in values.get("sources", [])}
-        doc_ids = {d.id for d in values.get("documents", [])}
-
-        def _check_citations(citations: Optional[List[Citation]], where: str):
-            if not citations:
-                return
-            for c in citations:
-                if c.source_id not in src_ids:
-                    raise ValueError(f"[{where}] source_id non presente: {c.source_id}")
-                if c.document_id and c.document_id not in doc_ids:
-                    raise ValueError(f"[{where}] document_id non presente: {c.document_id}")
-
-        for f in values.get("findings", []) or []:
-            _check_citations(f.citations, f"Finding {f.id}")
-
-        for e in values.get("timeline", []) or []:
-            _check_citations(e.citations, f"Event {e.id}")
-
-        for r in values.get("relationships", []) or []:
-            _check_citations(r.citations, f"Relationship {r.id}")
-
-        for ind in values.get("indicators", []) or []:
-            for p in ind.series or []:
-                _check_citations(p.citations, f"Indicator {ind.id} point {p.date_iso}")
-
-        for gf in values.get("geospatial", []) or []:
-            if gf.properties:
-                _check_citations(gf.properties.citations, f"GeoFeature {gf.id}")
-
-        # actor cross checks
-        act_ids = {a.id for a in values.get("actors", []) or []}
-        for rel in values.get("relationships", []) or []:
-            if rel.from_ not in act_ids or rel.to not in act_ids:
-                raise ValueError(f"[Relationship {rel.id}] attori inesistenti in 'from'/'to'")
-
+        check_cross_refs(values)
         return values
 
+    @classmethod
+    def trusted(cls, check_refs: bool = True, **data) -> "ReportModel":
+        """
+        Report da dati interni senza rivalidare ogni sotto-modello (vedi `make`).
+        I riferimenti incrociati restano controllati (indice a set, un solo passaggio).
+        """
+        rpt = cls.construct(**data)
+        if check_refs:
+            check_cross_refs(rpt.__dict__)
+        return rpt
+
     # -------------------------
     # Helper
     # -------------------------
@@ -306,6 +303,44 @@ class ReportModel(BaseModel):
         return items
 
 
+def check_cross_refs(values: Dict) -> None:
+    """Citazioni -> sources/documents esistenti, relazioni -> attori esistenti (ValueError al primo errore)."""
+    src_ids = {s.id for s in values.get("sources") or []}
+    doc_ids = {d.id for d in values.get("documents") or []}
+
+    def _check_citations(citations: Optional[List[Citation]], where: str):
+        if not citations:
+            return
+        for c in citations:
+            if c.source_id not in src_ids:
+                raise ValueError(f"[{where}] source_id non presente: {c.source_id}")
+            if c.document_id and c.document_id not in doc_ids:
+                raise ValueError(f"[{where}] document_id non presente: {c.document_id}")
+
+    for f in values.get("findings", []) or []:
+        _check_citations(f.citations, f"Finding {f.id}")
+
+    for e in values.get("timeline", []) or []:
+        _check_citations(e.citations, f"Event {e.id}")
+
+    for r in values.get("relationships", []) or []:
+        _check_citations(r.citations, f"Relationship {r.id}")
+
+    for ind in values.get("indicators", []) or []:
+        for p in ind.series or []:
+            _check_citations(p.citations, f"Indicator {ind.id} point {p.date_iso}")
+
+    for gf in values.get("geospatial", []) or []:
+        if gf.properties:
+            _check_citations(gf.properties.citations, f"GeoFeature {gf.id}")
+
+    # actor cross checks
+    act_ids = {a.id for a in values.get("actors", []) or []}
+    for rel in values.get("relationships", []) or []:
+        if rel.from_ not in act_ids or rel.to not in act_ids:
+            raise ValueError(f"[Relationship {rel.id}] attori inesistenti in 'from'/'to'")
+
+
 # =========================
 # Esempio rapido d'uso
 # =========================
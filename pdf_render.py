@@ -0,0 +1,269 @@
+# pdf_render.py
+# Export PDF riusabile (batch e modalità service) al posto di "un browser per report":
+# - Markdown -> HTML in cache per hash del contenuto (LRU in memoria)
+# - WeasyPrint "caldo": FontConfiguration e foglio di stile compilati una volta per thread del pool
+#   (FontConfiguration non va condivisa fra thread), così i report girano in parallelo
+# - fallback Chromium (Playwright) persistente: un browser, pool di PDF_PAGES pagine su un
+#   event loop dedicato, rendering in parallelo e niente file temporanei (page.set_content)
+# Backend da PDF_BACKEND: auto (WeasyPrint, poi Chromium) | weasyprint | chromium.
+from __future__ import annotations
+import asyncio
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from config import PDF_BACKEND, PDF_PAGES, HTML_CACHE_SIZE
+from provenance import log_event
+
+PAGE_CSS = """
+  @page { size: A4; margin: 18mm; }
+  body { font-family: Arial, Helvetica, sans-serif; line-height: 1.35; font-size: 12pt; }
+  h1,h2,h3 { margin-top: 1.2em; }
+  code, pre { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, "Liberation Mono", monospace; }
+  a { text-decoration: none; }
+  table { border-collapse: collapse; width: 100%; }
+  th, td { border: 1px solid #ddd; padding: 6px; }
+  blockquote { border-left: 3px solid #ccc; margin: 0; padding: .5em 1em; color: #555; }
+"""
+PDF_MARGIN = {"top": "18mm", "right": "18mm", "bottom": "18mm", "left": "18mm"}
+
+
+def html_wrap(body_html: str, css: str = PAGE_CSS) -> str:
+    style = f"<style>{css}</style>\n" if css else ""
+    return f"""<!doctype html>
+<html lang="it">
+<meta charset="utf-8">
+<title>OSINT Report</title>
+{style}<body>
+{body_html}
+</body>
+</html>"""
+
+
+# ---------------------------
+# Markdown -> HTML (cache per hash)
+# ---------------------------
+_HTML_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_HTML_LOCK = threading.Lock()
+
+
+def markdown_html(md: str) -> str:
+    """markdown2 una sola volta per contenuto: stesso report (o stessa sezione) -> HTML in cache."""
+    key = hashlib.sha256(md.encode("utf-8", errors="ignore")).hexdigest()
+    with _HTML_LOCK:
+        hit = _HTML_CACHE.get(key)
+        if hit is not None:
+            _HTML_CACHE.move_to_end(key)
+            return hit
+    import markdown2  # lazy import
+    html = markdown2.markdown(md)
+    with _HTML_LOCK:
+        _HTML_CACHE[key] = html
+        while len(_HTML_CACHE) > HTML_CACHE_SIZE:
+            _HTML_CACHE.popitem(last=False)
+    return html
+
+
+# ---------------------------
+# Backend
+# ---------------------------
+class _Weasy:
+    def __init__(self, pages: int = 1):  # `pages`: thread del pool, una FontConfiguration ciascuno
+        from weasyprint import HTML, CSS
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:  # WeasyPrint < 53
+            from weasyprint.fonts import FontConfiguration
+        self.HTML, self.CSS, self.FontConfiguration = HTML, CSS, FontConfiguration
+        self.local = threading.local()
+        self._warm()  # errori di fontconfig/pango all'avvio, non al primo report
+
+    def _warm(self):
+        if getattr(self.local, "fonts", None) is None:
+            self.local.fonts = self.FontConfiguration()
+            self.local.css = self.CSS(string=PAGE_CSS, font_config=self.local.fonts)
+        return self.local.fonts, self.local.css
+
+    def render(self, body_html: str, path: str) -> None:
+        fonts, css = self._warm()
+        self.HTML(string=html_wrap(body_html, css="")).write_pdf(path, stylesheets=[css], font_config=fonts)
+
+    def close(self) -> None:
+        pass
+
+
+class _Chromium:
+    """Browser Chromium persistente con pool di pagine; l'API async gira su un thread proprio."""
+    def __init__(self, pages: int = PDF_PAGES):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="pdf-chromium", daemon=True)
+        self.thread.start()
+        try:
+            self._call(self._start(pages))
+        except Exception:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            raise
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _start(self, n: int) -> None:
+        from playwright.async_api import async_playwright
+        self.pw = await async_playwright().start()
+        self.browser = await self.pw.chromium.launch()
+        self.gen = 0                      # incrementato a ogni rilancio del browser
+        self.relaunch_lock = asyncio.Lock()
+        # pool di (generazione, pagina): pagine di un browser precedente si ricreano al prelievo
+        self.pages: asyncio.Queue = asyncio.Queue()
+        for _ in range(n):
+            self.pages.put_nowait((self.gen, await self.browser.new_page()))
+
+    async def _relaunch(self, gen: int) -> None:
+        async with self.relaunch_lock:
+            if gen != self.gen:
+                return  # già rilanciato per un'altra pagina
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = await self.pw.chromium.launch()
+            self.gen += 1
+            log_event("pdf_browser_relaunch", {"gen": self.gen})
+
+    async def _replace(self, gen: int, page):
+        """Pagina nuova al posto di una in stato incerto (crash, timeout); se neanche
+        new_page riesce il browser è andato e si rilancia. Non solleva mai: al peggio
+        lascia nel pool uno slot vuoto (generazione -1) che si ricrea al prossimo prelievo."""
+        try:
+            await page.close()
+        except Exception:
+            pass
+        try:
+            return self.gen, await self.browser.new_page()
+        except Exception:
+            pass
+        try:
+            await self._relaunch(gen)
+            return self.gen, await self.browser.new_page()
+        except Exception as e:
+            log_event("pdf_browser_down", {"err": str(e)})
+            return -1, None
+
+    async def _render(self, html: str, path: str) -> None:
+        gen, page = await self.pages.get()
+        try:
+            if gen != self.gen:
+                gen, page = self.gen, await self.browser.new_page()
+            await page.set_content(html, wait_until="load")
+            await page.pdf(path=path, format="A4", print_background=True, margin=PDF_MARGIN)
+        except Exception:
+            gen, page = await self._replace(gen, page)
+            raise
+        finally:
+            self.pages.put_nowait((gen, page))
+
+    def render(self, body_html: str, path: str) -> None:
+        self._call(self._render(html_wrap(body_html), path))
+
+    async def _stop(self) -> None:
+        await self.browser.close()
+        await self.pw.stop()
+
+    def close(self) -> None:
+        try:
+            self._call(self._stop())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_BACKENDS = {"weasyprint": _Weasy, "chromium": _Chromium}
+
+
+class PdfRenderer:
+    """
+    Renderer condiviso: backend creati al primo uso e poi riusati; `submit` rende in
+    parallelo fino a PDF_PAGES report (thread WeasyPrint o pagine del pool Chromium).
+    """
+    def __init__(self, backend: str = PDF_BACKEND, pages: int = PDF_PAGES):
+        self.order = ["weasyprint", "chromium"] if backend == "auto" else [backend]
+        self.pages = pages
+        self.backends = {}
+        self.errors = {}   # backend non disponibile -> errore di avvio (non si ritenta)
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=pages, thread_name_prefix="pdf")
+
+    def _backend(self, name: str):
+        with self.lock:
+            if name in self.backends or name in self.errors:
+                return self.backends.get(name)
+            try:
+                self.backends[name] = _BACKENDS[name](self.pages)
+                log_event("pdf_backend_ready", {"backend": name})
+            except Exception as e:
+                self.errors[name] = e
+                log_event("pdf_backend_unavailable", {"backend": name, "err": str(e)})
+            return self.backends.get(name)
+
+    def render(self, md: str, path: str) -> str:
+        """PDF di `md` in `path`; ritorna il backend usato. RuntimeError se nessuno riesce."""
+        body = markdown_html(md)
+        errs = {}
+        for name in self.order:
+            b = self._backend(name)
+            if b is None:
+                errs[name] = self.errors[name]
+                continue
+            try:
+                b.render(body, path)
+                return name
+            except Exception as e:
+                errs[name] = e
+        raise RuntimeError("PDF export fallito. " + "; ".join(f"{k}: {v}" for k, v in errs.items()))
+
+    def submit(self, md: str, path: str) -> Future:
+        return self.pool.submit(self.render, md, path)
+
+    def render_many(self, jobs: Iterable[Tuple[str, str]]) -> List[Tuple[str, Optional[str]]]:
+        """[(markdown, path), ...] in parallelo -> [(path, errore | None), ...] nello stesso ordine."""
+        futs = [(path, self.submit(md, path)) for md, path in jobs]
+        out = []
+        for path, f in futs:
+            try:
+                f.result()
+                out.append((path, None))
+            except Exception as e:
+                out.append((path, str(e)))
+        return out
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+        for b in self.backends.values():
+            try:
+                b.close()
+            except Exception:
+                pass
+        self.backends.clear()
+
+
+_RENDERER: Optional[PdfRenderer] = None
+_RENDERER_LOCK = threading.Lock()
+
+
+def renderer() -> PdfRenderer:
+    """Renderer di processo (browser/font caricati una volta, chiusi all'uscita)."""
+    global _RENDERER
+    with _RENDERER_LOCK:
+        if _RENDERER is None:
+            _RENDERER = PdfRenderer()
+            atexit.register(close_renderer)
+        return _RENDERER
+
+
+def close_renderer() -> None:
+    global _RENDERER
+    with _RENDERER_LOCK:
+        r, _RENDERER = _RENDERER, None
+    if r is not None:
+        r.close()
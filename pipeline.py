@@ -4,24 +4,35 @@ from datetime import date, timedelta
 from urllib.parse import urlparse
 from collections import defaultdict
 
-from searxng import searxng_search
+from collectors import collect
 from fetch import fetch_and_extract
-from dedup import prepare_for_dedup, cluster_near_duplicates
-from rank import score_item
-from llm import chat
-from prompts import PLANNER_PROMPT, NER_PROMPT, SUMMARIZE_PROMPT, FACTCHECK_PROMPT, COMPOSE_PROMPT
+from dedup import prepare_for_dedup, cluster_near_duplicates, canonical_url, SeedDupIndex
+from rank import score_item, seed_priority
+from quality import domain as quality_domain
+from host_health import health
+from llm import chat, stage_messages
+from structured import chat_json
+from prompts import PLANNER_PROMPT, NER_PROMPT, SUMMARIZE_PROMPT, SUMMARIZE_PROMPT_SHARED, FACTCHECK_PROMPT, COMPOSE_PROMPT
 from provenance import log_event
-from timeline import extract_timeline
+from timeline import extract_timeline, merge_events
+from context_pack import pack_docs, stage_budget, build_shared_sources
+from checkpoint import NoCheckpoint, mark_degraded
+from corpus import Doc, to_docs, to_dicts
+from lang_id import detect_batch, lang_allowed
+from config import (
+    LLM_FUSED_ANALYSIS, LLM_PROMPT_LAYOUT, PIPELINE_STREAMING, LANG_ALLOWED,
+    CRAWL_MAX_FETCH, CRAWL_TARGET_DOCS, CRAWL_MIN_PRIORITY, CRAWL_MIN_TEXT, CRAWL_DOMAIN_PENALTY
+)
 
 # ---------------------------
 # Planner (unchanged)
 # ---------------------------
 def planner(query: str):
     msg = [{"role":"system","content":PLANNER_PROMPT},{"role":"user","content":query}]
-    out = chat(msg, max_tokens=900)
     try:
-        plan = json.loads(out)
-    except Exception:
+        plan = chat_json(msg, "planner", max_tokens=900)
+    except ValueError:
+        mark_degraded("planner")
         plan = {
             "subgoals": ["Mappare attori","Raccogliere timeline","Identificare indicatori"],
             "queries": [query, f'"{query}" site:reuters.com', f'{query} filetype:pdf'],
@@ -33,37 +44,122 @@ def planner(query: str):
 # ---------------------------
 # Ricerca / Crawl (unchanged)
 # ---------------------------
-def search(plan):
-    agg = []
-    for q in plan["queries"]:
-        agg += searxng_search(q)
-    # dedup url base
-    seen = set(); uniq = []
-    for r in agg:
-        u = r.get("url")
-        if u and u not in seen:
-            uniq.append(r); seen.add(u)
+def search(plan, query="", from_iso=None):
+    """Seed da tutti i collector registrati (SearXNG, ReliefWeb, ...) in parallelo,
+    fusi per URL canonico; budget e rate limit per collector in collectors.py."""
+    uniq = collect(plan, query or (plan.get("queries") or [""])[0], from_iso)
     log_event("search_uniq", {"count": len(uniq)})
-    return uniq[:80]
+    return uniq
+
+class SeedFilter:
+    """
+    Filtro pre-fetch sui risultati di ricerca (nessun download), usabile anche
+    incrementalmente (pipeline streaming):
+      1) URL canonico (via UTM/fragment) e dedup sull'URL canonico
+      2) scarta i seed con data di ricerca (published) fuori finestra
+      3) collassa titolo+snippet quasi identici
+      4) scarta i seed con titolo+snippet chiaramente in lingue fuori da LANG_ALLOWED
+    """
+    def __init__(self, from_iso):
+        self.from_iso = from_iso
+        self.seen = set()
+        self.dups = SeedDupIndex()
+        self.stats = {"in": 0, "stale": 0, "near_dup": 0, "off_lang": 0, "kept": 0}
+
+    def accept(self, s):
+        """Seed normalizzato se da tenere, altrimenti None."""
+        kept = self.accept_many([s])
+        return kept[0] if kept else None
+
+    def accept_many(self, seeds):
+        """Seed da tenere, nell'ordine d'arrivo; la lingua si rileva in batch (detect_batch)
+        solo sui seed sopravvissuti a URL e data."""
+        fresh = []
+        for s in seeds:
+            self.stats["in"] += 1
+            u = canonical_url(s.get("url"))
+            if not u or u in self.seen:
+                continue
+            self.seen.add(u)
+            pub = (s.get("published") or "")[:10]
+            if pub and self.from_iso and pub < self.from_iso:
+                self.stats["stale"] += 1
+                continue
+            fresh.append({**s, "url": u})
+        if LANG_ALLOWED and fresh:
+            langs = detect_batch(f"{s.get('title') or ''}. {s.get('snippet') or ''}" for s in fresh)
+            fresh = [s for s, lang in zip(fresh, langs) if lang_allowed(lang, LANG_ALLOWED)]
+            self.stats["off_lang"] += len(langs) - len(fresh)
+        kept = []
+        for s in fresh:
+            if not self.dups.add(s):
+                self.stats["near_dup"] += 1
+                continue
+            self.stats["kept"] += 1
+            kept.append(s)
+        return kept
+
+def filter_seeds(seeds, from_iso):
+    f = SeedFilter(from_iso)
+    kept = f.accept_many(seeds)
+    log_event("seed_filter", f.stats)
+    return kept
+
+def _next_seed(pending, taken_by_domain):
+    """Seed a priorità più alta, penalizzando i domini già coperti (diversità)."""
+    def eff(s):
+        return s["_prio"] - CRAWL_DOMAIN_PENALTY * taken_by_domain.get(s["_domain"], 0)
+    best = max(range(len(pending)), key=lambda i: eff(pending[i]))
+    return pending.pop(best)
 
-def crawl(seeds):
-    docs = []
-    for s in seeds[:40]:
+def _pending_seed(s, query, now_ts):
+    """Seed pronto per la coda di fetch (priorità, dominio) o None se l'host ha il
+    circuito aperto; gli host che falliscono spesso perdono priorità."""
+    hh = health()
+    if hh.is_open(s["url"]):
+        log_event("host_skip", {"url": s["url"]})
+        return None
+    prio = seed_priority(s, query, now_ts) - hh.penalty(s["url"])
+    return {**s, "_prio": prio, "_domain": quality_domain(s["url"])}
+
+def crawl(seeds, query="", max_fetch=CRAWL_MAX_FETCH, target=CRAWL_TARGET_DOCS):
+    """
+    Fetch in ordine di priorità stimata dai metadati (rank.seed_priority), con budget:
+    si ferma dopo `target` documenti buoni (priorità >= CRAWL_MIN_PRIORITY e testo
+    sufficiente) o dopo `max_fetch` tentativi. I seed che portano già il testo (API,
+    feed full-text) sono documenti pronti: niente fetch, fuori dal budget.
+    """
+    now_ts = time.time()
+    docs = [Doc.from_dict(s) for s in seeds if s.get("text")]
+    ready = len(docs)
+    pending = [p for p in (_pending_seed(s, query, now_ts) for s in seeds if s.get("url") and not s.get("text")) if p]
+    taken_by_domain = defaultdict(int)
+    good = fetched = 0
+    while pending and fetched < max_fetch and good < target:
+        s = _next_seed(pending, taken_by_domain)
+        prio, dom = s.pop("_prio"), s.pop("_domain")
+        fetched += 1
         try:
             ext = fetch_and_extract(s["url"])
-            # merge seed (published normalizzato da searxng) + estratto
-            docs.append({**s, **ext})
+            # merge seed (published normalizzato da searxng) + estratto, in forma compatta
+            docs.append(Doc.merge(s, ext, seed_priority=prio))
         except Exception as e:
             log_event("fetch_err", {"url": s.get("url"), "err": str(e)})
             continue
-    log_event("crawl_done", {"docs": len(docs)})
+        taken_by_domain[dom] += 1
+        if prio >= CRAWL_MIN_PRIORITY and len(ext.get("text") or "") >= CRAWL_MIN_TEXT:
+            good += 1
+    log_event("crawl_done", {"docs": len(docs), "ready": ready, "fetched": fetched, "good": good,
+                             "skipped": len(pending), "early_stop": good >= target})
     return docs
 
 # ---------------------------
 # Dedup + Ranking (migliorato solo sort)
 # ---------------------------
 def dedup_rank(docs):
+    """Dedup + rank sul corpus compatto (corpus.Doc); i documenti tenuti tornano dict."""
     now_ts = time.time()
+    docs = to_docs(docs)
     prepare_for_dedup(docs)
     clusters = cluster_near_duplicates(docs)
     picked = []
@@ -78,7 +174,7 @@ def dedup_rank(docs):
         d["score"] = score_item(d, now_ts)
     ranked = sorted(picked, key=lambda d: d["score"], reverse=True)
     log_event("rank_done", {"kept": len(ranked)})
-    return ranked
+    return to_dicts(ranked)
 
 def _safe_epoch(d):
     from utils_date import to_epoch_seconds
@@ -87,119 +183,204 @@ def _safe_epoch(d):
 # ---------------------------
 # NER con budget & validazione
 # ---------------------------
-def ner_top(docs, topk=12, char_budget=12000):
-    # ... come versione hardening (budget + validazione + log) ...
-    buf, n = [], 0
-    for d in docs[:topk]:
-        title = (d.get("title") or "")
-        text = (d.get("text") or "")[:2000]
-        chunk = f"{title}\n{text}\n\n"
-        if n + len(chunk) > char_budget:
-            break
-        buf.append(chunk); n += len(chunk)
-    msg = [
-        {"role":"system","content": NER_PROMPT},
-        {"role":"user","content": "".join(buf)}
-    ]
-    out = chat(msg, max_tokens=900)
+NER_TYPES = {"PERSON", "ORG", "LOC", "DATE", "INDICATOR"}
+
+def _clean_entities(raw):
+    """Valida/normalizza la lista entità dell'LLM. Solleva ValueError se non è una lista."""
+    if not isinstance(raw, list):
+        raise ValueError("entities: attesa lista")
+    ents = [e for e in raw if isinstance(e, dict) and e.get("entity") and e.get("type")]
+    seen=set(); clean=[]
+    for e in ents:
+        ent = str(e["entity"]).strip()
+        typ = str(e["type"]).strip().upper()
+        if not ent or typ not in NER_TYPES: continue
+        k=(ent.lower(), typ)
+        if k in seen: continue
+        try:
+            freq = max(1, int(e.get("freq", 1)))
+        except Exception:
+            freq = 1
+        seen.add(k); clean.append({"entity": ent, "type": typ, "freq": freq})
+    return clean
+
+def ner_top(docs, topk=12, token_budget=None, shared=None):
+    if shared:
+        msg = stage_messages(NER_PROMPT, "", shared)
+    else:
+        budget = token_budget or stage_budget("ner", NER_PROMPT, max_tokens=900)
+        buf = [f"{p['title']}\n{p['excerpt']}\n\n" for p in pack_docs(docs, budget, topk=topk)]
+        msg = [
+            {"role":"system","content": NER_PROMPT},
+            {"role":"user","content": "".join(buf)}
+        ]
     try:
-        raw = json.loads(out)
-        ents = [e for e in raw if isinstance(e, dict) and e.get("entity") and e.get("type")]
-        seen=set(); clean=[]
-        for e in ents:
-            ent = e["entity"].strip()
-            typ = e["type"].strip().upper()
-            if not ent: continue
-            k=(ent.lower(), typ)
-            if k in seen: continue
-            seen.add(k); clean.append({"entity": ent, "type": typ, "freq": int(e.get("freq",1))})
+        clean = _clean_entities(chat_json(msg, "ner", max_tokens=900))
         log_event("ner_ok", {"entities": len(clean)})
         return clean
-    except Exception:
+    except ValueError:
         log_event("ner_fail", {})
+        mark_degraded("ner")
         return []
 
-def analyze_sentiment_emotions(docs, topk=12, char_budget=12000):
-    # prepara testo concatenato controllando la lunghezza
-    buf, n = [], 0
-    for d in docs[:topk]:
-        title = (d.get("title") or "")
-        text = (d.get("text") or "")[:2000]
-        chunk = f"{title}\n{text}\n\n"
-        if n + len(chunk) > char_budget:
-            break
-        buf.append(chunk); n += len(chunk)
+SENTIMENT_NEUTRAL = {
+    "overall_sentiment": "neutral",
+    "confidence": 0.5,
+    "emotions": {"anger":0.0,"fear":0.0,"joy":0.0,"sadness":0.0,"surprise":0.0},
+    "notes":""
+}
+
+def _clip01(x):
+    try:
+        return max(0.0, min(1.0, float(x)))
+    except Exception:
+        return 0.0
+
+def _clean_sentiment(data):
+    """Validazione minimale del blocco sentiment. Solleva ValueError se non è un oggetto."""
+    if not isinstance(data, dict):
+        raise ValueError("sentiment: atteso oggetto")
+    overall = (data.get("overall_sentiment") or "neutral").lower()
+    if overall not in {"positive","neutral","negative"}:
+        overall = "neutral"
+    conf = _clip01(data.get("confidence", 0.5))
+    em = data.get("emotions") or {}
+    emotions = {
+        "anger":   _clip01(em.get("anger", 0.0)),
+        "fear":    _clip01(em.get("fear", 0.0)),
+        "joy":     _clip01(em.get("joy", 0.0)),
+        "sadness": _clip01(em.get("sadness", 0.0)),
+        "surprise":_clip01(em.get("surprise", 0.0)),
+    }
+    return {
+        "overall_sentiment": overall,
+        "confidence": conf,
+        "emotions": emotions,
+        "notes": (data.get("notes") or "")[:240]
+    }
 
+def analyze_sentiment_emotions(docs, topk=12, token_budget=None, shared=None):
     from prompts import SENTIMENT_EMO_PROMPT
-    msg = [
-        {"role": "system", "content": SENTIMENT_EMO_PROMPT},
-        {"role": "user", "content": "".join(buf)}
-    ]
-    out = chat(msg, max_tokens=600)
+    if shared:
+        msg = stage_messages(SENTIMENT_EMO_PROMPT, "", shared)
+    else:
+        # prepara testo concatenato entro il budget di token dello stadio
+        budget = token_budget or stage_budget("sentiment", SENTIMENT_EMO_PROMPT, max_tokens=600)
+        buf = [f"{p['title']}\n{p['excerpt']}\n\n" for p in pack_docs(docs, budget, topk=topk)]
+        msg = [
+            {"role": "system", "content": SENTIMENT_EMO_PROMPT},
+            {"role": "user", "content": "".join(buf)}
+        ]
     try:
-        data = json.loads(out)
-        # validazione minimale
-        overall = (data.get("overall_sentiment") or "neutral").lower()
-        if overall not in {"positive","neutral","negative"}:
-            overall = "neutral"
-        conf = float(data.get("confidence", 0.5))
-        em = data.get("emotions") or {}
-        def _clip01(x):
-            try:
-                return max(0.0, min(1.0, float(x)))
-            except Exception:
-                return 0.0
-        emotions = {
-            "anger":   _clip01(em.get("anger", 0.0)),
-            "fear":    _clip01(em.get("fear", 0.0)),
-            "joy":     _clip01(em.get("joy", 0.0)),
-            "sadness": _clip01(em.get("sadness", 0.0)),
-            "surprise":_clip01(em.get("surprise", 0.0)),
-        }
-        out_obj = {
-            "overall_sentiment": overall,
-            "confidence": max(0.0, min(1.0, conf)),
-            "emotions": emotions,
-            "notes": (data.get("notes") or "")[:240]
-        }
-        log_event("sentiment_ok", {"overall": overall, "conf": out_obj["confidence"]})
+        out_obj = _clean_sentiment(chat_json(msg, "sentiment", max_tokens=600))
+        log_event("sentiment_ok", {"overall": out_obj["overall_sentiment"], "conf": out_obj["confidence"]})
         return out_obj
-    except Exception:
+    except ValueError:
         log_event("sentiment_fail", {})
-        return {
-            "overall_sentiment": "neutral",
-            "confidence": 0.5,
-            "emotions": {"anger":0.0,"fear":0.0,"joy":0.0,"sadness":0.0,"surprise":0.0},
-            "notes":""
-        }
+        mark_degraded("sentiment")
+        return dict(SENTIMENT_NEUTRAL)
+
+# ---------------------------
+# Analisi combinata (NER + sentiment + eventi) in una chiamata
+# ---------------------------
+def _clean_events(raw, refs):
+    """Eventi datati dell'LLM: data ISO valida, testo non vuoto, fonti solo fra gli ID noti."""
+    if not isinstance(raw, list):
+        raise ValueError("events: attesa lista")
+    from utils_date import to_iso_date_fast
+    out = []
+    for e in raw:
+        if not isinstance(e, dict):
+            continue
+        iso = to_iso_date_fast(e.get("date"))
+        text = " ".join(str(e.get("text") or "").split())
+        if not iso or len(text) < 20:
+            continue
+        srcs = [int(n) for n in (e.get("sources") or []) if str(n).isdigit() and int(n) in refs]
+        out.append({"date": iso, "text": text[:220], "sources": srcs})
+    return out
 
-def summarize_with_citations(ranked, topk=8):
-    pack = []
-    refs = {}
-    for i, d in enumerate(ranked[:topk], start=1):
-        refs[i] = d["url"]
-        pack.append({"id": i, "title": d.get("title"), "excerpt": (d.get("text","")[:3000])})
-    msg = [
-        {"role":"system","content":SUMMARIZE_PROMPT},
-        {"role":"user","content":json.dumps({"sources": pack}, ensure_ascii=False)}
-    ]
-    out = chat(msg, max_tokens=1800)
+def analyze_combined(docs, refs, topk=12, token_budget=None, shared=None):
+    """
+    Un solo prefill per NER, sentiment/emozioni ed eventi datati (ANALYSIS_PROMPT).
+    Ogni sezione è validata a parte: se il JSON non è parsabile si torna alle chiamate
+    singole; se una sola sezione è invalida, si rifà solo quella.
+    Ritorna (entities, sentiment, events).
+    """
+    from prompts import ANALYSIS_PROMPT
+    if shared:
+        msg = stage_messages(ANALYSIS_PROMPT, "", shared)
+    else:
+        budget = token_budget or stage_budget("analysis", ANALYSIS_PROMPT, max_tokens=1500)
+        url2id = {u: i for i, u in refs.items()}
+        buf = []
+        for p in pack_docs(docs, budget, topk=topk):
+            sid = url2id.get(p["doc"].get("url"))
+            head = f"[{sid}] " if sid else ""
+            buf.append(f"{head}{p['title']}\n{p['excerpt']}\n\n")
+        msg = [
+            {"role": "system", "content": ANALYSIS_PROMPT},
+            {"role": "user", "content": "".join(buf)}
+        ]
+    try:
+        data = chat_json(msg, "analysis", max_tokens=1500)
+    except ValueError:
+        log_event("analysis_fail", {"fallback": "all"})
+        mark_degraded("analysis")
+        return ner_top(docs, topk=topk, shared=shared), analyze_sentiment_emotions(docs, topk=topk, shared=shared), []
+
+    failed = []
+    try:
+        ents = _clean_entities(data.get("entities"))
+    except Exception:
+        failed.append("entities")
+        ents = ner_top(docs, topk=topk, shared=shared)
+    try:
+        senti = _clean_sentiment(data.get("sentiment"))
+    except Exception:
+        failed.append("sentiment")
+        senti = analyze_sentiment_emotions(docs, topk=topk, shared=shared)
     try:
-        data = json.loads(out)
+        events = _clean_events(data.get("events") or [], refs)
     except Exception:
+        failed.append("events")
+        mark_degraded("analysis")
+        events = []  # la timeline regex resta comunque disponibile
+    log_event("analysis_ok", {"entities": len(ents), "overall": senti["overall_sentiment"],
+                              "events": len(events), "fallback": failed})
+    return ents, senti, events
+
+def summarize_with_citations(ranked, topk=8, token_budget=None, shared=None):
+    if shared:
+        refs = dict(shared["refs"])
+        msg = stage_messages(SUMMARIZE_PROMPT_SHARED, "", shared)
+    else:
+        budget = token_budget or stage_budget("summarize", SUMMARIZE_PROMPT, max_tokens=1800)
+        pack = []
+        refs = {}
+        for i, p in enumerate(pack_docs(ranked, budget, topk=topk), start=1):
+            refs[i] = p["doc"]["url"]
+            pack.append({"id": i, "title": p["title"], "excerpt": p["excerpt"]})
+        msg = [
+            {"role":"system","content":SUMMARIZE_PROMPT},
+            {"role":"user","content":json.dumps({"sources": pack}, ensure_ascii=False)}
+        ]
+    try:
+        data = chat_json(msg, "summarize", max_tokens=1800)
+    except ValueError:
+        mark_degraded("summarize")
         data = {"per_source_summary": {}, "cross_summary": "", "claims": []}
     log_event("summ_ok", {"claims": len(data.get("claims", []))})
     return data, refs
 
-def factcheck(claims, sources_map):
+def factcheck(claims, sources_map, shared=None):
     # ... identico alla versione hardening ...
     payload = {"claims": claims, "sources": sources_map}
-    msg = [{"role":"system","content":FACTCHECK_PROMPT},
-           {"role":"user","content":json.dumps(payload, ensure_ascii=False)}]
-    out = chat(msg, max_tokens=1800)
+    msg = stage_messages(FACTCHECK_PROMPT, json.dumps(payload, ensure_ascii=False), shared)
     try:
-        checks = json.loads(out)
-    except Exception:
+        checks = chat_json(msg, "factcheck", max_tokens=1800)
+    except ValueError:
+        mark_degraded("factcheck")
         checks = [{"claim": c.get("text",""), "support":"unknown", "confidence":0.4, "notes":"insufficient evidence"} for c in claims]
     log_event("factcheck_ok", {"checks": len(checks)})
     return checks
@@ -255,40 +436,79 @@ def compose_report(query, checks, ents, refs, per_source_summary, cross_summary,
     }
     msg = [{"role":"system","content":COMPOSE_PROMPT},
            {"role":"user","content":json.dumps(payload, ensure_ascii=False)}]
+    # stringa unica di proposito: è una sola risposta LLM (tetto max_tokens=2400, ~10 KB), serve intera
+    # al checkpoint "report" e al PDF; lo streaming di export.save_markdown conta per il report
+    # strutturato (main.py.NEW: iter_markdown), che cresce con il numero di fonti
     md = chat(msg, max_tokens=2400)
     return md
 
-def run_pipeline(query: str, topk: int = 8):
-    plan = planner(query)
-    seeds = search(plan)
-    docs = crawl(seeds)
+def run_pipeline(query: str, topk: int = 8, ckpt=None):
+    """
+    Pipeline completa. `ckpt` (checkpoint.Checkpoint) persiste l'output di ogni stadio
+    sotto un run id: su una run ripresa gli stadi già completati vengono ricaricati.
+    """
+    ck = ckpt or NoCheckpoint()
+    ck.set_meta(query=query, topk=topk)
+    plan = ck.stage("plan", planner, query)
+
+    def _window():
+        freshness_days = int(plan.get("criteria", {}).get("freshness_days", 30) or 30)
+        return {"today": date.today().isoformat(),
+                "from": (date.today() - timedelta(days=freshness_days)).isoformat()}
+    # la finestra temporale resta quella della prima esecuzione anche se la ripresa avviene giorni dopo
+    window = ck.stage("window", _window)
+    today_iso, from_iso = window["today"], window["from"]
+
+    def _collect():
+        if PIPELINE_STREAMING:
+            # ricerca, fetch, freshness, dedup e rank sovrapposti; stop a top-k stabile
+            from streaming import stream_collect
+            return stream_collect(plan, query, from_iso, topk)
+        seeds = ck.stage("seeds", lambda: filter_seeds(search(plan, query, from_iso), from_iso))
+
+        def _crawl():
+            docs = crawl(seeds, query=query)
 
-    freshness_days = int(plan.get("criteria", {}).get("freshness_days", 30) or 30)
-    today_iso = date.today().isoformat()
-    from_iso = (date.today() - timedelta(days=freshness_days)).isoformat()
+            def _date_of(d):
+                return (d.get("detected_date") or d.get("published") or "")[:10]
 
-    def _date_of(d):
-        return (d.get("detected_date") or d.get("published") or "")[:10]
+            before_filter = len(docs)
+            docs = [d for d in docs if not _date_of(d) or _date_of(d) >= from_iso]
+            log_event("freshness_filter", {"from": from_iso, "before": before_filter, "after": len(docs)})
+            return docs
 
-    before_filter = len(docs)
-    docs = [d for d in docs if not _date_of(d) or _date_of(d) >= from_iso]
-    log_event("freshness_filter", {"from": from_iso, "before": before_filter, "after": len(docs)})
+        docs = ck.stage("docs", _crawl)
+        return dedup_rank(docs)
 
-    ranked = dedup_rank(docs)
-    ents = ner_top(ranked, topk=topk)
-    summ, refs = summarize_with_citations(ranked, topk=topk)
+    ranked = ck.stage("ranked", _collect)
+    # layout shared_prefix: un solo blocco FONTI riusato identico da tutti gli stadi
+    shared = build_shared_sources(ranked, topk=topk) if LLM_PROMPT_LAYOUT == "shared_prefix" else None
+    summ, refs = ck.stage("summary", summarize_with_citations, ranked, topk=topk, shared=shared)
+    if LLM_FUSED_ANALYSIS:
+        ents, senti, llm_events = ck.stage("analysis", analyze_combined, ranked, refs, topk=topk, shared=shared)
+    else:
+        ents = ck.stage("entities", ner_top, ranked, topk=topk, shared=shared)
+        llm_events = []
 
     original_claims = summ.get("claims", [])
-    checks = factcheck(original_claims, refs)
+    checks = ck.stage("checks", factcheck, original_claims, refs, shared=shared)
     kept_claims, kept_checks = enrich_and_filter_claims(original_claims, checks, refs)
 
     # Timeline robusta (già presente se hai integrato la timeline.py)
-    timeline = extract_timeline(ranked, refs, from_iso, today_iso, max_events=12)
+    def _timeline():
+        tl = extract_timeline(ranked, refs, from_iso, today_iso, max_events=12)
+        if llm_events:
+            tl = merge_events(tl, llm_events, from_iso, today_iso, max_events=12)
+        return tl
+    timeline = ck.stage("timeline", _timeline)
 
     # >>> NUOVO: sentiment & emozioni
-    senti = analyze_sentiment_emotions(ranked, topk=topk)
+    if not LLM_FUSED_ANALYSIS:
+        senti = ck.stage("sentiment", analyze_sentiment_emotions, ranked, topk=topk, shared=shared)
 
-    md = compose_report(
+    md = ck.stage(
+        "report",
+        compose_report,
         query,
         kept_checks,
         ents,
@@ -322,5 +542,6 @@ def run_pipeline(query: str, topk: int = 8):
         "checks": kept_checks,
         "plan": plan,
         "freshness_from": from_iso,
-        "timeline": timeline
+        "timeline": timeline,
+        "run_id": ck.run_id
     }
@@ -71,9 +71,7 @@ Regole:
 - Nessun testo fuori dal JSON.
 """
 
-SUMMARIZE_PROMPT = """Ruolo: analista OSINT.
-Ricevi più fonti con testo e un ID numerico [n] per ciascuna.
-
+_SUMMARIZE_TASK = """
 Obiettivi:
 1) per_source_summary: breve riassunto per ogni fonte, citando SEMPRE l’ID come [n].
 2) cross_summary: una sintesi integrata (max ~120 parole).
@@ -97,6 +95,16 @@ VINCOLI DI OUTPUT:
 - Nessun testo fuori dal JSON; niente commenti.
 """
 
+# la descrizione dell'input dipende dal layout (LLM_PROMPT_LAYOUT): payload JSON dello stadio
+# oppure blocco FONTI condiviso in testa al messaggio
+SUMMARIZE_PROMPT = """Ruolo: analista OSINT.
+Input: JSON {"sources": [{"id": n, "title": "...", "excerpt": "..."}]}, un ID numerico [n] per fonte.
+""" + _SUMMARIZE_TASK
+
+SUMMARIZE_PROMPT_SHARED = """Ruolo: analista OSINT.
+Input: le fonti del blocco FONTI qui sopra, ciascuna con il suo ID numerico [n], titolo ed estratto.
+""" + _SUMMARIZE_TASK
+
 FACTCHECK_PROMPT = """Ruolo: fact-checker OSINT.
 Ricevi una lista di CLAIM e una mappa di riferimenti [n] -> URL.
 Valuta ogni claim usando SOLO le evidenze delle fonti fornite.
@@ -181,3 +189,36 @@ STILE:
 - Non inserire testo fuori dalle sezioni richieste.
 - Non inventare contenuti o citazioni. Se mancano dati, usa formulazioni caute.
 """
+
+ANALYSIS_PROMPT = """Ruolo: analista OSINT (NER + sentiment + eventi datati) in un'unica passata.
+Input: estratti da più fonti; ogni fonte inizia con l'ID tra parentesi quadre [n] (se presente).
+
+Devi restituire SOLO JSON valido con questa struttura esatta:
+{
+  "entities": [{"entity":"<string>", "type":"PERSON|ORG|LOC|DATE|INDICATOR", "freq": <int>}],
+  "sentiment": {
+    "overall_sentiment": "positive" | "neutral" | "negative",
+    "confidence": 0.0-1.0,
+    "emotions": {"anger": 0.0-1.0, "fear": 0.0-1.0, "joy": 0.0-1.0, "sadness": 0.0-1.0, "surprise": 0.0-1.0},
+    "notes": "max 1-2 frasi (opzionale)"
+  },
+  "events": [{"date":"YYYY-MM-DD", "text":"<fatto datato, 1 frase>", "sources":[n, ...]}]
+}
+
+Regole:
+- entities: stessi vincoli del NER (tipi SOLO fra quelli elencati, uppercase; niente duplicati
+  case-insensitive; freq intero >= 1; se incerto sul tipo ometti l'item).
+- sentiment: orientamento del contenuto (non dell'autore); emozioni indipendenti fra 0.0 e 1.0;
+  cronaca senza carica valoriale → likely "neutral".
+- events: solo fatti con data esplicita nel testo (max 12); "sources" solo ID [n] presenti
+  nell'input, non inventare; se nessun evento, array vuoto.
+- Nessun testo fuori dal JSON; niente commenti.
+"""
+
+# Layout "shared_prefix": system generico + blocco FONTI identico in tutti gli stadi,
+# le istruzioni specifiche dello stadio arrivano in coda (riuso della prefix cache).
+SHARED_SYSTEM_PROMPT = """Sei un analista OSINT.
+Il messaggio utente contiene prima il blocco FONTI (estratti numerati [n]) e poi,
+dopo la riga ISTRUZIONI, il compito specifico da svolgere su quelle fonti.
+Segui SOLO le istruzioni finali e rispetta esattamente il formato di output richiesto.
+"""
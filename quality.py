@@ -1,5 +1,4 @@
 # quality.py
-import tldextract
 
 LOW_QUALITY_KEYWORDS = ["opinion", "blog", "press-release-index", "archive"]
 LOW_QUALITY_DOMAINS = {
@@ -15,6 +14,7 @@ PREFER_DETAIL_PATTERNS = {
 }
 
 def domain(url: str) -> str:
+    import tldextract  # lazy import
     e = tldextract.extract(url or "")
     return e.registered_domain or ""
 
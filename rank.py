@@ -1,8 +1,8 @@
 # rank.py
 import time
-from dateutil import parser as dateparser
 from config import DOMAIN_SCORES, FRESHNESS_HALF_LIFE_DAYS
-from quality import is_low_quality
+from quality import is_low_quality, is_index_page, domain as domain_of
+from dedup import _tokens
 
 def source_quality_bonus(url: str, is_live: bool = False) -> float:
     """Bonus/malus semplice basato su qualità e 'detail-ness' dell'URL + penalità LIVE."""
@@ -30,6 +30,7 @@ def score_item(item, now_ts):
 
 def _epoch(dtiso):
     try:
+        from dateutil import parser as dateparser  # lazy import
         return dateparser.parse(dtiso, fuzzy=True).timestamp()
     except Exception:
         return 0.0  # ordina in fondo, non None
@@ -82,3 +83,25 @@ def score_item(item, now_ts):
     score = max(0.0, min(1.0, score))
 
     return round(score, 4)
+
+# ---------------------------
+# Priorità pre-fetch dei seed (solo metadati SearXNG, nessun download)
+# ---------------------------
+def query_relevance(query: str, title: str, snippet: str) -> float:
+    """Quota dei token della query presenti in titolo+snippet (0..1)."""
+    q = set(_tokens(query or ""))
+    if not q:
+        return 0.5
+    t = set(_tokens(f"{title or ''} {snippet or ''}"))
+    return len(q & t) / len(q)
+
+def seed_priority(seed, query: str, now_ts: float) -> float:
+    """Stima a priori del valore di un seed: stessi ingredienti di score_item
+    (freshness, autorità, bonus/malus qualità) + rilevanza dello snippet alla query."""
+    url = seed.get("url", "")
+    authority = DOMAIN_SCORES.get(domain_of(url), 0.30)
+    freshness = _freshness(now_ts, seed.get("published"))
+    relevance = query_relevance(query, seed.get("title"), seed.get("snippet"))
+    base = 0.30 * freshness + 0.30 * authority + 0.40 * relevance
+    bonus = source_quality_bonus(url) - (0.20 if is_index_page(url) else 0.0)
+    return round(max(0.0, min(1.0, base + bonus)), 4)
@@ -1,11 +1,12 @@
 # searxng.py
-import requests, time
+import time
 from urllib.parse import urljoin
 from config import (
     SEARXNG_URL, SEARXNG_DEFAULT_CATEGORIES, SEARXNG_ENGINES, SEARXNG_TIME_RANGE,
     SEARXNG_LANGUAGE, SEARXNG_PAGE_SIZE, SEARXNG_PAGES
 )
 from provenance import log_event
+from http_session import session
 from utils_date import to_iso_date
 
 def _endpoint(base: str) -> str:
@@ -36,7 +37,7 @@ def searxng_search(
             "pageno": p,
         }
         log_event("searxng_query", {"params": params})
-        r = requests.get(url, params=params, timeout=30)
+        r = session("searxng").get(url, params=params, timeout=30)
         r.raise_for_status()
         data = r.json() if r.content else {}
         res = (data.get("results") or [])[:page_size]
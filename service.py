@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# service.py
+# Modalità daemon: un processo caldo (librerie, suffix list, parser date e sessioni
+# HTTP caricati una volta) che accetta job di report via API HTTP locale o Unix socket.
+#
+#   python service.py                              # 127.0.0.1:8765 (SERVICE_HOST/SERVICE_PORT)
+#   python service.py --socket /tmp/osint.sock     # Unix socket
+#
+# API (JSON):
+#   POST /jobs            {"query": "...", "topk": 8}  -> 202 {"id", "status": "queued"} | 429 coda piena
+#   GET  /jobs/<id>       -> {"id", "status": queued|running|done|error, ...}; a job concluso
+#                            anche "markdown" e "extra" (oppure "error")
+#   GET  /jobs            -> elenco sintetico dei job
+#   GET  /health          -> worker, coda, job attivi
+#
+#   curl -s --unix-socket /tmp/osint.sock -d '{"query":"Sudan"}' http://x/jobs
+from __future__ import annotations
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from config import (
+    DEFAULT_TOPK, SERVICE_HOST, SERVICE_PORT, SERVICE_SOCKET,
+    SERVICE_WORKERS, SERVICE_MAX_QUEUE, SERVICE_KEEP_JOBS
+)
+from provenance import log_event
+
+
+class JobStore:
+    """Job in memoria + coda limitata; i job conclusi oltre SERVICE_KEEP_JOBS vengono scartati."""
+    def __init__(self, max_queue: int = SERVICE_MAX_QUEUE, keep: int = SERVICE_KEEP_JOBS):
+        self.q: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.keep = keep
+        self.lock = threading.Lock()
+
+    def submit(self, query: str, topk: int) -> Optional[Dict[str, Any]]:
+        """Nuovo job in coda, None se la coda è piena."""
+        job = {"id": uuid.uuid4().hex[:12], "status": "queued", "query": query, "topk": topk,
+               "created": time.time()}
+        with self.lock:
+            self.jobs[job["id"]] = job
+            try:
+                self.q.put_nowait(job["id"])
+            except queue.Full:
+                del self.jobs[job["id"]]
+                return None
+            self._trim()
+        return job
+
+    def _trim(self):
+        done = [jid for jid, j in self.jobs.items() if j["status"] in ("done", "error")]
+        for jid in done[:max(0, len(done) - self.keep)]:
+            del self.jobs[jid]
+
+    def get(self, jid: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(jid)
+            return dict(job) if job else None
+
+    def update(self, jid: str, **fields):
+        with self.lock:
+            if jid in self.jobs:
+                self.jobs[jid].update(fields)
+                self._trim()
+
+    def summary(self):
+        with self.lock:
+            return [{k: j.get(k) for k in ("id", "status", "query", "created", "secs")} for j in self.jobs.values()]
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            out: Dict[str, int] = {}
+            for j in self.jobs.values():
+                out[j["status"]] = out.get(j["status"], 0) + 1
+            return out
+
+
+def warm_up() -> None:
+    """Carica una volta le parti costose: import pesanti, suffix list tldextract, parser date."""
+    t0 = time.time()
+    import pipeline  # noqa: F401  (importa fetch, rank, llm, ...)
+    import trafilatura  # noqa: F401
+    from quality import domain
+    from utils_date import to_iso_date
+    domain("https://www.example.co.uk/")
+    to_iso_date("3 novembre 2025")
+    log_event("service_warm", {"secs": round(time.time() - t0, 2)})
+
+
+def worker(store: JobStore, stop: threading.Event) -> None:
+    from pipeline import run_pipeline
+    while not stop.is_set():
+        try:
+            jid = store.q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        job = store.get(jid)
+        if job is None:
+            continue
+        t0 = time.time()
+        store.update(jid, status="running", started=t0)
+        log_event("service_job_start", {"id": jid, "query": job["query"]})
+        try:
+            md, extra = run_pipeline(job["query"], topk=job["topk"])
+            status = "done"
+            store.update(jid, status=status, markdown=md, extra=extra, secs=round(time.time() - t0, 1))
+        except Exception as e:
+            status = "error"
+            store.update(jid, status=status, error=f"{type(e).__name__}: {e}", secs=round(time.time() - t0, 1))
+        # niente store.get qui: con SERVICE_KEEP_JOBS piccolo update() può aver già scartato il job
+        log_event("service_job_end", {"id": jid, "status": status, "secs": round(time.time() - t0, 1)})
+        store.q.task_done()
+
+
+class Handler(BaseHTTPRequestHandler):
+    store: JobStore = None  # impostato da make_server
+    workers = 0
+
+    def log_message(self, fmt, *args):  # niente stderr per richiesta: basta la provenance dei job
+        pass
+
+    def _send(self, code: int, obj: Any):
+        body = json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/health":
+            return self._send(200, {"workers": self.workers, "queued": self.store.q.qsize(),
+                                    "jobs": self.store.counts()})
+        if path == "/jobs":
+            return self._send(200, self.store.summary())
+        if path.startswith("/jobs/"):
+            job = self.store.get(path[len("/jobs/"):])
+            return self._send(200, job) if job else self._send(404, {"error": "job sconosciuto"})
+        self._send(404, {"error": "endpoint sconosciuto"})
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            return self._send(404, {"error": "endpoint sconosciuto"})
+        try:
+            n = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(n) or b"{}")
+            query = str(data["query"]).strip()
+            topk = int(data.get("topk") or DEFAULT_TOPK)
+        except Exception:
+            return self._send(400, {"error": "atteso JSON {\"query\": str, \"topk\": int}"})
+        if not query:
+            return self._send(400, {"error": "query vuota"})
+        job = self.store.submit(query, topk)
+        if job is None:
+            return self._send(429, {"error": "coda piena", "queued": self.store.q.qsize()})
+        self._send(202, {"id": job["id"], "status": job["status"]})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conn, _ = super().get_request()
+        return conn, ("unix", 0)  # BaseHTTPRequestHandler si aspetta (host, porta)
+
+
+def make_server(store: JobStore, workers: int, socket_path: str = "", host: str = SERVICE_HOST,
+                port: int = SERVICE_PORT):
+    handler = type("BoundHandler", (Handler,), {"store": store, "workers": workers})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    srv = ThreadingHTTPServer((host, port), handler)
+    srv.daemon_threads = True
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser(description="OSINT report service (daemon con API locale)")
+    ap.add_argument("--host", default=SERVICE_HOST)
+    ap.add_argument("--port", type=int, default=SERVICE_PORT)
+    ap.add_argument("--socket", default=SERVICE_SOCKET, help="Unix socket (al posto di host:porta)")
+    ap.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    args = ap.parse_args()
+
+    warm_up()
+    store = JobStore()
+    stop = threading.Event()
+    threads = [threading.Thread(target=worker, args=(store, stop), name=f"job-{i}", daemon=True)
+               for i in range(args.workers)]
+    for t in threads:
+        t.start()
+    srv = make_server(store, args.workers, args.socket, args.host, args.port)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    log_event("service_start", {"listen": where, "workers": args.workers})
+    print(f"OSINT service in ascolto su {where} ({args.workers} worker)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        srv.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+        from http_session import close_all
+        close_all()
+        from pdf_render import close_renderer
+        close_renderer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# sources_feeds.py
+# Collector RSS/Atom per i domini prioritari (ANSA, Reuters, UN News, WHO, ... da config.FEEDS):
+# - GET condizionale (ETag / If-Modified-Since): un feed invariato costa un 304 senza body
+# - parsing in streaming (XMLPullParser alimentato a chunk, tetto FEED_MAX_BYTES)
+# - GUID già visti ricordati in STATE_DIR/feeds/: le entry note non vengono ricostruite,
+#   quelle ancora in finestra restano in cache e servono anche dopo un 304
+# - entry con testo completo (content:encoded / atom:content) -> documento via doc_from_text,
+#   le altre -> seed normale (titolo + sommario) che passa dal fetch HTML
+from __future__ import annotations
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+from provenance import log_event
+from http_session import session
+from utils_date import to_iso_date
+from config import FEED_MAX_BYTES, FEED_MAX_ITEMS, FEED_KEEP, FEED_MIN_TEXT, HTTP_TIMEOUT, USER_AGENT, STATE_DIR
+
+HEADERS = {"User-Agent": USER_AGENT,
+           "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.5"}
+STATE_PATH = os.path.join(STATE_DIR, "feeds")
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+_TAG_RX = re.compile(r"<[^>]+>")
+_WS_RX = re.compile(r"\s+")
+_TERM_RX = re.compile(r"[^\W_]{3,}", re.UNICODE)
+
+
+def _local(tag: str) -> str:
+    """'{http://www.w3.org/2005/Atom}entry' -> 'entry'; i prefissi noti restano distinti."""
+    if tag.startswith("{"):
+        ns, name = tag[1:].split("}", 1)
+        if ns.endswith("/content/"):
+            return "content:" + name
+        if ns.endswith("/dc/elements/1.1/"):
+            return "dc:" + name
+        return name
+    return tag
+
+
+def _plain(markup: Optional[str]) -> str:
+    return _WS_RX.sub(" ", html.unescape(_TAG_RX.sub(" ", markup or ""))).strip()
+
+
+def _entry(el: ET.Element) -> Dict[str, Any]:
+    """Campi di un <item> RSS o <entry> Atom."""
+    f: Dict[str, Any] = {}
+    for ch in el:
+        name = _local(ch.tag)
+        if name == "link":
+            # Atom: <link rel="alternate" href=...>; RSS: testo
+            href = ch.get("href")
+            if href and ch.get("rel", "alternate") == "alternate":
+                f.setdefault("link", href)
+            elif ch.text and ch.text.strip():
+                f.setdefault("link", ch.text.strip())
+        elif name in ("guid", "id"):
+            f["guid"] = (ch.text or "").strip()
+        elif name == "title":
+            f["title"] = _plain(ch.text)
+        elif name in ("description", "summary"):
+            f["summary"] = ch.text or ""
+        elif name in ("content:encoded", "content"):
+            f["content"] = ch.text or ""
+        elif name in ("pubDate", "published", "updated", "dc:date"):
+            f.setdefault("date", (ch.text or "").strip())
+    f["guid"] = f.get("guid") or f.get("link") or ""
+    return f
+
+
+def _parse(chunks, max_items: int) -> List[Dict[str, Any]]:
+    """Entry nell'ordine del feed; smette di leggere dopo max_items o FEED_MAX_BYTES."""
+    parser = ET.XMLPullParser(events=("end",))
+    out: List[Dict[str, Any]] = []
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            if _local(el.tag) in ("item", "entry"):
+                out.append(_entry(el))
+                el.clear()  # la memoria resta proporzionale a una entry, non al feed
+                if len(out) >= max_items:
+                    return out
+        if read >= FEED_MAX_BYTES:
+            log_event("feed_truncated", {"bytes": read})
+            break
+    return out
+
+
+def _to_item(e: Dict[str, Any], feed: str) -> Optional[Dict[str, Any]]:
+    from fetch import doc_from_text, OffLanguage
+    url = e.get("link")
+    if not url:
+        return None
+    published = to_iso_date(e.get("date")) if e.get("date") else None
+    text = _plain(e.get("content"))
+    summary = _plain(e.get("summary"))
+    if len(text) >= FEED_MIN_TEXT or len(summary) >= FEED_MIN_TEXT:
+        try:
+            return doc_from_text(url, e.get("title"), text if len(text) >= len(summary) else summary,
+                                 published=published, engine="feed", source=feed, guid=e["guid"])
+        except OffLanguage:
+            return None
+    return {"url": url, "title": e.get("title"), "snippet": summary[:500], "published": published,
+            "engine": "feed", "source": feed, "guid": e["guid"]}
+
+
+# ---------------------------
+# Stato per feed: validatori HTTP + entry viste
+# ---------------------------
+def _state_path(url: str) -> str:
+    return os.path.join(STATE_PATH, hashlib.md5(url.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def _load(url: str) -> Dict[str, Any]:
+    try:
+        with open(_state_path(url), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"etag": None, "last_modified": None, "items": {}}
+
+
+def _save(url: str, state: Dict[str, Any]) -> None:
+    os.makedirs(STATE_PATH, exist_ok=True)
+    path = _state_path(url)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def _lock(url: str) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(url, threading.Lock())
+
+
+def poll_feed(name: str, url: str) -> List[Dict[str, Any]]:
+    """
+    Entry del feed (seed o documenti), nuove + già viste in cache. GET condizionale:
+    con 304 nessun parsing, si usa solo la cache.
+    """
+    with _lock(url):
+        state = _load(url)
+        headers = dict(HEADERS)
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        items: Dict[str, Dict[str, Any]] = state.get("items") or {}
+        # entry scartate (senza link, fuori lingua), in ordine di arrivo: si dimenticano le più vecchie
+        skipped: Dict[str, None] = dict.fromkeys(state.get("skipped") or [])
+        new = 0
+        with session("feeds").get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True) as r:
+            if r.status_code != 304:
+                r.raise_for_status()
+                for e in _parse(r.iter_content(chunk_size=16384), FEED_MAX_ITEMS):
+                    if not e["guid"] or e["guid"] in items or e["guid"] in skipped:
+                        continue  # già vista: niente conversione né language id
+                    it = _to_item(e, name)
+                    if it:
+                        items[e["guid"]] = it
+                        new += 1
+                    else:
+                        skipped[e["guid"]] = None
+                state["etag"] = r.headers.get("ETag") or state.get("etag")
+                state["last_modified"] = r.headers.get("Last-Modified") or state.get("last_modified")
+            status = r.status_code
+        # tiene solo le FEED_KEEP entry più recenti
+        keep = sorted(items.items(), key=lambda kv: kv[1].get("published") or "", reverse=True)[:FEED_KEEP]
+        state["items"] = dict(keep)
+        state["skipped"] = list(skipped)[-FEED_KEEP:]
+        _save(url, state)
+    log_event("feed_poll", {"feed": name, "url": url, "status": status, "new": new, "cached": len(keep) - new})
+    return [it for _, it in keep]
+
+
+def _terms(query: str) -> List[str]:
+    return _TERM_RX.findall((query or "").lower())
+
+
+def feed_items(name: str, url: str, query: str, from_iso: Optional[str]) -> List[Dict[str, Any]]:
+    """Entry del feed in finestra che contengono tutti i termini (>= 3 lettere) della query."""
+    terms = _terms(query)
+    out = []
+    for it in poll_feed(name, url):
+        if from_iso and it.get("published") and it["published"] < from_iso:
+            continue
+        hay = f"{it.get('title') or ''} {it.get('snippet') or ''} {it.get('text') or ''}".lower()
+        if all(t in hay for t in terms):
+            out.append(it)
+    return out
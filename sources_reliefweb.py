@@ -1,43 +1,163 @@
 # sources_reliefweb.py
-import requests
-from datetime import datetime, timedelta
+# Collector ReliefWeb (API v1 /reports), in parallelo a SearXNG:
+# - paginazione concorrente (prima pagina -> totalCount -> offset restanti in parallelo)
+# - cursore `date.created` persistito per query: le run successive scaricano solo i report nuovi,
+#   i precedenti restano in una cache locale (STATE_DIR/reliefweb/); con il cursore si salva
+#   l'inizio dell'intervallo coperto, così una finestra più ampia scarica solo il pezzo mancante.
+#   Se il tetto di pagine tronca un intervallo, la copertura parte dal report più vecchio scaricato
+#   e il resto arriva come backfill nelle run successive; la cache tiene solo la finestra corrente
+# - il `body` dei report è già testo: diventa direttamente il documento (niente fetch HTML)
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from provenance import log_event
-from config import RELIEFWEB_API, RELIEFWEB_LIMIT, RELIEFWEB_QUERY, HTTP_TIMEOUT, USER_AGENT
+from http_session import session
+from config import (
+    RELIEFWEB_API, RELIEFWEB_APPNAME, RELIEFWEB_LIMIT, RELIEFWEB_MAX_PAGES, RELIEFWEB_MIN_TEXT,
+    HTTP_TIMEOUT, USER_AGENT, STATE_DIR
+)
 
 HEADERS = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+FIELDS = ["title", "url", "url_alias", "date", "source", "country", "disaster", "body", "language"]
+CACHE_DIR = os.path.join(STATE_DIR, "reliefweb")
 
-def fetch_reliefweb_reports(query=RELIEFWEB_QUERY, days=30, limit=RELIEFWEB_LIMIT):
+
+def _payload(query: str, since: str, offset: int, limit: int, until: Optional[str] = None) -> Dict[str, Any]:
     # ReliefWeb API docs: https://apidoc.reliefweb.int/
-    since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%dT00:00:00Z")
-    payload = {
-        "appname": "osint-multiagent",
-        "query": {
-            "value": query,
-            "operator": "AND"
-        },
-        "filter": {
-            "conditions": [
-                {"field": "date.created", "value": since, "operator": ">="}
-            ]
-        },
-        "fields": {"include": ["title", "url", "date", "source", "country", "disaster", "body"]},
+    created = {"from": since, "to": until} if until else {"from": since}
+    return {
+        "query": {"value": query, "operator": "AND"},
+        "filter": {"conditions": [{"field": "date.created", "value": created}]},
+        "fields": {"include": FIELDS},
         "limit": limit,
-        "sort": ["-date.created"]
+        "offset": offset,
+        "sort": ["date.created:desc"],
     }
-    r = requests.post(RELIEFWEB_API, json=payload, headers=HEADERS, timeout=HTTP_TIMEOUT)
+
+
+def _page(query: str, since: str, offset: int, limit: int, until: Optional[str] = None) -> Dict[str, Any]:
+    r = session("reliefweb").post(RELIEFWEB_API, params={"appname": RELIEFWEB_APPNAME},
+                                  json=_payload(query, since, offset, limit, until), headers=HEADERS,
+                                  timeout=HTTP_TIMEOUT)
     r.raise_for_status()
-    data = r.json()
-    out = []
-    for i in data.get("data", []):
-        f = i.get("fields", {})
-        out.append({
-            "url": f.get("url"),
-            "title": f.get("title"),
-            "snippet": None,
-            "published": (f.get("date") or {}).get("created"),
-            "engine": "reliefweb",
-            "source": ",".join([s.get("name","") for s in f.get("source", []) if s.get("name")]),
-            "text_hint": (f.get("body") or "")[:2000] if isinstance(f.get("body"), str) else None,
-        })
-    log_event("reliefweb_results", {"count": len(out)})
-    return out
+    return r.json()
+
+
+def _reports(query: str, since: str, until: Optional[str] = None, limit: int = RELIEFWEB_LIMIT,
+             max_pages: int = RELIEFWEB_MAX_PAGES) -> Tuple[List[Dict[str, Any]], bool]:
+    """(campi grezzi dei report, completo): completo = False se max_pages ha troncato il risultato,
+    nel qual caso mancano i report più vecchi (ordinamento date.created:desc)."""
+    first = _page(query, since, 0, limit, until)
+    items = list(first.get("data") or [])
+    total = int(first.get("totalCount") or len(items))
+    offsets = list(range(limit, min(total, limit * max_pages), limit))
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(4, len(offsets)), thread_name_prefix="reliefweb") as ex:
+            for data in ex.map(lambda off: _page(query, since, off, limit, until), offsets):
+                items += data.get("data") or []
+    complete = len(items) >= total
+    log_event("reliefweb_results", {"query": query, "since": since, "until": until, "total": total,
+                                    "count": len(items), "pages": 1 + len(offsets), "complete": complete})
+    return [i.get("fields") or {} for i in items], complete
+
+
+def fetch_reliefweb_reports(query: str, since: str, limit: int = RELIEFWEB_LIMIT,
+                            max_pages: int = RELIEFWEB_MAX_PAGES, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Report (campi grezzi) con date.created >= `since` (e <= `until`, ISO), fino a max_pages pagine.
+    La prima pagina dà il totale, le altre vengono scaricate in parallelo."""
+    return _reports(query, since, until, limit, max_pages)[0]
+
+
+def _to_doc(f: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    from fetch import doc_from_text, OffLanguage
+    body = f.get("body") if isinstance(f.get("body"), str) else ""
+    url = f.get("url_alias") or f.get("url")
+    if not url or len(body) < RELIEFWEB_MIN_TEXT:
+        return None
+    created = (f.get("date") or {}).get("created")
+    try:
+        return doc_from_text(
+            url, f.get("title"), body, published=(created or "")[:10] or None,
+            engine="reliefweb",
+            source=",".join(s.get("name", "") for s in f.get("source") or [] if s.get("name")),
+            created=created,
+        )
+    except OffLanguage:
+        return None
+
+
+# ---------------------------
+# Cursore + cache per query
+# ---------------------------
+def _cache_path(query: str) -> str:
+    key = hashlib.md5(query.strip().lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _load_cache(query: str) -> Dict[str, Any]:
+    try:
+        with open(_cache_path(query), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"cursor": None, "earliest": None, "docs": []}
+
+
+def _save_cache(query: str, state: Dict[str, Any]) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(query)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def _ts(iso: str) -> str:
+    return iso if "T" in iso else f"{iso}T00:00:00+00:00"
+
+
+def reliefweb_docs(query: str, from_iso: str) -> List[Dict[str, Any]]:
+    """
+    Documenti ReliefWeb per la query nella finestra [from_iso, oggi].
+    La cache copre [earliest, cursor]: si scaricano solo i report creati dopo il cursore e,
+    se la finestra inizia prima di `earliest`, il tratto [from_iso, earliest). Alla prima run
+    (o se from_iso è oltre il cursore) si scarica tutta la finestra. Un intervallo troncato dal
+    tetto di pagine sposta `earliest` al report più vecchio ricevuto: il resto è backfill futuro.
+    """
+    state = _load_cache(query)
+    cursor, earliest = state.get("cursor"), state.get("earliest")
+    if cursor and earliest and from_iso <= cursor:
+        ranges = [(cursor, None)]
+        if from_iso < earliest:
+            ranges.append((from_iso, earliest))   # backfill della parte più vecchia
+    else:
+        ranges = [(from_iso, None)]
+        cursor = earliest = None
+
+    by_url = {d["url"]: d for d in state.get("docs") or []}
+    new, truncated = 0, None
+    for since, until in ranges:
+        fields, complete = _reports(query, _ts(since), until and _ts(until))
+        created = [c for c in ((f.get("date") or {}).get("created") for f in fields) if c]
+        for f in fields:
+            d = _to_doc(f)
+            if d and d["url"] not in by_url:
+                new += 1
+            if d:
+                by_url[d["url"]] = d
+        if until is None and created:
+            cursor = max(created + ([cursor] if cursor else []))
+        if not complete:
+            # mancano i report più vecchi di questo intervallo: la copertura parte dal più vecchio
+            # ricevuto, la run successiva recupera [from_iso, earliest) come backfill
+            earliest, truncated = min(created) if created else None, since
+            break
+        earliest = min(earliest, since) if earliest else since
+    # la cache tiene solo la finestra corrente (la copertura non va oltre i documenti tenuti)
+    docs = [d for d in by_url.values() if (d.get("published") or "") >= from_iso]
+    if earliest:
+        earliest = max(earliest, from_iso)
+    _save_cache(query, {"cursor": cursor, "earliest": earliest, "docs": docs})
+    log_event("reliefweb_docs", {"query": query, "ranges": ranges, "new": new, "cached": len(docs) - new,
+                                 "docs": len(docs), "truncated": truncated})
+    return docs
@@ -0,0 +1,175 @@
+# streaming.py
+# Raccolta in streaming: ricerca, fetch/estrazione, dedup e ranking si sovrappongono.
+# - i collector (collectors.py: SearXNG, ReliefWeb, ...) girano in parallelo; i risultati di ogni
+#   task entrano subito nel filtro seed (lingua in batch), i seed con testo vanno diretti a dedup/rank
+# - i worker di fetch prendono sempre il seed a priorità più alta disponibile
+# - ogni documento estratto passa da freshness + dedup incrementale + score
+# - il top-k è mantenuto online con un heap; quando resta stabile per STREAM_STABLE_AFTER
+#   documenti consecutivi la raccolta si chiude e gli stadi LLM possono partire
+from __future__ import annotations
+import heapq
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional
+
+from config import (
+    STREAM_SEARCH_WORKERS, STREAM_FETCH_WORKERS, STREAM_STABLE_AFTER,
+    CRAWL_MAX_FETCH, CRAWL_TARGET_DOCS, CRAWL_MIN_PRIORITY, CRAWL_MIN_TEXT
+)
+from collectors import Scheduler
+from fetch import fetch_and_extract
+from dedup import IncrementalDeduper
+from corpus import Doc, to_dicts
+from rank import score_item
+from provenance import log_event
+
+
+class OnlineTopK:
+    """
+    Top-k per score: min-heap dei k migliori + max-heap di riserva con gli esclusi, entrambi
+    con invalidazione lazy. Se un documento del top-k viene rimosso (rimpiazzato dal dedup)
+    il migliore della riserva rientra: il set resta esatto, non un'approssimazione.
+    """
+    def __init__(self, k: int):
+        self.k = k
+        self.scores = {}      # id vivo -> score
+        self.top = []         # min-heap (score, id) del top-k
+        self.in_top = set()
+        self.reserve = []     # max-heap (-score, id) dei vivi fuori dal top-k
+
+    def add(self, did: int, score: float):
+        self.scores[did] = score
+        heapq.heappush(self.top, (score, did))
+        self.in_top.add(did)
+        if len(self.in_top) > self.k:
+            out = self._pop_top()
+            heapq.heappush(self.reserve, (-self.scores[out], out))
+
+    def remove(self, did: int):
+        if self.scores.pop(did, None) is None:
+            return
+        if did in self.in_top:
+            self.in_top.discard(did)    # la voce nello heap scade da sola
+            self._promote()
+        # fuori dal top-k: la voce in riserva viene scartata quando arriva in testa
+
+    def _pop_top(self) -> int:
+        while True:
+            _, did = heapq.heappop(self.top)
+            if did in self.in_top:
+                self.in_top.discard(did)
+                return did
+
+    def _promote(self):
+        while self.reserve:
+            _, did = heapq.heappop(self.reserve)
+            if did in self.scores and did not in self.in_top:
+                heapq.heappush(self.top, (self.scores[did], did))
+                self.in_top.add(did)
+                return
+
+    def ids(self) -> frozenset:
+        return frozenset(self.in_top)
+
+
+def stream_collect(plan: Dict[str, Any], query: str, from_iso: Optional[str], topk: int,
+                   max_fetch: int = CRAWL_MAX_FETCH, target: int = CRAWL_TARGET_DOCS) -> List[Dict[str, Any]]:
+    """Equivalente streaming di search -> filter_seeds -> crawl -> freshness -> dedup_rank.
+    Ritorna i documenti tenuti, ordinati per score decrescente."""
+    from pipeline import SeedFilter, _next_seed, _pending_seed, _safe_epoch  # lazy: pipeline importa questo modulo
+
+    t0 = now_ts = time.time()
+    seed_filter = SeedFilter(from_iso)
+    deduper = IncrementalDeduper(newer=_safe_epoch)
+    top = OnlineTopK(topk)
+    pending: List[Dict[str, Any]] = []
+    taken_by_domain: Dict[str, int] = defaultdict(int)
+    stats = {"fetched": 0, "good": 0, "fetch_err": 0, "stale": 0, "dup": 0}
+    stable, last_top = 0, frozenset()
+
+    sched = Scheduler(workers=STREAM_SEARCH_WORKERS).start(plan, query, from_iso)
+    fetch_pool = ThreadPoolExecutor(max_workers=STREAM_FETCH_WORKERS, thread_name_prefix="fetch")
+    fetches: Dict[Any, Dict[str, Any]] = {}
+    waiting = set()   # URL dei seed senza testo passati dal filtro e non ancora mandati al fetch
+
+    def _admit(d: Dict[str, Any]) -> None:
+        nonlocal stable, last_top
+        dt = (d.get("detected_date") or d.get("published") or "")[:10]
+        if dt and from_iso and dt < from_iso:
+            stats["stale"] += 1
+            return
+        did, replaced = deduper.add(d)
+        if did is None:
+            stats["dup"] += 1
+            return
+        if replaced is not None:
+            top.remove(replaced)
+        d["score"] = score_item(d, now_ts)
+        top.add(did, d["score"])
+        cur = top.ids()
+        stable = stable + 1 if cur == last_top else 0
+        last_top = cur
+
+    def _done() -> bool:
+        if stats["good"] >= target or stats["fetched"] >= max_fetch:
+            return True
+        # top-k stabile: abbastanza documenti e nessun cambio per STREAM_STABLE_AFTER arrivi
+        return len(last_top) >= topk and stable >= STREAM_STABLE_AFTER
+
+    try:
+        while sched.futures or fetches or pending:
+            # riempi i worker di fetch con i seed migliori disponibili
+            while pending and len(fetches) < STREAM_FETCH_WORKERS and stats["fetched"] + len(fetches) < max_fetch:
+                s = _next_seed(pending, taken_by_domain)
+                waiting.discard(s["url"])
+                fetches[fetch_pool.submit(fetch_and_extract, s["url"])] = s
+                taken_by_domain[s["_domain"]] += 1
+            if not sched.futures and not fetches:
+                break
+            done, _ = wait(list(sched.futures) + list(fetches), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in sched.futures:
+                    for s in seed_filter.accept_many(sched.accept(fut)):
+                        if s.get("text"):
+                            _admit(Doc.from_dict(s))  # documento già completo (API, feed full-text)
+                            continue
+                        waiting.add(s["url"])
+                        s = _pending_seed(s, query, now_ts)
+                        if s:
+                            pending.append(s)
+                    # seed già filtrato e poi arricchito dal testo di un'altra sorgente: se non è
+                    # ancora partito il fetch diventa subito documento (anche con circuito host aperto)
+                    for up in sched.pop_upgrades():
+                        if up["url"] in waiting:
+                            waiting.discard(up["url"])
+                            pending[:] = [p for p in pending if p["url"] != up["url"]]
+                            _admit(Doc.from_dict(up))
+                    continue
+                if fut not in fetches:
+                    continue  # task di collector annullato per budget
+
+                s = fetches.pop(fut)
+                prio = s.pop("_prio"); s.pop("_domain")
+                stats["fetched"] += 1
+                try:
+                    ext = fut.result()
+                except Exception as e:
+                    stats["fetch_err"] += 1
+                    log_event("fetch_err", {"url": s.get("url"), "err": str(e)})
+                    continue
+                d = Doc.merge(s, ext, seed_priority=prio)
+                if prio >= CRAWL_MIN_PRIORITY and len(ext.get("text") or "") >= CRAWL_MIN_TEXT:
+                    stats["good"] += 1
+                _admit(d)
+            if _done():
+                break
+    finally:
+        # i fetch già partiti finiscono in background, quelli in coda vengono annullati
+        sched.shutdown()
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    ranked = sorted(deduper.kept.values(), key=lambda d: d["score"], reverse=True)
+    log_event("stream_done", {**stats, **seed_filter.stats, "kept": len(ranked), "stable": stable,
+                              "pending_skipped": len(pending) + len(fetches), "secs": round(time.time() - t0, 2)})
+    return to_dicts(ranked)
@@ -0,0 +1,266 @@
+# structured.py
+# Output JSON robusto per gli stadi LLM:
+# - vincolo lato server (response_format json_schema / json_object) se supportato
+# - estrazione/riparazione tollerante (code fence, testo attorno, virgole finali, literal Python)
+# - retry mirato solo allo stadio fallito, con la risposta sbagliata come contesto
+# - log di token spesi per risultato utile (llm_json_ok / llm_json_fail)
+#
+#   python structured.py logs/provenance_*.jsonl   -> token per risultato utile, per stadio
+from __future__ import annotations
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional
+from llm import chat_with_usage
+from config import LLM_JSON_MODE, LLM_JSON_RETRIES
+from provenance import log_event
+
+# ---------------------------
+# Schemi per stadio (coerenti con prompts.py)
+# ---------------------------
+_EMOTIONS = {"type": "object", "properties": {k: {"type": "number"} for k in
+             ("anger", "fear", "joy", "sadness", "surprise")}}
+_SENTIMENT = {
+    "type": "object",
+    "properties": {
+        "overall_sentiment": {"type": "string", "enum": ["positive", "neutral", "negative"]},
+        "confidence": {"type": "number"},
+        "emotions": _EMOTIONS,
+        "notes": {"type": "string"},
+    },
+    "required": ["overall_sentiment", "confidence", "emotions"],
+}
+_ENTITIES = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "entity": {"type": "string"},
+            "type": {"type": "string", "enum": ["PERSON", "ORG", "LOC", "DATE", "INDICATOR"]},
+            "freq": {"type": "integer"},
+        },
+        "required": ["entity", "type"],
+    },
+}
+_ID_LIST = {"type": "array", "items": {"type": "integer"}}
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "planner": {
+        "type": "object",
+        "properties": {
+            "subgoals": {"type": "array", "items": {"type": "string"}},
+            "queries": {"type": "array", "items": {"type": "string"}},
+            "criteria": {"type": "object", "properties": {
+                "freshness_days": {"type": "integer"},
+                "need_institutional": {"type": "boolean"},
+                "need_diversity": {"type": "boolean"}}},
+        },
+        "required": ["subgoals", "queries", "criteria"],
+    },
+    "ner": _ENTITIES,
+    "sentiment": _SENTIMENT,
+    "summarize": {
+        "type": "object",
+        "properties": {
+            "per_source_summary": {"type": "object", "additionalProperties": {"type": "string"}},
+            "cross_summary": {"type": "string"},
+            "claims": {"type": "array", "items": {"type": "object", "properties": {
+                "text": {"type": "string"}, "sources": _ID_LIST}, "required": ["text", "sources"]}},
+        },
+        "required": ["per_source_summary", "cross_summary", "claims"],
+    },
+    "factcheck": {
+        "type": "array",
+        "items": {"type": "object", "properties": {
+            "claim": {"type": "string"},
+            "support": {"type": "string", "enum": ["supported", "partial", "contested", "unknown"]},
+            "confidence": {"type": "number"},
+            "notes": {"type": "string"},
+            "sources_used": _ID_LIST},
+            "required": ["claim", "support", "confidence"]},
+    },
+    "analysis": {
+        "type": "object",
+        "properties": {
+            "entities": _ENTITIES,
+            "sentiment": _SENTIMENT,
+            "events": {"type": "array", "items": {"type": "object", "properties": {
+                "date": {"type": "string"}, "text": {"type": "string"}, "sources": _ID_LIST},
+                "required": ["date", "text"]}},
+        },
+        "required": ["entities", "sentiment", "events"],
+    },
+}
+
+# capacità del server scoperte a runtime (None = non ancora provato)
+_CAPS: Dict[str, Optional[bool]] = {"json_schema": None, "json_object": None}
+
+REPAIR_MSG = ("La risposta precedente non era JSON valido per lo schema richiesto. "
+              "Rispondi di nuovo con SOLO il JSON corretto, senza testo, commenti o code fence.")
+
+
+# ---------------------------
+# Parsing tollerante
+# ---------------------------
+_FENCE_RX = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.S)
+_TRAILING_COMMA_RX = re.compile(r",\s*([}\]])")
+# stringa JSON (anche non chiusa, output troncato) oppure literal Python fuori dalle stringhe
+_PY_LITERAL_RX = re.compile(r'"(?:\\.|[^"\\])*(?:"|$)|\b(True|False|None)\b')
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# 4xx che indicano response_format non supportato (non contesto troppo lungo, auth, rate limit, ...)
+_RF_UNSUPPORTED_RX = re.compile(r"response_format|json_schema|json_object", re.I)
+
+
+def _balanced_span(s: str) -> Optional[str]:
+    """Primo oggetto/array JSON bilanciato nel testo (rispetta stringhe ed escape)."""
+    start = next((i for i, ch in enumerate(s) if ch in "{["), None)
+    if start is None:
+        return None
+    stack, in_str, esc = [], False, False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack or stack.pop() != ch:
+                return None
+            if not stack:
+                return s[start:i + 1]
+    # troncato (max_tokens): chiude le strutture aperte, meglio di buttare tutto
+    tail = s[start:] + ('"' if in_str else "")
+    return tail + "".join(reversed(stack))
+
+
+def _repair(s: str) -> str:
+    s = s.replace("“", '"').replace("”", '"')
+    s = _TRAILING_COMMA_RX.sub(r"\1", s)
+    return _PY_LITERAL_RX.sub(lambda m: _PY_LITERALS[m.group(1)] if m.group(1) else m.group(0), s)
+
+
+def parse_json_tolerant(text: str) -> Any:
+    """json.loads con recupero: code fence, testo attorno, virgole finali, output troncato.
+    Solleva ValueError se non si ottiene JSON."""
+    s = (text or "").strip().lstrip("﻿")
+    try:
+        return json.loads(s)
+    except Exception:
+        pass
+    m = _FENCE_RX.search(s)
+    if m:
+        s = m.group(1).strip()
+    for cand in (s, _balanced_span(s)):
+        if not cand:
+            continue
+        for attempt in (cand, _repair(cand)):
+            try:
+                return json.loads(attempt)
+            except Exception:
+                continue
+    raise ValueError("nessun JSON valido nella risposta")
+
+
+def _type_ok(obj: Any, schema: Dict[str, Any]) -> bool:
+    want = schema.get("type")
+    return (want == "object" and isinstance(obj, dict)) or (want == "array" and isinstance(obj, list)) or want is None
+
+
+# ---------------------------
+# Chiamata con vincolo + retry mirato
+# ---------------------------
+def _response_format(stage: str, schema: Dict[str, Any], mode: str) -> Optional[dict]:
+    if mode == "off":
+        return None
+    if mode in ("auto", "json_schema") and _CAPS["json_schema"] is not False:
+        return {"type": "json_schema", "json_schema": {"name": stage, "schema": schema, "strict": False}}
+    if mode in ("auto", "json_object") and schema.get("type") == "object" and _CAPS["json_object"] is not False:
+        return {"type": "json_object"}
+    return None
+
+
+def _call(messages, max_tokens: int, stage: str, schema: Dict[str, Any], mode: str):
+    """Una chiamata; in modalità auto, se il server rifiuta response_format (400/422 che lo
+    nomina) lo segna come non supportato e ripete senza. Gli altri errori risalgono."""
+    import requests  # lazy import
+    while True:
+        rf = _response_format(stage, schema, mode)
+        try:
+            return chat_with_usage(messages, max_tokens=max_tokens, response_format=rf)
+        except requests.HTTPError as e:
+            code = getattr(e.response, "status_code", 0)
+            body = getattr(e.response, "text", "") or ""
+            if not rf or mode != "auto" or code not in (400, 422) or not _RF_UNSUPPORTED_RX.search(body):
+                raise
+            _CAPS[rf["type"]] = False
+            log_event("llm_json_caps", {"stage": stage, "unsupported": rf["type"], "status": code})
+
+
+def chat_json(messages, stage: str, max_tokens: int = 1200, schema: Optional[Dict[str, Any]] = None,
+              retries: int = LLM_JSON_RETRIES, mode: str = LLM_JSON_MODE) -> Any:
+    """
+    Chiede JSON conforme a `schema` (default SCHEMAS[stage]) e lo ritorna già parsato.
+    Se il parsing fallisce riprova SOLO questo stadio (max `retries` volte) mostrando
+    all'LLM la risposta errata. Solleva ValueError se tutti i tentativi falliscono:
+    il chiamante applica il proprio fallback.
+    """
+    schema = schema or SCHEMAS.get(stage) or {}
+    msgs = list(messages)
+    spent = {"prompt_tokens": 0, "completion_tokens": 0}
+    last_err = None
+    for attempt in range(retries + 1):
+        out, usage = _call(msgs, max_tokens, stage, schema, mode)
+        for k in spent:
+            spent[k] += int(usage.get(k) or 0)
+        try:
+            obj = parse_json_tolerant(out)
+            if not _type_ok(obj, schema):
+                raise ValueError(f"atteso {schema.get('type')}")
+            rf = _response_format(stage, schema, mode)
+            if rf and rf["type"] in _CAPS:
+                _CAPS[rf["type"]] = True
+            log_event("llm_json_ok", {"stage": stage, "attempts": attempt + 1, **spent})
+            return obj
+        except ValueError as e:
+            last_err = e
+            msgs = list(messages) + [{"role": "assistant", "content": out[:4000]},
+                                     {"role": "user", "content": REPAIR_MSG}]
+    log_event("llm_json_fail", {"stage": stage, "attempts": retries + 1, "err": str(last_err), **spent})
+    raise ValueError(f"[{stage}] JSON non valido dopo {retries + 1} tentativi: {last_err}")
+
+
+# ---------------------------
+# Statistiche dai log di provenance
+# ---------------------------
+def json_yield_stats(paths: List[str]) -> Dict[str, Dict[str, float]]:
+    """Per stadio: risultati utili, fallimenti, token totali e token per risultato utile."""
+    stats: Dict[str, Dict[str, float]] = {}
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue
+                if rec.get("kind") not in ("llm_json_ok", "llm_json_fail"):
+                    continue
+                st = stats.setdefault(rec.get("stage", "?"), {"ok": 0, "fail": 0, "tokens": 0})
+                st["ok" if rec["kind"] == "llm_json_ok" else "fail"] += 1
+                st["tokens"] += int(rec.get("prompt_tokens", 0)) + int(rec.get("completion_tokens", 0))
+    for st in stats.values():
+        st["tokens_per_useful"] = round(st["tokens"] / st["ok"], 1) if st["ok"] else float("inf")
+    return stats
+
+
+if __name__ == "__main__":
+    for stage, st in sorted(json_yield_stats(sys.argv[1:]).items()):
+        print(f"{stage:10s} ok={st['ok']} fail={st['fail']} tokens={st['tokens']} "
+              f"tokens/utile={st['tokens_per_useful']}")
@@ -0,0 +1,12 @@
+# Moduli del repo importabili dai test (layout piatto, niente package); log e stato
+# delle run in una cartella temporanea invece che in logs/ e state/ del repo.
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="osint-tests-")
+os.environ.setdefault("LOG_DIR", os.path.join(_TMP, "logs"))
+os.environ.setdefault("STATE_DIR", os.path.join(_TMP, "state"))
+os.environ.setdefault("ASSETS_DIR", os.path.join(_TMP, "assets"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+import checkpoint
+from checkpoint import Checkpoint, _dec, _enc, prune_runs
+from corpus import Doc
+
+
+def test_enc_dec_roundtrip():
+    obj = {"refs": {1: "https://a.test", 2: "https://b.test"},
+           "pair": ({"a": 1}, [1, 2]),
+           "docs": [Doc.from_dict({"url": "https://a.test", "text": "x", "guid": "g1"})]}
+    back = _dec(json.loads(json.dumps(_enc(obj))))
+    assert back["refs"] == obj["refs"]
+    assert back["pair"] == ({"a": 1}, [1, 2])
+    assert isinstance(back["docs"][0], Doc)
+    assert back["docs"][0].to_dict() == obj["docs"][0].to_dict()
+
+
+def test_stage_is_reloaded_on_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "log_event", lambda *a, **k: None)
+    calls = []
+    ck = Checkpoint(root=str(tmp_path))
+    assert ck.stage("plan", lambda: calls.append(1) or {"q": (1, 2)}) == {"q": (1, 2)}
+    again = Checkpoint.resume(ck.run_id, root=str(tmp_path))
+    assert again.stage("plan", lambda: calls.append(2)) == {"q": (1, 2)}
+    assert calls == [1] and again.stages == ["plan"]
+
+
+def _run(root, name, age_days):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    t = time.time() - age_days * 86400
+    os.utime(path, (t, t))
+
+
+def test_prune_runs_by_count_and_age(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "log_event", lambda *a, **k: None)
+    root = str(tmp_path)
+    for name, age in (("new", 0), ("mid", 1), ("old", 2), ("stale", 30)):
+        _run(root, name, age)
+    assert sorted(prune_runs(root, keep=3, max_age_days=14)) == ["stale"]
+    assert prune_runs(root, keep=2, max_age_days=0) == ["old"]
+    assert prune_runs(root, keep=1, max_age_days=0, exclude=("mid",)) == []
+    assert sorted(os.listdir(root)) == ["mid", "new"]
+
+
+def test_degraded_stage_and_followers_not_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "log_event", lambda *a, **k: None)
+    ck = Checkpoint(root=str(tmp_path))
+    ck.stage("plan", lambda: {"q": 1})
+
+    def fallback():
+        checkpoint.mark_degraded("summarize")
+        return {"claims": []}
+    ck.stage("ranked", lambda: ck.stage("summary", fallback))   # annidato: degrada anche l'esterno
+    assert ck.stage("report", lambda: "# vuoto") == "# vuoto"
+    assert ck.stages == ["plan"] and ck.degraded == "summary"
+
+    again = Checkpoint.resume(ck.run_id, root=str(tmp_path))
+    assert again.stage("summary", lambda: {"claims": [{"text": "ok"}]}) == {"claims": [{"text": "ok"}]}
+    assert again.stages == ["plan", "summary"]
+
+
+def test_stray_mark_outside_stage_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "log_event", lambda *a, **k: None)
+    checkpoint.mark_degraded("ner")   # chiamata diretta, fuori da una run con checkpoint
+    ck = Checkpoint(root=str(tmp_path))
+    ck.stage("plan", lambda: {"q": 1})
+    assert ck.stages == ["plan"]
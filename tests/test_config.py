@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _flag(name, value):
+    env = {k: v for k, v in os.environ.items() if k != name}
+    if value is not None:
+        env[name] = value
+    out = subprocess.run([sys.executable, "-c", f"import config; print(config.{name})"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return out.stdout.strip() == "True"
+
+
+def test_use_feeds_off_by_default():
+    assert _flag("USE_FEEDS", None) is False
+
+
+def test_use_feeds_accepts_usual_truthy_values():
+    for v in ("1", "true", "TRUE", "yes"):
+        assert _flag("USE_FEEDS", v) is True
+    assert _flag("USE_FEEDS", "0") is False
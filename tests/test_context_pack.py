@@ -0,0 +1,18 @@
+from context_pack import count_tokens, pack_docs, truncate_tokens
+
+TEXT = "parola " * 2000
+
+
+def test_truncate_tokens_within_budget():
+    cut, n = truncate_tokens(TEXT, 50)
+    assert n <= 50 and count_tokens(cut) == n and TEXT.startswith(cut)
+    assert truncate_tokens("breve testo", 50) == ("breve testo", count_tokens("breve testo"))
+    assert truncate_tokens(TEXT, 0) == ("", 0)
+
+
+def test_pack_docs_respects_budget_and_rank():
+    docs = [{"title": f"doc {i}", "text": TEXT, "hash": f"h{i}", "score": i} for i in range(5)]
+    packed = pack_docs(docs, budget=600, per_doc=200)
+    assert sum(p["tokens"] for p in packed) <= 600
+    assert [p["doc"]["score"] for p in packed] == sorted((p["doc"]["score"] for p in packed), reverse=True)
+    assert packed[0]["doc"]["score"] == 4
@@ -0,0 +1,39 @@
+import sys
+
+import pytest
+
+from corpus import Doc, to_dicts, to_docs
+
+FETCHED = {"url": "https://a.test/x", "title": "T", "text": "abc", "lang": "it", "domain": "a.test",
+           "hash": "h", "detected_date": None, "mime": "text/html", "html_lang": "it"}
+
+
+def test_to_dict_keeps_original_shape():
+    d = Doc.from_dict(FETCHED)
+    assert d.to_dict() == FETCHED              # anche detected_date=None resta
+    assert "detected_date" in d and "published" not in d
+
+
+def test_dict_like_access():
+    d = Doc.from_dict(FETCHED, guid="g1")
+    assert d["url"] == "https://a.test/x" and d.get("guid") == "g1"
+    assert d.get("published", "-") == "-"
+    with pytest.raises(KeyError):
+        d["published"]
+    d["score"] = 0.5
+    assert d.pop("score") == 0.5 and "score" not in d
+    assert d.pop("guid") == "g1" and d.pop("guid", None) is None
+    assert set(d.keys()) == set(FETCHED)
+
+
+def test_merge_and_interning():
+    seed = {"url": "https://a.test/x", "published": "2025-10-01", "engine": "searxng"}
+    d = Doc.merge(seed, FETCHED, seed_priority=0.7)
+    assert d["published"] == "2025-10-01" and d["seed_priority"] == 0.7
+    assert d["domain"] is sys.intern("a.test")
+
+
+def test_to_docs_to_dicts_roundtrip():
+    docs = to_docs([FETCHED, Doc.from_dict({"url": "u"})])
+    assert all(isinstance(d, Doc) for d in docs)
+    assert to_dicts(docs) == [FETCHED, {"url": "u"}]
@@ -0,0 +1,26 @@
+from dedup import IncrementalDeduper, SeedDupIndex, canonical_url
+
+BASE = "Il convoglio umanitario è arrivato a Khartoum con cibo, acqua e medicinali per gli sfollati. " * 5
+
+
+def test_canonical_url_drops_tracking_and_fragment():
+    assert canonical_url("https://a.test/x?id=1&utm_source=tw&fbclid=z#top") == "https://a.test/x?id=1"
+
+
+def test_incremental_deduper_keeps_longest_text():
+    dd = IncrementalDeduper()
+    a, _ = dd.add({"url": "https://a.test/1", "text": BASE})
+    # stessi token (simhash identico a ogni seed di hash), testo più lungo
+    b, replaced = dd.add({"url": "https://b.test/1", "text": BASE + " -- (...)"})
+    assert replaced == a and list(dd.kept) == [b]
+    assert dd.add({"url": "https://c.test/1", "text": BASE}) == (None, None)
+    other, _ = dd.add({"url": "https://d.test/1", "text": "Notizia del tutto diversa sui prezzi del grano in Egitto. " * 5})
+    assert other is not None and len(dd.kept) == 2
+
+
+def test_seed_dup_index():
+    idx = SeedDupIndex()
+    s = {"title": "Sudan, convoglio umanitario arriva a Khartoum", "snippet": "Cibo e medicinali per gli sfollati"}
+    assert idx.add(s) is True
+    assert idx.add(dict(s)) is False
+    assert idx.add({"title": "Egitto, prezzi del grano in aumento", "snippet": "Il governo annuncia sussidi"}) is True
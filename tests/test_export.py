@@ -0,0 +1,27 @@
+import gzip
+import json
+
+from export import save_markdown, write_json_stream, write_jsonl
+
+
+def test_json_stream_matches_json_dumps(tmp_path):
+    path = str(tmp_path / "out.json")
+    docs = ({"id": i, "t": f"è {i}"} for i in range(3))
+    write_json_stream(path, [("meta", {"q": "sudan"}), ("docs", docs), ("empty", []), ("pair", (1, 2))])
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"meta": {"q": "sudan"}, "docs": [{"id": i, "t": f"è {i}"} for i in range(3)],
+                                "empty": [], "pair": [1, 2]}
+
+
+def test_jsonl_gzip_by_extension(tmp_path):
+    path = str(tmp_path / "docs.jsonl.gz")
+    assert write_jsonl(path, ({"n": i} for i in range(4))) == 4
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["n"] for line in f] == [0, 1, 2, 3]
+
+
+def test_save_markdown_from_sections(tmp_path):
+    path = str(tmp_path / "r.md")
+    save_markdown(iter(["# Titolo", "", "testo"]), path, sep="\n")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "# Titolo\n\ntesto"
@@ -0,0 +1,87 @@
+import pytest
+import requests
+
+import fetch
+
+
+class _Health:
+    def __init__(self):
+        self.records = []
+
+    def allow(self, url):
+        return True
+
+    def timeouts(self, url):
+        return (1, 1)
+
+    def record(self, url, ok, latency=0.0, err=""):
+        self.records.append((ok, err))
+
+
+class _Resp:
+    def __init__(self, status=200, ctype="text/html", chunks=(b"<html>ok</html>",), fail_read=False):
+        self.status_code = status
+        self.headers = {"Content-Type": ctype}
+        self.chunks, self.fail_read = chunks, fail_read
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, size):
+        yield from self.chunks
+        if self.fail_read:
+            raise requests.ConnectionError("connection reset")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def hh(monkeypatch):
+    h = _Health()
+    monkeypatch.setattr(fetch, "health", lambda: h)
+    return h
+
+
+def _serve(monkeypatch, resp):
+    class _Session:
+        def get(self, url, **kw):
+            return resp
+    monkeypatch.setattr(fetch, "session", lambda name: _Session())
+
+
+def test_success_recorded_once(hh, monkeypatch):
+    _serve(monkeypatch, _Resp())
+    _, kind, body = fetch._fetch_body("https://a.test/x")
+    assert kind == "html" and body == b"<html>ok</html>"
+    assert hh.records == [(True, "")]
+
+
+def test_read_failure_recorded_once_as_failure(hh, monkeypatch):
+    _serve(monkeypatch, _Resp(fail_read=True))
+    with pytest.raises(requests.ConnectionError):
+        fetch._fetch_body("https://a.test/x")
+    assert hh.records == [(False, "connection reset")]
+
+
+def test_bad_status_recorded_once(hh, monkeypatch):
+    _serve(monkeypatch, _Resp(status=503))
+    with pytest.raises(requests.HTTPError):
+        fetch._fetch_body("https://a.test/x")
+    assert hh.records == [(False, "HTTP 503")]
+
+
+def test_plain_text_skips_html_extraction(hh, monkeypatch):
+    body = "Aggiornamento sulla situazione umanitaria in Sudan.\nNessun markup qui.".encode("utf-8")
+    _serve(monkeypatch, _Resp(ctype="text/plain; charset=utf-8", chunks=(body,)))
+    monkeypatch.setattr(fetch, "log_event", lambda *a, **k: None)
+    monkeypatch.setattr(fetch, "lang_allowed", lambda lang: True)
+
+    def no_html(*a):
+        raise AssertionError("estrazione HTML su text/plain")
+    monkeypatch.setattr(fetch, "_clean_html_trafilatura", no_html)
+    monkeypatch.setattr(fetch, "_clean_html_readability", no_html)
+    out = fetch.fetch_and_extract("https://a.test/live/notes.txt")
+    assert out["text"] == body.decode("utf-8") and out["mime"] == "text/plain"
+    assert out["is_live"] is True
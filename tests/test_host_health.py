@@ -0,0 +1,26 @@
+import host_health
+from host_health import HostHealth
+
+URL = "https://www.example.com/page"
+
+
+def test_breaker_opens_and_allows_one_probe(tmp_path, monkeypatch):
+    monkeypatch.setattr(host_health, "log_event", lambda *a, **k: None)
+    hh = HostHealth(str(tmp_path / "hh.json"))
+    for _ in range(host_health.HOST_BREAKER_FAILS):
+        assert hh.allow(URL)
+        hh.record(URL, ok=False, err="timeout")
+    assert hh.is_open(URL) and not hh.allow(URL)
+    hh.hosts[host_health.quality_domain(URL)]["open_until"] = 0          # cooldown scaduto
+    assert hh.allow(URL) and not hh.allow(URL)       # una sola prova half-open
+    hh.record(URL, ok=True, latency=0.2)
+    assert not hh.is_open(URL) and hh.allow(URL)
+    assert hh.penalty(URL) > 0
+
+
+def test_read_timeout_follows_latency(tmp_path):
+    hh = HostHealth(str(tmp_path / "hh.json"))
+    for _ in range(10):
+        hh.record(URL, ok=True, latency=0.1)
+    connect, read = hh.timeouts(URL)
+    assert read <= host_health.HTTP_TIMEOUT and connect <= read
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from indicator_store import IndicatorStore, _bucket, topic_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = IndicatorStore(str(tmp_path / "ind.sqlite"))
+    yield s
+    s.close()
+
+
+def test_bucket():
+    assert _bucket("2025-10-22", "D") == "2025-10-22"
+    assert _bucket("2025-10-22", "W") == "2025-10-20"   # lunedì
+    assert _bucket("2025-10-22", "M") == "2025-10-01"
+    with pytest.raises(ValueError):
+        _bucket("2025-10-22", "Y")
+
+
+def test_topic_key_normalizes():
+    assert topic_key("  Sudan   Crisis ") == topic_key("sudan crisis")
+
+
+def test_same_day_correction_is_kept(store):
+    url = "https://src.test/a"
+    assert store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 10, "url": url}]) == 1
+    assert store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 12, "url": url}]) == 1
+    assert store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 12, "url": url}]) == 0
+    assert store.series("sudan", "sfollati") == [("2025-10-20", 12.0)]
+    assert store.series("sudan", "sfollati", agg="mean") == [("2025-10-20", 11.0)]
+
+
+def test_uncited_points_from_different_runs_are_distinct(store):
+    store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 10}], run_id="r1")
+    store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 20}], run_id="r2")
+    assert store.append("Sudan", "sfollati", [{"date": "2025-10-20", "value": 20}], run_id="r2") == 0
+    assert store.series("Sudan", "sfollati", agg="max") == [("2025-10-20", 20.0)]
+    assert store.series("Sudan", "sfollati", agg="min") == [("2025-10-20", 10.0)]
+    assert store.citations("Sudan", "sfollati", "2025-10-20") == []
+
+
+def test_resampling_and_range(store):
+    pts = [{"date": d, "value": v} for d, v in
+           (("2025-10-01", 1), ("2025-10-15", 2), ("2025-11-03", 3), ("bad", 9), ("2025-11-04", "x"))]
+    assert store.append("Sudan", "prezzi", pts) == 3
+    assert store.series("Sudan", "prezzi", freq="M") == [("2025-10-01", 2.0), ("2025-11-01", 3.0)]
+    assert store.series("Sudan", "prezzi", start="2025-10-10", end="2025-10-31") == [("2025-10-15", 2.0)]
+    dates, values = store.columns("Sudan", "prezzi")
+    assert dates == ["2025-10-01", "2025-10-15", "2025-11-03"] and list(values) == [1.0, 2.0, 3.0]
+
+
+def test_migrates_v1_schema(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    c = sqlite3.connect(path)
+    c.executescript("""
+        CREATE TABLE points (topic TEXT NOT NULL, indicator TEXT NOT NULL, date TEXT NOT NULL, value REAL NOT NULL,
+            unit TEXT, url TEXT NOT NULL DEFAULT '', title TEXT, run_id TEXT, added REAL NOT NULL,
+            UNIQUE (topic, indicator, date, url));
+        INSERT INTO points VALUES ('sudan', 'sfollati', '2025-10-20', 10, NULL, '', NULL, NULL, 1);
+    """)
+    c.close()
+    s = IndicatorStore(path)
+    assert s.append("sudan", "sfollati", [{"date": "2025-10-20", "value": 12}]) == 1
+    assert s.series("sudan", "sfollati", agg="mean") == [("2025-10-20", 11.0)]
+    s.close()
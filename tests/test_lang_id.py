@@ -0,0 +1,40 @@
+import lang_id
+from lang_id import base_lang, detect_batch, detect_lang, html_lang, lang_allowed
+
+IT = ("Il governo ha annunciato che la missione non è stata sospesa e che gli aiuti "
+      "arriveranno nella regione con il sostegno delle agenzie della comunità internazionale.")
+EN = ("The government said that the mission was not suspended and that aid will arrive "
+      "in the region with the support of international agencies, which have been working there.")
+
+
+def test_text_detection():
+    assert detect_lang(IT, hint="") == "it"
+    assert detect_lang(EN, hint="") == "en"
+    assert detect_lang("Это новости о гуманитарной ситуации в регионе", hint="") == "ru"
+
+
+def test_text_wins_over_hardcoded_html_lang():
+    assert detect_lang(IT, html_lang_attr="en", hint="") == "it"
+
+
+def test_html_lang_used_when_text_inconclusive():
+    assert detect_lang("Khartoum 2025", html_lang_attr="fr-FR", hint="") == "fr"
+    assert detect_lang("", html_lang_attr="de") == "de"
+    assert detect_lang("", html_lang_attr="xx") == "unknown"
+
+
+def test_helpers():
+    assert base_lang("it_IT") == "it"
+    assert html_lang('<!doctype html><html class="x" lang="pt-BR">') == "pt"
+    assert lang_allowed("en", "it, en") and not lang_allowed("fr", "it,en")
+    assert lang_allowed("unknown", "it") and lang_allowed("fr", "")
+
+
+def test_detect_batch_matches_single_and_memoizes(monkeypatch):
+    texts = [IT, EN, IT, "", IT]
+    expected = [detect_lang(t, hint="") for t in texts]
+    calls = []
+    single = lang_id.detect_lang
+    monkeypatch.setattr(lang_id, "detect_lang", lambda t, hint="": calls.append(t) or single(t, hint=hint))
+    assert detect_batch(texts, hint="") == expected
+    assert len(calls) == 3   # IT, EN, "" una volta ciascuno
@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+import pytest
+
+from models import (
+    Citation, Document, Finding, Methodology, Narrative, ReportMetadata, ReportModel, Scope, Source,
+    TimeWindow, make, new_id, new_report_id
+)
+
+NOW = datetime(2025, 11, 5, 12, 0)
+
+
+def _rows(ids):
+    return [{"src": new_id("SRC", i), "doc": new_id("DOC", i), "url": f"https://www.example{i % 7}.org/news/{i}",
+             "domain": f"example{i % 7}.org", "title": f"Documento {i}", "published": f"2025-10-{i % 28 + 1:02d}",
+             "text": f"Testo del documento {i}. " * 20} for i in ids]
+
+
+def _build(rows, trusted):
+    """Report minimo dai record: stessi argomenti sul percorso strict e trusted."""
+    data = dict(
+        metadata=make(ReportMetadata, trusted, report_id=new_report_id(NOW, 1), title="t", query="q", generated_at=NOW),
+        scope=make(Scope, trusted, time_window=make(TimeWindow, trusted, **{"from": date(2025, 10, 1)},
+                                                    to=date(2025, 11, 5)), languages=["it"]),
+        sources=[make(Source, trusted, id=r["src"], type="Other", domain=r["domain"], title=r["title"],
+                      published_at=r["published"], accessed_at=NOW, url=r["url"], reliability="D") for r in rows],
+        documents=[make(Document, trusted, id=r["doc"], source_id=r["src"], url=r["url"], title=r["title"],
+                        published_at=r["published"], text=r["text"], lang="it") for r in rows],
+        findings=[make(Finding, trusted, id=new_id("CLM", k + 1), text=r["title"], support="Unknown", confidence=0.5,
+                       citations=[make(Citation, trusted, source_id=r["src"], document_id=r["doc"])])
+                  for k, r in enumerate(rows[::3])],
+        narrative=make(Narrative, trusted, sentiment="neutral"),
+        methodology=make(Methodology, trusted, collectors=["test"]),
+    )
+    return ReportModel.trusted(**data) if trusted else ReportModel(**data)
+
+
+def test_trusted_and_strict_build_same_json():
+    rows = _rows(range(1, 31))
+    assert _build(rows, True).to_json() == _build(rows, False).to_json()
+
+
+def test_trusted_still_checks_cross_refs():
+    rpt = _build(_rows(range(1, 11)), True)
+    data = dict(rpt.__dict__)
+    data["findings"] = list(data["findings"])
+    data["findings"][0] = data["findings"][0].copy(update={"citations": [make(Citation, True, source_id="SRC-9999")]})
+    with pytest.raises(ValueError):
+        ReportModel.trusted(**data)
+    ReportModel.trusted(check_refs=False, **data)   # opt-out esplicito
+
+
+def test_ids_beyond_four_digits():
+    rows = _rows([9999, 10001])
+    assert rows[-1]["src"] == "SRC-10001"
+    _build(rows, False)   # la validazione strict accetta ID a 5 cifre
@@ -0,0 +1,83 @@
+import asyncio
+
+import pdf_render
+from pdf_render import _Chromium, markdown_html
+
+
+class _Page:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def set_content(self, html, wait_until):
+        if self.browser.dead:
+            raise RuntimeError("Target closed")
+
+    async def pdf(self, **kw):
+        self.browser.printed += 1
+
+    async def close(self):
+        if self.browser.dead:
+            raise RuntimeError("Target closed")
+
+
+class _Browser:
+    def __init__(self):
+        self.dead = False
+        self.printed = 0
+
+    async def new_page(self):
+        if self.dead:
+            raise RuntimeError("Browser closed")
+        return _Page(self)
+
+    async def close(self):
+        pass
+
+
+class _Pw:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self):
+        self.launched.append(_Browser())
+        return self.launched[-1]
+
+
+def _chromium(pages=2):
+    c = object.__new__(_Chromium)   # senza thread/loop dedicati: coroutine eseguite con asyncio.run
+
+    async def start():
+        c.pw = _Pw()
+        c.browser = await c.pw.launch()
+        c.gen, c.relaunch_lock, c.pages = 0, asyncio.Lock(), asyncio.Queue()
+        for _ in range(pages):
+            c.pages.put_nowait((0, await c.browser.new_page()))
+    return c, start
+
+
+def test_browser_crash_relaunches_and_recovers(monkeypatch):
+    monkeypatch.setattr(pdf_render, "log_event", lambda *a, **k: None)
+    c, start = _chromium()
+
+    async def scenario():
+        await start()
+        c.browser.dead = True
+        try:
+            await c._render("<p>x</p>", "a.pdf")
+        except RuntimeError:
+            pass
+        # entrambe le pagine del pool (anche quella del browser morto) tornano utilizzabili
+        await c._render("<p>y</p>", "b.pdf")
+        await c._render("<p>z</p>", "c.pdf")
+        return c.pages.qsize()
+
+    assert asyncio.run(scenario()) == 2
+    assert len(c.pw.launched) == 2 and c.gen == 1
+    assert c.pw.launched[-1].printed == 2
+
+
+def test_markdown_html_is_cached():
+    html = markdown_html("# Titolo\n\ntesto")
+    assert "<h1>Titolo</h1>" in html
+    assert markdown_html("# Titolo\n\ntesto") is html
@@ -0,0 +1,45 @@
+import pytest
+import requests
+
+import pipeline
+
+
+@pytest.fixture
+def quiet(monkeypatch):
+    monkeypatch.setattr(pipeline, "log_event", lambda *a, **k: None)
+
+
+def test_invalid_json_falls_back(quiet, monkeypatch):
+    def bad_json(*a, **k):
+        raise ValueError("nessun JSON valido nella risposta")
+    monkeypatch.setattr(pipeline, "chat_json", bad_json)
+    assert pipeline.planner("sudan")["queries"][0] == "sudan"
+    data, _ = pipeline.summarize_with_citations([], shared={"refs": {}, "block": ""})
+    assert data["claims"] == []
+    assert pipeline.factcheck([{"text": "x"}], {})[0]["support"] == "unknown"
+
+
+@pytest.mark.parametrize("exc", [requests.ConnectionError("down"), requests.Timeout("slow"),
+                                 requests.HTTPError("429 Too Many Requests")])
+def test_transport_errors_propagate(quiet, monkeypatch, exc):
+    def fail(*a, **k):
+        raise exc
+    monkeypatch.setattr(pipeline, "chat_json", fail)
+    with pytest.raises(type(exc)):
+        pipeline.planner("sudan")
+    with pytest.raises(type(exc)):
+        pipeline.factcheck([{"text": "x"}], {})
+
+
+def test_seed_filter_batch_drops_off_language(quiet, monkeypatch):
+    monkeypatch.setattr(pipeline, "LANG_ALLOWED", "it")
+    it = {"title": "Il governo ha annunciato che la missione non è stata sospesa",
+          "snippet": "gli aiuti arriveranno nella regione con il sostegno delle agenzie"}
+    en = {"title": "The government said that the mission was not suspended",
+          "snippet": "and that aid will arrive in the region with the support of the agencies"}
+    seeds = [{**it, "url": "https://a.test/1"}, {**en, "url": "https://b.test/2"},
+             {**it, "url": "https://a.test/1#dup"}, {**it, "url": "https://c.test/3", "published": "2020-01-01"}]
+    f = pipeline.SeedFilter("2025-01-01")
+    assert [s["url"] for s in f.accept_many(seeds)] == ["https://a.test/1"]
+    assert f.stats == {"in": 4, "stale": 1, "near_dup": 0, "off_lang": 1, "kept": 1}
+    assert f.accept({**en, "url": "https://d.test/4"}) is None
@@ -0,0 +1,72 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import pipeline
+import service
+from service import JobStore, make_server, worker
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(service, "log_event", lambda *a, **k: None)
+
+
+def test_submit_queue_full_and_trim():
+    store = JobStore(max_queue=2, keep=1)
+    a, b = store.submit("a", 3), store.submit("b", 3)
+    assert a["status"] == "queued" and store.q.qsize() == 2
+    assert store.submit("c", 3) is None and len(store.jobs) == 2   # coda piena: job non registrato
+    store.update(a["id"], status="done")
+    store.update(b["id"], status="error")
+    assert list(store.jobs) == [b["id"]]      # resta solo l'ultimo concluso
+    assert store.counts() == {"error": 1}
+
+
+def test_worker_survives_job_trimmed_on_update(monkeypatch):
+    monkeypatch.setattr(pipeline, "run_pipeline", lambda q, topk: (f"# {q}", {}))
+    store, stop = JobStore(keep=0), threading.Event()
+    t = threading.Thread(target=worker, args=(store, stop), daemon=True)
+    t.start()
+    for q in ("uno", "due"):
+        store.submit(q, 3)
+    deadline = time.time() + 5
+    while store.q.unfinished_tasks and time.time() < deadline:
+        time.sleep(0.02)
+    assert store.q.unfinished_tasks == 0 and t.is_alive()
+    assert store.jobs == {}                   # keep=0: i job conclusi vengono scartati subito
+    stop.set()
+    t.join(2)
+
+
+def _request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    r = conn.getresponse()
+    out = r.status, json.loads(r.read() or b"null")
+    conn.close()
+    return out
+
+
+def test_http_round_trip():
+    store = JobStore(max_queue=1)
+    srv = make_server(store, workers=0, host="127.0.0.1", port=0)
+    port = srv.server_address[1]
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        code, job = _request(port, "POST", "/jobs", json.dumps({"query": "Sudan", "topk": 4}))
+        assert code == 202 and job["status"] == "queued"
+        code, got = _request(port, "GET", f"/jobs/{job['id']}")
+        assert code == 200 and got["query"] == "Sudan" and got["topk"] == 4
+        assert _request(port, "POST", "/jobs", json.dumps({"query": "altro"}))[0] == 429
+        assert _request(port, "POST", "/jobs", b"non json")[0] == 400
+        assert _request(port, "GET", "/jobs/nessuno")[0] == 404
+        code, health = _request(port, "GET", "/health")
+        assert code == 200 and health == {"workers": 0, "queued": 1, "jobs": {"queued": 1}}
+        assert [j["id"] for j in _request(port, "GET", "/jobs")[1]] == [job["id"]]
+    finally:
+        srv.shutdown()
+        srv.server_close()
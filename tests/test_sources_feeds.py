@@ -0,0 +1,45 @@
+import sources_feeds
+
+
+class _Resp:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+class _Session:
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+
+    def get(self, url, **kw):
+        return _Resp(self.bodies.pop(0))
+
+
+def _rss(guids):
+    items = "".join(f"<item><guid>{g}</guid><title>t</title></item>" for g in guids)
+    return f"<rss><channel>{items}</channel></rss>".encode()
+
+
+def test_skipped_guids_keep_most_recent(tmp_path, monkeypatch):
+    # entry senza link -> scartate; con FEED_KEEP=2 restano le ultime due viste, non le prime in ordine alfabetico
+    monkeypatch.setattr(sources_feeds, "STATE_PATH", str(tmp_path))
+    monkeypatch.setattr(sources_feeds, "FEED_KEEP", 2)
+    sess = _Session([_rss(["z1", "y2"]), _rss(["a3"])])
+    monkeypatch.setattr(sources_feeds, "session", lambda name: sess)
+    sources_feeds.poll_feed("t", "http://feed.test/rss")
+    sources_feeds.poll_feed("t", "http://feed.test/rss")
+    assert sources_feeds._load("http://feed.test/rss")["skipped"] == ["y2", "a3"]
@@ -0,0 +1,53 @@
+import sources_reliefweb as rw
+
+
+def _setup(tmp_path, monkeypatch, reports, cap=None):
+    calls = []
+
+    def fake_reports(query, since, until=None):
+        calls.append((since[:10], until and until[:10]))
+        hits = sorted((r for r in reports if r["created"] >= since[:10] and (not until or r["created"] < until[:10])),
+                      key=lambda r: r["created"], reverse=True)
+        fields = [{"url": r["url"], "date": {"created": r["created"]}} for r in hits[:cap]]
+        return fields, cap is None or len(hits) <= cap
+
+    monkeypatch.setattr(rw, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(rw, "log_event", lambda *a, **k: None)
+    monkeypatch.setattr(rw, "_reports", fake_reports)
+    monkeypatch.setattr(rw, "_to_doc", lambda f: {"url": f["url"], "published": f["date"]["created"][:10],
+                                                   "created": f["date"]["created"]})
+    return calls
+
+
+REPORTS = [{"url": f"https://rw.test/{d}", "created": d} for d in ("2025-09-10", "2025-10-05", "2025-10-20")]
+
+
+def test_wider_window_backfills_older_reports(tmp_path, monkeypatch):
+    calls = _setup(tmp_path, monkeypatch, REPORTS)
+    assert [d["url"] for d in rw.reliefweb_docs("sudan", "2025-10-01")] == ["https://rw.test/2025-10-20",
+                                                                          "https://rw.test/2025-10-05"]
+    docs = rw.reliefweb_docs("sudan", "2025-09-01")
+    assert {d["published"] for d in docs} == {"2025-09-10", "2025-10-05", "2025-10-20"}
+    # seconda run: solo i nuovi dopo il cursore + il tratto mancante [2025-09-01, 2025-10-01)
+    assert calls[1:] == [("2025-10-20", None), ("2025-09-01", "2025-10-01")]
+
+
+def test_narrower_window_prunes_cache(tmp_path, monkeypatch):
+    calls = _setup(tmp_path, monkeypatch, REPORTS)
+    rw.reliefweb_docs("sudan", "2025-09-01")
+    assert len(rw.reliefweb_docs("sudan", "2025-10-15")) == 1
+    assert len(rw._load_cache("sudan")["docs"]) == 1
+    # la copertura segue la cache: una finestra di nuovo ampia rifà il backfill
+    assert len(rw.reliefweb_docs("sudan", "2025-09-01")) == 3
+    assert calls[-1] == ("2025-09-01", "2025-10-15")
+
+
+def test_truncated_range_is_backfilled_later(tmp_path, monkeypatch):
+    reports = [{"url": f"https://rw.test/{d}", "created": f"2025-10-{d:02d}"} for d in range(1, 11)]
+    calls = _setup(tmp_path, monkeypatch, reports, cap=4)
+    assert len(rw.reliefweb_docs("sudan", "2025-10-01")) == 4
+    assert rw._load_cache("sudan")["earliest"] == "2025-10-07"   # non tutta la finestra
+    rw.reliefweb_docs("sudan", "2025-10-01")
+    assert len(rw.reliefweb_docs("sudan", "2025-10-01")) == 10
+    assert calls[1:3] == [("2025-10-10", None), ("2025-10-01", "2025-10-07")]
+    assert calls[-1] == ("2025-10-01", "2025-10-03")
@@ -0,0 +1,50 @@
+from streaming import OnlineTopK
+
+
+def test_topk_keeps_best_k():
+    top = OnlineTopK(2)
+    for did, score in enumerate([5, 6, 7, 1]):
+        top.add(did, score)
+    assert top.ids() == {1, 2}
+
+
+def test_remove_of_trimmed_id_leaves_no_ghost():
+    top = OnlineTopK(2)
+    for did, score in enumerate([5, 6, 7]):
+        top.add(did, score)
+    top.remove(0)            # già fuori dal top-k
+    top.add(3, 1)
+    top.add(4, 0.5)
+    assert top.ids() == {1, 2}
+    top.remove(2)
+    assert top.ids() == {1, 3}   # 0 è stato rimosso: non deve rientrare
+    assert 0 not in top.scores
+
+
+def test_replacement_promotes_trimmed_doc():
+    top = OnlineTopK(2)
+    for did, score in enumerate([5, 6, 7]):
+        top.add(did, score)
+    assert top.ids() == {1, 2}
+    top.remove(2)                # rimpiazzato dal dedup
+    assert top.ids() == {0, 1}   # 0 era uscito col trim e rientra
+    top.add(3, 1)
+    assert top.ids() == {0, 1}
+    top.add(4, 5.5)
+    assert top.ids() == {1, 4}
+
+
+def test_matches_full_recompute():
+    import random
+    rnd = random.Random(1)
+    top, live = OnlineTopK(5), {}
+    for did in range(300):
+        score = rnd.random()
+        top.add(did, score)
+        live[did] = score
+        if did % 3 == 0:
+            victim = rnd.choice(list(live))
+            top.remove(victim)
+            del live[victim]
+        best = sorted(live, key=live.get, reverse=True)[:5]
+        assert top.ids() == set(best)
@@ -0,0 +1,65 @@
+import pytest
+import requests
+
+import structured
+from structured import parse_json_tolerant
+
+
+def test_parse_plain_and_fenced():
+    assert parse_json_tolerant('{"a": 1}') == {"a": 1}
+    assert parse_json_tolerant('Ecco:\n```json\n[1, 2,]\n```') == [1, 2]
+
+
+def test_parse_truncated_output_is_closed():
+    assert parse_json_tolerant('{"a": [1, 2') == {"a": [1, 2]}
+
+
+def test_python_literals_fixed_only_outside_strings():
+    out = parse_json_tolerant('{"note": "None of True or False", "ok": True, "x": None,}')
+    assert out == {"note": "None of True or False", "ok": True, "x": None}
+
+
+def test_parse_raises_without_json():
+    with pytest.raises(ValueError):
+        parse_json_tolerant("nessun json qui")
+
+
+def _http_error(code, body):
+    resp = requests.Response()
+    resp.status_code = code
+    resp._content = body.encode()
+    return requests.HTTPError(response=resp)
+
+
+@pytest.fixture
+def caps(monkeypatch):
+    monkeypatch.setattr(structured, "_CAPS", {"json_schema": None, "json_object": None})
+    monkeypatch.setattr(structured, "log_event", lambda *a, **k: None)
+    return structured._CAPS
+
+
+def test_unsupported_response_format_is_downgraded(caps, monkeypatch):
+    seen = []
+
+    def chat(messages, max_tokens, response_format):
+        seen.append(response_format and response_format["type"])
+        if response_format and response_format["type"] == "json_schema":
+            raise _http_error(400, '{"error": "response_format json_schema is not supported"}')
+        return '{"a": 1}', {}
+
+    monkeypatch.setattr(structured, "chat_with_usage", chat)
+    structured._call([], 10, "sentiment", structured.SCHEMAS["sentiment"], "auto")
+    assert seen == ["json_schema", "json_object"]
+    assert caps["json_schema"] is False
+
+
+@pytest.mark.parametrize("code,body", [(400, "maximum context length exceeded"), (401, "unauthorized"),
+                                       (429, "rate limit")])
+def test_other_client_errors_keep_caps(caps, monkeypatch, code, body):
+    def chat(messages, max_tokens, response_format):
+        raise _http_error(code, body)
+
+    monkeypatch.setattr(structured, "chat_with_usage", chat)
+    with pytest.raises(requests.HTTPError):
+        structured._call([], 10, "sentiment", structured.SCHEMAS["sentiment"], "auto")
+    assert caps == {"json_schema": None, "json_object": None}
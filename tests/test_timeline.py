@@ -0,0 +1,63 @@
+import pytest
+
+import timeline
+
+
+@pytest.fixture
+def recognizers(monkeypatch):
+    monkeypatch.setattr(timeline, "RECOGNIZERS", dict(timeline.RECOGNIZERS))
+    yield
+    monkeypatch.undo()
+    timeline._RX_STATE.update(version=timeline._RX_STATE["version"] + 1, rx=None)
+    timeline._scan_text.cache_clear()
+    timeline.DATE_RX = timeline._combined_rx()
+
+
+def test_builtin_recognizers():
+    doc = {"text": "Il 3 marzo 2025 è iniziata la missione. Aggiornamento del 2025-03-10."}
+    assert [(m.iso, m.recognizer) for m in timeline.scan_document(doc)] == [
+        ("2025-03-03", "dmy_text"), ("2025-03-10", "iso")]
+
+
+def test_registered_recognizer_updates_date_rx_and_scans(recognizers):
+    before = timeline.DATE_RX
+    assert not before.search("rapporto del 10.03.2025")
+    timeline.register_recognizer("dmy_dot", r"\d{1,2}\.\d{1,2}\.\d{4}")
+    assert timeline.DATE_RX is not before
+    assert timeline.DATE_RX.search("rapporto del 10.03.2025").lastgroup == "dmy_dot"
+    assert "dmy_dot" in {m.recognizer for m in timeline.scan_document({"text": "rapporto del 10.03.2025 qui."})}
+
+
+def test_sentence_at_uses_surrounding_dots():
+    text = "Prima frase. Il 2025-03-10 è arrivato il convoglio. Terza frase."
+    dots = timeline._sentence_bounds(text)
+    start = text.index("2025")
+    assert timeline._sentence_at(text, dots, start, start + 10) == "Il 2025-03-10 è arrivato il convoglio"
+
+
+def test_to_iso_date_fast():
+    from utils_date import to_iso_date_fast
+    assert to_iso_date_fast("2025/3/5") == "2025-03-05"
+    assert to_iso_date_fast("5 novembre 2025") == "2025-11-05"
+    assert to_iso_date_fast("5 November 2025") == "2025-11-05"
+    assert to_iso_date_fast("2025-02-30") is None
+    assert to_iso_date_fast("") is None
+
+
+def test_cluster_day_events_merges_sources():
+    events = [("2025-03-10", "Il convoglio umanitario è arrivato a Khartoum con cibo e medicinali", [1]),
+              ("2025-03-10", "Il convoglio umanitario è arrivato a Khartoum con cibo e medicinali.", [2]),
+              ("2025-03-10", "Scontri a nord di El Fasher, evacuati due villaggi", [3])]
+    out = timeline.cluster_day_events(events)
+    assert out[0][2] == [1, 2] and out[1][2] == [3]
+
+
+def test_event_cap_stops_scanning_documents(monkeypatch):
+    body = " ".join(f"Il {d} marzo 2025 la missione umanitaria ha distribuito aiuti alimentari nella regione."
+                    for d in range(1, 9))
+    docs = [{"url": f"https://a.test/{i}", "text": body} for i in range(5)]
+    scanned = []
+    scan = timeline.scan_document
+    monkeypatch.setattr(timeline, "scan_document", lambda d: scanned.append(d["url"]) or scan(d))
+    timeline.extract_timeline(docs, {}, "2025-01-01", "2025-12-31", max_events=2)
+    assert scanned == ["https://a.test/0"]   # tetto raggiunto sul primo documento
@@ -0,0 +1,8 @@
+from visualization import _data_hash
+
+
+def test_data_hash_stable_and_sensitive():
+    a = _data_hash("source_mix", {"ansa.it": 3, "who.int": 1}, "Fonti")
+    assert a == _data_hash("source_mix", {"who.int": 1, "ansa.it": 3}, "Fonti")
+    assert a != _data_hash("source_mix", {"ansa.it": 4, "who.int": 1}, "Fonti")
+    assert a != _data_hash("source_mix", {"ansa.it": 3, "who.int": 1}, "Altro titolo")
@@ -1,26 +1,121 @@
 # timeline.py
+# Motore unico di estrazione date/eventi: recognizer pluggabili, una sola scansione
+# per documento (cache), adapter di output per pipeline (dict), formato legacy
+# di timeline_extractor e modello `Event` di models.py.
 from __future__ import annotations
 import re
-from typing import List, Dict, Any, Optional, Tuple
-from utils_date import to_iso_date
-
-IT_MONTHS = "gennaio|febbraio|marzo|aprile|maggio|giugno|luglio|agosto|settembre|ottobre|novembre|dicembre"
-EN_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
-
-DATE_RX = re.compile(
-    rf"\b(\d{{4}}[-/]\d{{1,2}}[-/]\d{{1,2}}|\d{{1,2}}\s+(?:{IT_MONTHS}|{EN_MONTHS})\s+\d{{4}})\b",
-    re.IGNORECASE
-)
-
-def _sentences_near(text: str, start: int, end: int, span: int = 180) -> str:
-    left = text.rfind(".", 0, start)
-    left = 0 if left == -1 else left + 1
-    right = text.find(".", end)
-    if right == -1:
-        right = min(len(text), end + span)
-    snippet = " ".join(text[left:right].split())
-    return snippet.strip()
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
+from utils_date import to_iso_date_fast, IT_MONTHS, EN_MONTHS
+from dedup import simhash, hamming, token_overlap, _tokens
+from config import TIMELINE_CLUSTER_HAMMING, TIMELINE_CLUSTER_OVERLAP
 
+_DOT_RX = re.compile(r"\.")
+
+TEXT_SCAN_CHARS = 6000
+SNIPPET_SPAN = 180
+
+# ---------------------------
+# Recognizer pluggabili
+# ---------------------------
+# nome -> pattern (senza gruppi con nome); vengono fusi in un'unica regex con
+# alternative nominate, così ogni testo è percorso una volta sola.
+RECOGNIZERS: Dict[str, str] = {
+    "iso": r"\d{4}[-/]\d{1,2}[-/]\d{1,2}",
+    "dmy_text": rf"\d{{1,2}}\s+(?:{IT_MONTHS}|{EN_MONTHS})\s+\d{{4}}",
+}
+
+_RX_STATE: Dict[str, Any] = {"version": 0, "rx": None}
+
+
+def register_recognizer(name: str, pattern: str) -> None:
+    """Aggiunge/sostituisce un recognizer di date. Ricompila la regex combinata (anche
+    `DATE_RX`) e invalida la cache delle scansioni."""
+    global DATE_RX
+    RECOGNIZERS[name] = pattern
+    _RX_STATE["version"] += 1
+    _RX_STATE["rx"] = None
+    _scan_text.cache_clear()
+    DATE_RX = _combined_rx()
+
+
+def _combined_rx() -> re.Pattern:
+    if _RX_STATE["rx"] is None:
+        alts = "|".join(f"(?P<{name}>{pat})" for name, pat in RECOGNIZERS.items())
+        _RX_STATE["rx"] = re.compile(rf"\b(?:{alts})\b", re.IGNORECASE)
+    return _RX_STATE["rx"]
+
+
+# retro-compatibilità: regex storica IT/EN, tenuta allineata da register_recognizer
+# (leggerla come `timeline.DATE_RX`: un `from timeline import DATE_RX` resta alla versione importata)
+DATE_RX = _combined_rx()
+
+
+class Mention(NamedTuple):
+    iso: str
+    raw: str
+    snippet: str          # frase completa (non troncata), whitespace collassato
+    start: int            # offset nel testo scansionato
+    recognizer: str
+
+
+def _sentence_bounds(text: str) -> List[int]:
+    """Offset di ogni "." nel testo (una sola passata): delimitano le frasi."""
+    return [m.start() for m in _DOT_RX.finditer(text)]
+
+
+def _sentence_at(text: str, dots: List[int], start: int, end: int, span: int = SNIPPET_SPAN) -> str:
+    """Frase che contiene [start, end), trovata per ricerca binaria sugli offset.
+    Stessa semantica del vecchio scan rfind/find: dal "." precedente al successivo,
+    oppure fino a end+span se la frase non chiude.
+    """
+    k = bisect_right(dots, start - 1)          # primo "." >= start
+    left = dots[k - 1] + 1 if k > 0 else 0
+    j = k
+    while j < len(dots) and dots[j] < end:     # "." interni alla data (rari)
+        j += 1
+    right = dots[j] if j < len(dots) else min(len(text), end + span)
+    return " ".join(text[left:right].split())
+
+
+@lru_cache(maxsize=4096)
+def _scan_text(text: str, version: int) -> Tuple[Mention, ...]:
+    # `version` entra nella chiave di cache: cambia quando si registra un recognizer
+    rx = _combined_rx()
+    dots = None
+    out: List[Mention] = []
+    for m in rx.finditer(text):
+        iso = to_iso_date_fast(m.group(0))
+        if not iso:
+            continue
+        if dots is None:
+            dots = _sentence_bounds(text)
+        snippet = _sentence_at(text, dots, m.start(), m.end())
+        out.append(Mention(iso, m.group(0), snippet, m.start(), m.lastgroup or ""))
+    return tuple(out)
+
+
+def _field(d: Any, name: str, default: Any = None) -> Any:
+    """Accesso uniforme a dict della pipeline e oggetti (es. models.Document)."""
+    if isinstance(d, dict):
+        return d.get(name, default)
+    return getattr(d, name, default)
+
+
+def scan_document(d: Any) -> Tuple[Mention, ...]:
+    """Tutte le date riconosciute nel testo del documento (primi TEXT_SCAN_CHARS).
+    Estrazione unica e in cache: i vari consumer la filtrano a modo loro.
+    """
+    t = (_field(d, "text") or "")[:TEXT_SCAN_CHARS]
+    if not t:
+        return ()
+    return _scan_text(t, _RX_STATE["version"])
+
+
+# ---------------------------
+# Filtri comuni
+# ---------------------------
 def _in_window(iso: Optional[str], from_iso: Optional[str], to_iso: Optional[str]) -> bool:
     if not iso:
         return False
@@ -31,13 +126,43 @@ def _in_window(iso: Optional[str], from_iso: Optional[str], to_iso: Optional[str
     return True
 
 def _is_noisy_live(d: Dict[str, Any], snippet: str) -> bool:
-    if d.get("is_live"):
+    if _field(d, "is_live"):
         s = snippet.lower()
         # tante ore/aggiornamenti => scarta
         if s.count(":") >= 2 or "live" in s or "diretta" in s:
             return True
     return False
 
+def cluster_day_events(
+    events: List[Tuple[str, str, List[int]]],
+    th: int = TIMELINE_CLUSTER_HAMMING,
+    min_overlap: float = TIMELINE_CLUSTER_OVERLAP
+) -> List[Tuple[str, str, List[int]]]:
+    """
+    Raggruppa eventi dello stesso giorno che descrivono lo stesso fatto.
+    Simhash (dedup.py) come prefiltro economico, conferma con overlap dei token.
+    Rappresentante = primo arrivato (doc meglio rankato); le fonti vengono unite.
+    Output ordinato per numero di fonti (corroborazione) decrescente.
+    """
+    clusters: List[Dict[str, Any]] = []
+    for iso, text, srcs in events:
+        sh = simhash(text)
+        toks = frozenset(_tokens(text))
+        for c in clusters:
+            if hamming(sh, c["simhash"]) <= th and token_overlap(toks, c["tokens"]) >= min_overlap:
+                for s in srcs:
+                    if s not in c["sources"]:
+                        c["sources"].append(s)
+                break
+        else:
+            clusters.append({"text": text, "sources": list(srcs), "simhash": sh, "tokens": toks})
+    clusters.sort(key=lambda c: len(c["sources"]), reverse=True)  # sort stabile: a parità resta l'ordine di rank
+    return [(events[0][0], c["text"], c["sources"]) for c in clusters]
+
+
+# ---------------------------
+# Adapter: pipeline (dict con fonti [n])
+# ---------------------------
 def extract_timeline(
     docs: List[Dict[str, Any]],
     refs_map: Dict[int, str],
@@ -49,8 +174,11 @@ def extract_timeline(
     Eventi: [{"date":"YYYY-MM-DD","text":"...","sources":[n,...]}]
     Regole:
       - headline per documento: usa detected_date/published se nel periodo
-      - poi date nel testo (regex IT/EN) con snippet
-      - filtra live rumorosi, dedup per (date,text_lower), max 2 eventi/giorno
+      - poi date nel testo (recognizer IT/EN) con snippet, su tutti i documenti ranked
+        (scansione unica in cache via `scan_document`)
+      - filtra live rumorosi, dedup per (date,text_lower)
+      - cluster per giorno delle frasi simili (stesso fatto da più testate): fonti unite
+      - max 2 eventi/giorno, privilegiando i cluster con più fonti
     """
     events: List[Tuple[str, str, List[int]]] = []
     seen = set()
@@ -60,7 +188,7 @@ def extract_timeline(
 
     # 1) Evento headline (meta)
     for d in docs:
-        iso = to_iso_date(d.get("detected_date") or d.get("published"))
+        iso = to_iso_date_fast(d.get("detected_date") or d.get("published"))
         if not _in_window(iso, from_iso, to_iso):
             continue
         title = (d.get("title") or "").strip()
@@ -73,28 +201,33 @@ def extract_timeline(
         sid = url2id.get(d.get("url"))
         events.append((iso, title[:200], [sid] if sid else []))
 
-    # 2) Date dal corpo
-    for d in docs[:30]:
-        t = (d.get("text") or "")[:6000]
-        for m in DATE_RX.finditer(t):
-            iso = to_iso_date(m.group(0))
-            if not _in_window(iso, from_iso, to_iso):
+    # 2) Date dal corpo, fino al tetto di eventi candidati (anche fra documenti)
+    cap = max_events * 2
+    for d in docs:
+        if len(events) >= cap:
+            break
+        for m in scan_document(d):
+            if not _in_window(m.iso, from_iso, to_iso):
                 continue
-            snippet = _sentences_near(t, m.start(), m.end())
+            snippet = m.snippet
             if len(snippet) < 40:
                 continue
             if _is_noisy_live(d, snippet):
                 continue
-            key = (iso, snippet.lower())
+            key = (m.iso, snippet.lower())
             if key in seen:
                 continue
             seen.add(key)
             sid = url2id.get(d.get("url"))
-            events.append((iso, snippet[:220], [sid] if sid else []))
-            if len(events) >= max_events * 2:
+            events.append((m.iso, snippet[:220], [sid] if sid else []))
+            if len(events) >= cap:
                 break
 
-    # 3) Max 2 eventi per giorno
+    # 3) Cluster per giorno + max 2 eventi per giorno
+    return _cap_by_day(events, max_events)
+
+
+def _cap_by_day(events: List[Tuple[str, str, List[int]]], max_events: int) -> List[Dict[str, Any]]:
     from collections import defaultdict
     by_day: Dict[str, List[Tuple[str, str, List[int]]]] = defaultdict(list)
     for e in events:
@@ -102,9 +235,83 @@ def extract_timeline(
 
     out: List[Dict[str, Any]] = []
     for day in sorted(by_day.keys()):
-        for _, text, srcs in by_day[day][:2]:
+        for _, text, srcs in cluster_day_events(by_day[day])[:2]:
             out.append({"date": day, "text": text, "sources": srcs})
 
     if len(out) > max_events:
         out = out[:max_events]
     return out
+
+
+def merge_events(
+    timeline: List[Dict[str, Any]],
+    extra: List[Dict[str, Any]],
+    from_iso: Optional[str],
+    to_iso: Optional[str],
+    max_events: int = 12
+) -> List[Dict[str, Any]]:
+    """Integra eventi esterni (es. dall'analisi LLM) nella timeline: stessa finestra,
+    stesso clustering per giorno e stesso tetto; a parità vince la timeline esistente."""
+    events = [(e["date"], e["text"], list(e.get("sources") or [])) for e in timeline]
+    events += [(e["date"], e["text"], list(e.get("sources") or []))
+               for e in extra if _in_window(e.get("date"), from_iso, to_iso)]
+    return _cap_by_day(events, max_events)
+
+
+# ---------------------------
+# Adapter: formato legacy {"date","event","url"}
+# ---------------------------
+_ONLY_DATE_RX = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def _doc_events(docs: List[Any], max_chars: int, min_len: int):
+    """(doc, mention) per le date nei primi `max_chars` caratteri, con frase utile."""
+    for d in docs:
+        for m in scan_document(d):
+            if m.start >= max_chars:
+                break
+            if len(m.snippet) < min_len or _ONLY_DATE_RX.fullmatch(m.snippet):
+                continue
+            yield d, m
+
+def extract_events_legacy(docs: List[Dict[str, Any]], max_events: int = 12, max_chars: int = 2000) -> List[Dict[str, Any]]:
+    """Date + frase contigua, dedup (date+frase); schema di timeline_extractor."""
+    seen = set()
+    events: List[Dict[str, Any]] = []
+    for d, m in _doc_events(docs, max_chars, min_len=25):
+        key = (m.iso, m.snippet)
+        if key in seen:
+            continue
+        seen.add(key)
+        events.append({"date": m.iso, "event": m.snippet[:240], "url": _field(d, "url")})
+        if len(events) >= max_events:
+            break
+    events.sort(key=lambda x: x["date"])
+    return events
+
+
+# ---------------------------
+# Adapter: models.Event (report strutturato)
+# ---------------------------
+def extract_event_models(docs: List[Any], limit: int = 10, max_chars: int = 2000) -> list:
+    """
+    Eventi come `models.Event` con citazione al documento d'origine.
+    I documenti devono esporre `id` e `source_id` (es. models.Document).
+    """
+    from models import Event, Citation, new_id  # lazy: pydantic solo per chi lo usa
+    seen = set()
+    events = []
+    for d, m in _doc_events(docs, max_chars, min_len=25):
+        key = (m.iso, m.snippet)
+        if key in seen:
+            continue
+        seen.add(key)
+        events.append(Event(
+            id=new_id("EVT", len(events) + 1),
+            date_iso=m.iso,
+            title=m.snippet[:140],
+            summary=None,
+            citations=[Citation(source_id=_field(d, "source_id"), document_id=_field(d, "id"))]
+        ))
+        if len(events) >= limit:
+            break
+    return sorted(events, key=lambda x: x.date_iso)
@@ -1,14 +1,24 @@
 # utils_date.py
 from __future__ import annotations
+import re
+from functools import lru_cache
+from datetime import date
 from typing import Optional, Any
-from dateutil import parser as dateparser
 
 # Nota: userai dateparser (dateparser==1.x) con SETTINGS robusti.
 # Forziamo lingue IT/EN e ordine DMY per evitare 04/11 -> April 11.
-try:
-    import dateparser as dp  # libreria "dateparser" (diversa da dateutil)
-except Exception:
-    dp = None  # fallback a dateutil se non disponibile
+# Import lazy: "dateparser" costa ~0.4 s (tabelle timezone), serve solo sulle date non banali.
+_DP: dict = {}
+
+def _dateparser():
+    """Libreria "dateparser" (diversa da dateutil), None se non disponibile (fallback a dateutil)."""
+    if "dp" not in _DP:
+        try:
+            import dateparser as dp  # lazy import
+        except Exception:
+            dp = None
+        _DP["dp"] = dp
+    return _DP["dp"]
 
 DEF_SETTINGS = {
     "PREFER_DAY_OF_MONTH": "first",
@@ -29,6 +39,7 @@ def to_iso_date(value: Any) -> Optional[str]:
         return None
 
     # 1) Prova con `dateparser` (se installato) con lingua forzata
+    dp = _dateparser()
     if dp is not None:
         try:
             dt = dp.parse(s, languages=["it", "en"], settings=DEF_SETTINGS)
@@ -39,23 +50,67 @@ def to_iso_date(value: Any) -> Optional[str]:
 
     # 2) Fallback a dateutil (meno affidabile per “novembre”, ma meglio di niente)
     try:
+        from dateutil import parser as dateparser  # lazy import
         dt2 = dateparser.parse(s, dayfirst=True, fuzzy=True)
         return dt2.date().isoformat()
     except Exception:
         return None
 
 
+IT_MONTHS = "gennaio|febbraio|marzo|aprile|maggio|giugno|luglio|agosto|settembre|ottobre|novembre|dicembre"
+EN_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
+
+MONTH_NUM = {
+    **{m: i for i, m in enumerate(IT_MONTHS.split("|"), start=1)},
+    **{m: i for i, m in enumerate(EN_MONTHS.split("|"), start=1)},
+}
+
+_ISO_RX = re.compile(r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:$|[ T])")
+_DMY_TEXT_RX = re.compile(r"^(\d{1,2})\s+([a-zà-ù]+)\s+(\d{4})$", re.IGNORECASE)
+
+
+def _ymd(y: int, m: int, d: int) -> Optional[str]:
+    try:
+        return date(y, m, d).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def to_iso_date_fast(value: Any) -> Optional[str]:
+    """Come `to_iso_date`, ma con fast path per i formati tipici
+    (YYYY-MM-DD[...], YYYY/MM/DD, "5 novembre 2025", "5 November 2025")
+    e memoizzazione; il resto passa da `to_iso_date`.
+    """
+    if value is None:
+        return None
+    s = str(value).strip()
+    if not s:
+        return None
+    m = _ISO_RX.match(s)
+    if m:
+        return _ymd(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = _DMY_TEXT_RX.match(s)
+    if m:
+        mon = MONTH_NUM.get(m.group(2).lower())
+        if mon:
+            return _ymd(int(m.group(3)), mon, int(m.group(1)))
+    return to_iso_date(s)
+
+
 def to_epoch_seconds(iso_like: Optional[str]) -> float:
     """Converte ISO/qualsiasi data parsabile in epoch seconds (0.0 se non parsabile)."""
     if not iso_like:
         return 0.0
     try:
         # Tenta prima con dateparser (coerente con to_iso_date)
+        dp = _dateparser()
         if dp is not None:
             dt = dp.parse(str(iso_like), languages=["it", "en"], settings=DEF_SETTINGS)
             if dt:
                 return float(dt.timestamp())
         # fallback dateutil
+        from dateutil import parser as dateparser  # lazy import
         return dateparser.parse(str(iso_like), dayfirst=True, fuzzy=True).timestamp()
     except Exception:
         return 0.0
@@ -1,42 +1,135 @@
 # visualization.py
+# matplotlib (~0.5 s di import) e folium si caricano solo quando si disegna davvero.
+# Grafici: figure a oggetti su canvas Agg, cache per hash dei dati (sidecar .sha256 accanto
+# all'asset in ASSETS_DIR) e rendering dei batch in un pool di processi.
+import hashlib
+import json
 import os
-import matplotlib.pyplot as plt
-from config import ASSETS_DIR
+from config import ASSETS_DIR, CHART_DPI, CHART_WORKERS
+from provenance import log_event
 
-os.makedirs(ASSETS_DIR, exist_ok=True)
+_RENDER_VERSION = 1  # da incrementare se cambia l'aspetto dei grafici (invalida la cache)
+_POOL = None
 
-def chart_source_mix(counts: dict, filename="source_mix.png"):
+
+def _asset_path(filename: str) -> str:
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    return os.path.join(ASSETS_DIR, filename)
+
+
+def _figure():
+    # API a oggetti + canvas Agg: niente pyplot, niente stato globale né ricerca del backend interattivo
+    from matplotlib.figure import Figure  # lazy import
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _draw_source_mix(ax, counts, title=None):
     labels = list(counts.keys())
-    values = [counts.get(k, 0) for k in labels]
-    plt.figure()
-    plt.bar(labels, values)
-    plt.title("Distribuzione tipologie di fonte")
-    plt.ylabel("Conteggio")
-    out = os.path.join(ASSETS_DIR, filename)
-    plt.xticks(rotation=20, ha="right")
-    plt.tight_layout()
-    plt.savefig(out, dpi=144)
-    plt.close()
-    # normalizza per Markdown: sempre slash
+    ax.bar(labels, [counts.get(k, 0) for k in labels])
+    ax.set_title(title or "Distribuzione tipologie di fonte")
+    ax.set_ylabel("Conteggio")
+    ax.tick_params(axis="x", labelrotation=20)
+    for t in ax.get_xticklabels():
+        t.set_horizontalalignment("right")
+
+
+def _draw_timeseries(ax, series, title=None):
+    ax.plot([d for d, _ in series], [v for _, v in series], marker="o")
+    ax.set_title(title or "Indicatore")
+    ax.set_xlabel("Data")
+    ax.set_ylabel("Valore")
+    ax.tick_params(axis="x", labelrotation=30)
+    for t in ax.get_xticklabels():
+        t.set_horizontalalignment("right")
+
+
+_DRAW = {"source_mix": _draw_source_mix, "timeseries": _draw_timeseries}
+
+
+def _data_hash(kind, data, title) -> str:
+    blob = json.dumps([_RENDER_VERSION, CHART_DPI, kind, data, title], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _cached(out: str, h: str) -> bool:
+    """True se l'asset esiste ed è stato generato dagli stessi dati (sidecar <file>.sha256)."""
+    try:
+        with open(out + ".sha256", encoding="utf-8") as f:
+            return f.read().strip() == h and os.path.exists(out)
+    except OSError:
+        return False
+
+
+def _render(kind, data, out, title, h):
+    """Disegna e salva un grafico (eseguibile anche in un processo del pool)."""
+    fig, ax = _figure()
+    _DRAW[kind](ax, data, title)
+    fig.tight_layout()
+    fig.savefig(out, dpi=CHART_DPI)
+    with open(out + ".sha256", "w", encoding="utf-8") as f:
+        f.write(h)
+    return out
+
+
+def render_chart(kind, data, filename, title=None) -> str:
+    """Un grafico: salta il rendering se l'asset corrisponde già agli stessi dati."""
+    out = _asset_path(filename)
+    h = _data_hash(kind, data, title)
+    if not _cached(out, h):
+        _render(kind, data, out, title, h)
     return out.replace("\\", "/")
 
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        import atexit
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn: sicuro anche se il processo padre ha thread attivi (pipeline, service)
+        _POOL = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        atexit.register(_POOL.shutdown)
+    return _POOL
+
+
+def render_charts(specs) -> list:
+    """
+    Batch di grafici [(kind, data, filename[, title]), ...] -> percorsi nello stesso ordine.
+    Gli asset già aggiornati vengono saltati; gli altri si disegnano nel pool di processi
+    (inline se ne resta uno solo o CHART_WORKERS <= 1).
+    """
+    jobs, outs = [], []
+    for spec in specs:
+        kind, data, filename = spec[:3]
+        title = spec[3] if len(spec) > 3 else None
+        out = _asset_path(filename)
+        h = _data_hash(kind, data, title)
+        outs.append(out.replace("\\", "/"))
+        if not _cached(out, h):
+            jobs.append((kind, data, out, title, h))
+    if len(jobs) > 1 and CHART_WORKERS > 1:
+        for f in [_pool().submit(_render, *j) for j in jobs]:
+            f.result()
+    else:
+        for j in jobs:
+            _render(*j)
+    log_event("charts_rendered", {"requested": len(outs), "rendered": len(jobs)})
+    return outs
+
+
+def chart_source_mix(counts: dict, filename="source_mix.png"):
+    # normalizza per Markdown: sempre slash
+    return render_chart("source_mix", counts, filename)
+
+
 def chart_indicator_timeseries(series, filename="indicator_series.png", title="Indicatore"):
     """
     series: list of tuples [(date_iso, value), ...] già ordinati
     """
-    dates = [d for d,_ in series]
-    vals = [v for _,v in series]
-    plt.figure()
-    plt.plot(dates, vals, marker="o")
-    plt.title(title)
-    plt.xlabel("Data")
-    plt.ylabel("Valore")
-    plt.xticks(rotation=30, ha="right")
-    plt.tight_layout()
-    out = os.path.join(ASSETS_DIR, filename)
-    plt.savefig(out, dpi=144)
-    plt.close()
-    return out
+    return render_chart("timeseries", [list(p) for p in series], filename, title)
 
 def map_events(events, filename="events_map.html"):
     """
@@ -57,6 +150,6 @@ def map_events(events, filename="events_map.html"):
         if "lat" in e and "lon" in e:
             popup = f"{e['date']}: {e['event']}<br><a href='{e.get('url','#')}' target='_blank'>Fonte</a>"
             folium.Marker([e["lat"], e["lon"]], popup=popup).add_to(m)
-    out = os.path.join(ASSETS_DIR, filename)
+    out = _asset_path(filename)
     m.save(out)
     return out